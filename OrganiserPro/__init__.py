@@ -9,14 +9,23 @@ and for finding and handling duplicate files.
 __version__ = "0.1.0"
 
 from .cli import cli
-from .dedupe import find_duplicates, find_duplicates_cli, handle_duplicates
-from .sorter import sort_by_date, sort_by_type
+from .dedupe import (
+    DedupeStats,
+    find_duplicate_ids,
+    find_duplicates,
+    find_duplicates_cli,
+    handle_duplicates,
+)
+from .sorter import sort_by_date, sort_by_size, sort_by_type
 
 __all__ = [
     "cli",
     "sort_by_type",
     "sort_by_date",
+    "sort_by_size",
     "find_duplicates",
+    "find_duplicate_ids",
+    "DedupeStats",
     "find_duplicates_cli",
     "handle_duplicates",
 ]
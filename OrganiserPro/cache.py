@@ -0,0 +1,186 @@
+"""Persistent on-disk cache of file hashes."""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .metrics import count
+
+# Entries not used for this many days are dropped when the cache is closed
+DEFAULT_MAX_AGE_DAYS = 90
+# Least recently used entries beyond this count are dropped when closing
+DEFAULT_MAX_ENTRIES = 5_000_000
+# Number of pending writes buffered before they are committed
+_FLUSH_EVERY = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (dev, ino, kind)
+)
+"""
+
+
+def default_cache_path() -> Path:
+    """Return the default location of the hash cache database.
+
+    Honours ``$XDG_CACHE_HOME`` and falls back to ``~/.cache``.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join("~", ".cache")
+    return Path(base).expanduser() / "organiserpro" / "hashes.sqlite3"
+
+
+class HashCache:
+    """SQLite-backed cache of file digests keyed by inode.
+
+    Entries are keyed by ``(st_dev, st_ino, kind)`` and only returned while
+    the file's size and ``st_mtime_ns`` still match, so any modification of
+    a file invalidates its cached digest. ``kind`` separates different
+    digests of the same file, such as full and partial hashes, and other
+    values derived from its contents, such as its detected MIME type.
+
+    The cache is safe to share between hashing threads. Writes are buffered
+    and committed in batches; call :meth:`close` (or use the cache as a
+    context manager) to flush them and apply the eviction policy.
+
+    Args:
+        path: Location of the database; defaults to :func:`default_cache_path`
+        max_age_days: Drop entries that have not been used for this long
+        max_entries: Keep at most this many entries, evicting the least
+            recently used ones first
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = Path(path) if path is not None else default_cache_path()
+        self.max_age_days = max_age_days
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[int, int, str, int, int, str, float]] = []
+        self._touched: List[Tuple[float, int, int, str]] = []
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def __enter__(self) -> "HashCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def get(self, st: os.stat_result, kind: str) -> Optional[str]:
+        """Return the cached digest for a file, or None if it is missing or stale.
+
+        Args:
+            st: Result of ``os.stat`` for the file
+            kind: Which digest to look up (e.g. ``"sha256"``)
+        """
+        return self.lookup(st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, kind)
+
+    def put(self, st: os.stat_result, kind: str, digest: str) -> None:
+        """Store the digest of a file as it was when ``st`` was taken.
+
+        Args:
+            st: Result of ``os.stat`` taken before the file was read
+            kind: Which digest is being stored
+            digest: The digest to cache
+        """
+        self.store(st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, kind, digest)
+
+    def lookup(
+        self, dev: int, ino: int, size: int, mtime_ns: int, kind: str
+    ) -> Optional[str]:
+        """Like :meth:`get`, for callers that already have the stat fields.
+
+        Scans that produce :class:`~OrganiserPro.scanner.FileEntry` objects
+        can look values up without another ``stat`` call.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, digest FROM hashes "
+                "WHERE dev = ? AND ino = ? AND kind = ?",
+                (dev, ino, kind),
+            ).fetchone()
+            if row is None or row[0] != size or row[1] != mtime_ns:
+                self.misses += 1
+                count("cache_misses")
+                return None
+            self.hits += 1
+            count("cache_hits")
+            self._touched.append((time.time(), dev, ino, kind))
+            self._maybe_flush()
+            return str(row[2])
+
+    def store(
+        self, dev: int, ino: int, size: int, mtime_ns: int, kind: str, value: str
+    ) -> None:
+        """Like :meth:`put`, for callers that already have the stat fields."""
+        with self._lock:
+            self._pending.append(
+                (dev, ino, kind, size, mtime_ns, value, time.time())
+            )
+            self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if len(self._pending) + len(self._touched) >= _FLUSH_EVERY:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO hashes "
+                "(dev, ino, kind, size, mtime_ns, digest, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._pending,
+            )
+            self._pending = []
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE hashes SET last_used = ? "
+                "WHERE dev = ? AND ino = ? AND kind = ?",
+                self._touched,
+            )
+            self._touched = []
+        self._conn.commit()
+
+    def evict(self) -> None:
+        """Drop expired entries and trim the cache to ``max_entries``."""
+        with self._lock:
+            self._flush()
+            cutoff = time.time() - self.max_age_days * 86400
+            self._conn.execute("DELETE FROM hashes WHERE last_used < ?", (cutoff,))
+            self._conn.execute(
+                "DELETE FROM hashes WHERE rowid IN ("
+                "SELECT rowid FROM hashes ORDER BY last_used DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Flush pending writes, apply eviction and close the database."""
+        if self._conn is None:
+            return
+        self.evict()
+        with self._lock:
+            self._conn.close()
+            self._conn = None  # type: ignore[assignment]
@@ -0,0 +1,109 @@
+"""Cooperative cancellation and pausing of long-running operations."""
+
+import signal
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from rich.console import Console
+
+console = Console()
+
+
+class OperationCancelled(Exception):
+    """Raised at the next check point once an operation has been cancelled."""
+
+    def __init__(self, message: str = "Operation cancelled") -> None:
+        super().__init__(message)
+
+
+class CancelToken:
+    """Lets one thread pause, resume or cancel an operation running on others.
+
+    Long-running loops call :func:`checkpoint` between units of work:
+    directories while scanning, 64 KiB blocks while hashing and files while
+    moving. A check returns at once while the operation may run, blocks
+    while it is paused and raises :class:`OperationCancelled` once it has
+    been cancelled, so work only ever stops between two whole steps.
+    """
+
+    def __init__(self) -> None:
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """True once :meth:`cancel` has been called."""
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self) -> bool:
+        """True between :meth:`pause` and :meth:`resume`."""
+        return not self._running.is_set()
+
+    def cancel(self) -> None:
+        """Stop the operation at its next check point, even if paused."""
+        self._cancelled.set()
+        self._running.set()
+
+    def pause(self) -> None:
+        """Hold the operation at its next check point until resumed."""
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self) -> None:
+        """Let a paused operation carry on."""
+        self._running.set()
+
+    def check(self) -> None:
+        """Wait while paused, then raise if the operation was cancelled.
+
+        Raises:
+            OperationCancelled: If :meth:`cancel` has been called
+        """
+        if not self._running.is_set():
+            self._running.wait()
+        if self._cancelled.is_set():
+            raise OperationCancelled()
+
+
+def checkpoint(cancel: Optional[CancelToken]) -> None:
+    """Check a token that may be None; a single test without one.
+
+    Raises:
+        OperationCancelled: If the token has been cancelled
+    """
+    if cancel is not None:
+        cancel.check()
+
+
+@contextmanager
+def cancel_on_interrupt() -> Iterator[CancelToken]:
+    """
+    Cancel a token on Ctrl+C, for the duration of a CLI command.
+
+    The first Ctrl+C lets the operation stop cleanly at its next check
+    point; a second one interrupts it at once, as Ctrl+C normally does.
+    Outside the main thread signals cannot be caught, and the token is
+    only cancelled by calling :meth:`CancelToken.cancel`.
+
+    Yields:
+        CancelToken: Token to pass to the operation
+    """
+    token = CancelToken()
+    if threading.current_thread() is not threading.main_thread():
+        yield token
+        return
+
+    def interrupt(signum: int, frame: object) -> None:
+        if token.cancelled:
+            raise KeyboardInterrupt
+        token.cancel()
+        console.print("[yellow]Cancelling... press Ctrl+C again to stop at once")
+
+    previous = signal.signal(signal.SIGINT, interrupt)
+    try:
+        yield token
+    finally:
+        signal.signal(signal.SIGINT, previous)
@@ -1,3 +1,4 @@
+from pathlib import Path
 from typing import Optional
 import platform
 import sys
@@ -5,7 +6,17 @@ import sys
 import click
 from rich.console import Console
 
-from .commands import sort_by_type, sort_by_date, dedupe
+from .commands import (
+    sort_by_type,
+    sort_by_date,
+    sort_by_size,
+    dedupe,
+    apply,
+    undo,
+    watch,
+)
+from .metrics import METRICS_FORMATS, start_metrics, stop_metrics
+from .profiling import start_profiling, stop_profiling
 
 # Initialize console for rich output
 console = Console()
@@ -28,6 +39,33 @@ def check_os_compatibility():
             sys.exit(1)
 
 
+def _report_profile(profile_out: Optional[str]) -> None:
+    """Stop profiling and print the breakdown, saving the cProfile if asked."""
+    profiler = stop_profiling()
+    if profiler is None:
+        return
+    profiler.print_report()
+    if profile_out and profiler.dump_stats(Path(profile_out)):
+        console.print(f"cProfile data written to {profile_out}")
+
+
+def _write_metrics(metrics_out: str, metrics_format: str) -> None:
+    """Stop collecting metrics and export them to ``metrics_out``."""
+    metrics = stop_metrics()
+    if metrics is None:
+        return
+    # Runs while the context closes, so an exception ending the command is
+    # still being handled here
+    error = sys.exc_info()[1]
+    metrics.failed = error is not None and not (
+        isinstance(error, click.exceptions.Exit) and error.exit_code == 0
+    )
+    try:
+        metrics.write(Path(metrics_out), metrics_format)
+    except OSError as e:
+        console.print(f"[yellow]Warning: Could not write metrics to {metrics_out}: {e}")
+
+
 # Create the main CLI group
 @click.group(
     name="organiserpro",
@@ -35,11 +73,52 @@ def check_os_compatibility():
     context_settings={"help_option_names": ["-h", "--help"]},
 )
 @click.version_option(version=VERSION, message="%(prog)s, version %(version)s")
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Print the wall time, CPU time and bytes read of each phase at exit",
+)
+@click.option(
+    "--profile-out",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Also write a cProfile dump to this file (implies --profile)",
+)
+@click.option(
+    "--metrics-out",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write counters, throughput and hash latency histograms of the run "
+    "to this file (.prom files get the Prometheus text format)",
+)
+@click.option(
+    "--metrics-format",
+    type=click.Choice(METRICS_FORMATS),
+    default="auto",
+    show_default=True,
+    help="Format of --metrics-out: json, or prometheus for the node-exporter "
+    "textfile collector",
+)
 @click.pass_context
-def cli(ctx: click.Context) -> None:
+def cli(
+    ctx: click.Context,
+    profile: bool,
+    profile_out: Optional[str],
+    metrics_out: Optional[str],
+    metrics_format: str,
+) -> None:
     """OrganiserPro CLI - Linux Edition (Advanced/Developer Interface)"""
     # Check OS compatibility
     check_os_compatibility()
+
+    if profile or profile_out:
+        start_profiling(cprofile=profile_out is not None)
+        ctx.call_on_close(lambda: _report_profile(profile_out))
+
+    if metrics_out and ctx.invoked_subcommand is not None:
+        start_metrics(ctx.invoked_subcommand)
+        ctx.call_on_close(lambda: _write_metrics(metrics_out, metrics_format))
     
     if ctx.invoked_subcommand is None:
         console.print("[bold blue]OrganiserPro CLI - Linux Edition[/bold blue]")
@@ -49,7 +128,11 @@ def cli(ctx: click.Context) -> None:
         console.print("[bold]Available CLI Commands:[/bold]")
         console.print("  [cyan]sort-by-type[/cyan]    Sort files in DIRECTORY by file type")
         console.print("  [cyan]sort-by-date[/cyan]    Sort files in DIRECTORY by date")
+        console.print("  [cyan]sort-by-size[/cyan]    Sort files in DIRECTORY by size")
         console.print("  [cyan]dedupe[/cyan]          Find and handle duplicate files in DIRECTORY")
+        console.print("  [cyan]apply[/cyan]           Execute a plan saved with --save-plan")
+        console.print("  [cyan]undo[/cyan]            Undo the changes recorded in a journal")
+        console.print("  [cyan]watch[/cyan]           Sort files in DIRECTORY as they arrive")
         console.print(
             "\n[dim]Use 'organiserpro-cli COMMAND --help' for more information about a command.[/dim]"
         )
@@ -59,7 +142,11 @@ def cli(ctx: click.Context) -> None:
 # Register all commands with the main CLI
 cli.add_command(sort_by_type)
 cli.add_command(sort_by_date)
+cli.add_command(sort_by_size)
 cli.add_command(dedupe)
+cli.add_command(apply)
+cli.add_command(undo)
+cli.add_command(watch)
 
 
 # Keep these functions for backward compatibility with tests
@@ -83,14 +170,10 @@ def sort_by_date_cmd(directory: str, date_format: str, dry_run: bool = False) ->
 
 def sort_by_size_cmd(directory: str, dry_run: bool = False) -> int:
     """Legacy function for sort by size functionality."""
-    console.print(f"[bold]Sorting files in:[/] {directory}")
-    console.print("[bold]Sort by:[/] size")
-
-    if dry_run:
-        console.print("[yellow]Dry run: No changes will be made")
-        console.print("Would sort files by size")
-    else:
-        console.print("Sorting by size is not yet implemented", style="yellow")
+    from .sorter import sort_by_size as sort_by_size_impl
+
+    # Call the implementation directly
+    sort_by_size_impl(directory=directory, dry_run=dry_run)
     return 0
 
 
@@ -1,16 +1,64 @@
 """CLI command implementations for OrganiserPro."""
 
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 import click
 from rich.console import Console
 
-from .sorter import sort_by_type as sort_by_type_impl, sort_by_date as sort_by_date_impl
+from .cancel import cancel_on_interrupt
+from .content import content_detection_available
+from .dedupe import VERIFY_MODES
+from .hashing import DEFAULT_ALGORITHM, available_algorithms
+from .journal import execute_journaled, latest_journal, undo_journal
+from .metadata import DATE_SOURCES
+from .plan import OperationPlan, StalePlanError, print_plan
+from .sizes import SizeBuckets, parse_size
+from .sorter import (
+    bucket_by_type,
+    date_bucketer,
+    plan_sort_by_date,
+    plan_sort_by_size,
+    plan_sort_by_type,
+    sort_by_date as sort_by_date_impl,
+    sort_by_size as sort_by_size_impl,
+    sort_by_type as sort_by_type_impl,
+)
+from .watch import DEFAULT_SETTLE, watch_directory
 
 console = Console()
 
 
+def _save_plan(plan: OperationPlan, path: str) -> None:
+    """Show a plan and write it to a JSON file for the apply command."""
+    print_plan(plan)
+    plan.save(path)
+    console.print(f"Saved plan to {path}")
+
+
+def _tree_options(command: Callable[..., int]) -> Callable[..., int]:
+    """Add the --recursive, --flatten and --workers options of the sorters."""
+    command = click.option(
+        "--workers",
+        type=click.IntRange(min=1),
+        default=None,
+        help="Number of directories scanned and sorted at once "
+        "(default: number of CPUs)",
+    )(command)
+    command = click.option(
+        "--flatten",
+        is_flag=True,
+        default=False,
+        help="With --recursive, gather all files into folders in DIRECTORY",
+    )(command)
+    return click.option(
+        "--recursive",
+        is_flag=True,
+        default=False,
+        help="Also sort every subdirectory in place (hidden ones are skipped)",
+    )(command)
+
+
 @click.command(name="sort-by-type")
 @click.argument(
     "directory",
@@ -19,21 +67,54 @@ console = Console()
 @click.option(
     "--dry-run", is_flag=True, help="Show what would be done without making changes"
 )
-def sort_by_type(directory: str, dry_run: bool) -> int:
+@click.option(
+    "--save-plan",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write the planned changes to a JSON file for 'apply' instead of running",
+)
+@click.option(
+    "--by-content",
+    is_flag=True,
+    default=False,
+    help="Detect each file's type from its contents instead of its extension "
+    "(requires python-magic)",
+)
+@_tree_options
+def sort_by_type(
+    directory: str,
+    dry_run: bool,
+    save_plan: Optional[str],
+    by_content: bool,
+    recursive: bool,
+    flatten: bool,
+    workers: Optional[int],
+) -> int:
     """Sort files in DIRECTORY by file type."""
     directory = str(Path(directory).resolve())
-    if dry_run:
-        exts = set(
-            p.suffix.lower()
-            for p in Path(directory).iterdir()
-            if p.is_file() and not p.name.startswith(".")
-        )
+    if flatten and not recursive:
+        console.print("[red]Error: --flatten requires --recursive")
+        return 1
+    if by_content and not content_detection_available():
         console.print(
-            "Would group files by type into folders: "
-            f"{', '.join(exts) if exts else 'No files found'}"
+            "[red]Error: --by-content requires python-magic "
+            "(pip install 'organiserpro[content]')"
+        )
+        return 1
+    if save_plan:
+        plan = plan_sort_by_type(
+            directory, recursive, flatten, workers, by_content=by_content
         )
+        _save_plan(plan, save_plan)
         return 0
-    sort_by_type_impl(directory=directory, dry_run=dry_run)
+    sort_by_type_impl(
+        directory=directory,
+        dry_run=dry_run,
+        recursive=recursive,
+        flatten=flatten,
+        workers=workers,
+        by_content=by_content,
+    )
     return 0
 
 
@@ -50,16 +131,121 @@ def sort_by_type(directory: str, dry_run: bool) -> int:
 @click.option(
     "--dry-run", is_flag=True, help="Show what would be done without making changes"
 )
-def sort_by_date(directory: str, date_format: str, dry_run: bool) -> int:
+@click.option(
+    "--save-plan",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write the planned changes to a JSON file for 'apply' instead of running",
+)
+@click.option(
+    "--date-source",
+    type=click.Choice(DATE_SOURCES),
+    default="mtime",
+    show_default=True,
+    help="Date to sort by: modification time, change time, photos' EXIF capture "
+    "time (other files are left in place), or auto (capture time, else mtime)",
+)
+@_tree_options
+def sort_by_date(
+    directory: str,
+    date_format: str,
+    dry_run: bool,
+    save_plan: Optional[str],
+    date_source: str,
+    recursive: bool,
+    flatten: bool,
+    workers: Optional[int],
+) -> int:
     """Sort files in DIRECTORY by date."""
     directory = str(Path(directory).resolve())
-    if dry_run:
-        console.print(
-            "Would sort files by date with format "
-            f"'{date_format}' in directory: {directory}"
+    if flatten and not recursive:
+        console.print("[red]Error: --flatten requires --recursive")
+        return 1
+    if save_plan:
+        plan = plan_sort_by_date(
+            directory, date_format, recursive, flatten, workers, date_source
         )
+        _save_plan(plan, save_plan)
         return 0
-    sort_by_date_impl(directory=directory, date_format=date_format, dry_run=dry_run)
+    sort_by_date_impl(
+        directory=directory,
+        date_format=date_format,
+        dry_run=dry_run,
+        recursive=recursive,
+        flatten=flatten,
+        workers=workers,
+        date_source=date_source,
+    )
+    return 0
+
+
+@click.command(name="sort-by-size")
+@click.argument(
+    "directory",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, resolve_path=True),
+)
+@click.option(
+    "--buckets",
+    type=click.Choice(["named", "log2"]),
+    default="named",
+    show_default=True,
+    help="Size folders: tiny/small/medium/large/huge (under 64K, 1M, 128M, 1G "
+    "and above), or one per power of two from 1K to 1T",
+)
+@click.option(
+    "--boundaries",
+    default=None,
+    help="Custom comma-separated bucket limits instead, e.g. '1M,100M,1G'",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Show a size histogram and the planned moves without making changes",
+)
+@click.option(
+    "--save-plan",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write the planned changes to a JSON file for 'apply' instead of running",
+)
+@_tree_options
+def sort_by_size(
+    directory: str,
+    buckets: str,
+    boundaries: Optional[str],
+    dry_run: bool,
+    save_plan: Optional[str],
+    recursive: bool,
+    flatten: bool,
+    workers: Optional[int],
+) -> int:
+    """Sort files in DIRECTORY into folders by size."""
+    directory = str(Path(directory).resolve())
+    if flatten and not recursive:
+        console.print("[red]Error: --flatten requires --recursive")
+        return 1
+    if boundaries:
+        try:
+            size_buckets = SizeBuckets.from_boundaries(
+                [parse_size(part) for part in boundaries.split(",")]
+            )
+        except ValueError as e:
+            console.print(f"[red]Error: {e}")
+            return 1
+    else:
+        size_buckets = SizeBuckets.log2() if buckets == "log2" else SizeBuckets()
+    if save_plan:
+        plan = plan_sort_by_size(directory, size_buckets, recursive, flatten, workers)
+        _save_plan(plan, save_plan)
+        return 0
+    sort_by_size_impl(
+        directory=directory,
+        buckets=size_buckets,
+        dry_run=dry_run,
+        recursive=recursive,
+        flatten=flatten,
+        workers=workers,
+    )
     return 0
 
 
@@ -88,18 +274,70 @@ def sort_by_date(directory: str, date_format: str, dry_run: bool) -> int:
     help="Move duplicate files to this directory",
     default=None,
 )
+@click.option(
+    "--hardlink",
+    is_flag=True,
+    help="Replace duplicates with hard links to the kept file (same filesystem)",
+    default=False,
+)
+@click.option(
+    "--reflink",
+    is_flag=True,
+    help="Share extents between duplicates via copy-on-write (btrfs, XFS)",
+    default=False,
+)
 @click.option(
     "--dry-run",
     is_flag=True,
     help="Show what would be done without making changes",
     default=False,
 )
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of files to hash in parallel (default: number of CPUs)",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help="Hash every file from scratch instead of using the on-disk hash cache",
+)
+@click.option(
+    "--hash",
+    "algorithm",
+    type=click.Choice(available_algorithms()),
+    default=DEFAULT_ALGORITHM,
+    show_default=True,
+    help="Hash algorithm used to find duplicate candidates",
+)
+@click.option(
+    "--verify",
+    type=click.Choice(VERIFY_MODES),
+    default="none",
+    show_default=True,
+    help="Confirm duplicate groups with SHA-256 or a byte-by-byte comparison",
+)
+@click.option(
+    "--save-plan",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write the planned changes to a JSON file for 'apply' instead of running",
+)
 def dedupe(
     target_dir: str,
     recursive: bool,
     delete: bool,
     move_to: Optional[str],
+    hardlink: bool,
+    reflink: bool,
     dry_run: bool,
+    workers: Optional[int],
+    no_cache: bool,
+    algorithm: str,
+    verify: str,
+    save_plan: Optional[str],
 ) -> int:
     """Find and handle duplicate files in DIRECTORY.
 
@@ -109,13 +347,6 @@ def dedupe(
         # Resolve the directory path
         resolved_dir = str(Path(target_dir).resolve())
 
-        if dry_run:
-            console.print(
-                f"[yellow]Dry run: Would search for duplicates in {resolved_dir}"
-            )
-            console.print("Dry run: No files will be modified")
-            return 0
-
         # Call the deduplication function
         from .dedupe import find_duplicates_cli
 
@@ -126,8 +357,138 @@ def dedupe(
             delete=delete,
             move_to=str(Path(move_to).resolve()) if move_to else None,
             dry_run=dry_run,
+            workers=workers,
+            use_cache=not no_cache,
+            algorithm=algorithm,
+            verify=verify,
+            link=hardlink,
+            reflink=reflink,
+            save_plan=save_plan,
         )
         return 0  # Success
     except Exception as e:
         console.print(f"[red]Error: {str(e)}")
         return 1  # Error exit code
+
+
+@click.command(name="apply")
+@click.argument(
+    "plan_file",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False),
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Run the plan even if the files changed since it was made",
+)
+def apply(plan_file: str, force: bool) -> int:
+    """Execute a plan saved with --save-plan, without rescanning.
+
+    PLAN_FILE: JSON plan written by sort-by-type, sort-by-date or dedupe.
+    """
+    try:
+        plan = OperationPlan.load(plan_file)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        console.print(f"[red]Error: Could not read plan {plan_file}: {e}")
+        return 1
+
+    print_plan(plan)
+    try:
+        with cancel_on_interrupt() as cancel:
+            result, journal_path = execute_journaled(
+                plan, check=not force, cancel=cancel
+            )
+    except StalePlanError as e:
+        console.print(f"[red]Error: {e} (or use --force)")
+        return 1
+
+    for action, error in result.failed:
+        console.print(
+            f"[yellow]Warning: Could not {action.action} {action.source}: {error}"
+        )
+    console.print(f"✅ Applied {len(result.done)} of {len(plan.actions)} actions")
+    if result.cancelled:
+        console.print(
+            f"[yellow]Cancelled; {len(result.cancelled)} actions were not started"
+        )
+    if result.bytes_reclaimed:
+        console.print(f"Reclaimed {result.bytes_reclaimed:,} bytes")
+    if journal_path is not None:
+        console.print(f"Undo with: organiserpro undo {journal_path}")
+    return 1 if result.failed or result.cancelled else 0
+
+
+@click.command(name="undo")
+@click.argument(
+    "journal",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False),
+    required=False,
+)
+def undo(journal: Optional[str]) -> int:
+    """Undo the changes recorded in an operation JOURNAL.
+
+    JOURNAL: Journal printed by a sort, dedupe or apply run. Defaults to the
+    most recent one.
+    """
+    journal_path = Path(journal) if journal else latest_journal()
+    if journal_path is None:
+        console.print("[yellow]No journals found to undo![/]")
+        return 1
+
+    console.print(f"Undoing changes from {journal_path}")
+    try:
+        result = undo_journal(journal_path)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error: Could not read journal {journal_path}: {e}")
+        return 1
+
+    for intent, reason in result.skipped:
+        console.print(f"[yellow]Skipped {intent['source']}: {reason}")
+    for intent, error in result.failed:
+        console.print(f"[red]Error restoring {intent['source']}: {error}")
+    console.print(f"✅ Restored {result.restored} files")
+    return 1 if result.failed else 0
+
+
+@click.command(name="watch")
+@click.argument(
+    "directory",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, resolve_path=True),
+)
+@click.option(
+    "--by",
+    type=click.Choice(["type", "date"]),
+    default="type",
+    show_default=True,
+    help="Sort arriving files by file type or by modification date",
+)
+@click.option(
+    "--date-format",
+    default="%Y-%m",
+    help="Date format for --by date (e.g., '%%Y-%%m-%%d' or '%%Y/%%m/%%d')",
+)
+@click.option(
+    "--settle",
+    type=click.FloatRange(min=0),
+    default=DEFAULT_SETTLE,
+    show_default=True,
+    help="Seconds a file must stay unchanged before it is moved",
+)
+@click.option(
+    "--initial/--no-initial",
+    default=True,
+    show_default=True,
+    help="Sort the files already in DIRECTORY before watching",
+)
+def watch(
+    directory: str, by: str, date_format: str, settle: float, initial: bool
+) -> int:
+    """Watch DIRECTORY and sort files into folders as they arrive."""
+    bucket = bucket_by_type if by == "type" else date_bucketer(date_format)
+    try:
+        watch_directory(directory, bucket, settle=settle, initial=initial)
+    except OSError as e:
+        console.print(f"[red]Error: Could not watch {directory}: {e}")
+        return 1
+    return 0
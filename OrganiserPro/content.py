@@ -0,0 +1,132 @@
+"""Detect file types from their contents with libmagic."""
+
+import mimetypes
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .cache import HashCache
+from .scanner import FileEntry
+from .sorter import bucket_by_type
+from .workers import WorkerPool
+
+try:
+    import magic
+except ImportError:  # pragma: no cover - optional dependency
+    magic = None
+
+# Bytes read from the start of each file; enough for libmagic to recognise
+# every common format without reading whole files
+DEFAULT_HEADER_SIZE = 8192
+
+# Types libmagic reports when it cannot tell what a file is
+_UNKNOWN_TYPES = frozenset(
+    {"application/octet-stream", "inode/x-empty", "application/x-empty"}
+)
+
+
+def content_detection_available() -> bool:
+    """Return True if python-magic and libmagic are installed."""
+    return magic is not None
+
+
+class ContentTypeDetector:
+    """Work out the MIME type of files from their first few kilobytes.
+
+    libmagic handles ("cookies") are not safe to share between threads, so
+    each worker thread lazily opens its own and keeps it for the lifetime
+    of the detector. Only the first ``header_size`` bytes of a file are
+    read, and results are cached by inode and mtime in a
+    :class:`~OrganiserPro.cache.HashCache`, so files that have not changed
+    since the last run are not opened at all.
+
+    Args:
+        cache: Optional cache of earlier results
+        header_size: Number of bytes read from the start of each file
+        workers: Number of threads used by :meth:`prefetch`
+
+    Raises:
+        ImportError: If python-magic is not installed
+    """
+
+    def __init__(
+        self,
+        cache: Optional[HashCache] = None,
+        header_size: int = DEFAULT_HEADER_SIZE,
+        workers: Optional[int] = None,
+    ) -> None:
+        if magic is None:
+            raise ImportError(
+                "Content detection needs python-magic; "
+                "install it with: pip install 'organiserpro[content]'"
+            )
+        self.cache = cache
+        self.header_size = header_size
+        self.workers = workers
+        self._kind = f"mime-{header_size}"
+        self._local = threading.local()
+        self._types: Dict[str, Optional[str]] = {}
+        # Open the caller's handle now, so a broken libmagic fails early
+        self._handle()
+
+    def _handle(self) -> "magic.Magic":
+        """Return this thread's libmagic handle, opening it on first use."""
+        handle = getattr(self._local, "handle", None)
+        if handle is None:
+            handle = self._local.handle = magic.Magic(mime=True)
+        return handle
+
+    def detect(self, entry: FileEntry) -> Optional[str]:
+        """Return the MIME type of a file, or None if it cannot be read."""
+        key = (entry.dev, entry.inode, entry.size, entry.mtime_ns)
+        if self.cache is not None:
+            cached = self.cache.lookup(*key, self._kind)
+            if cached is not None:
+                return cached
+        try:
+            with open(entry.path, "rb") as f:
+                header = f.read(self.header_size)
+            mime = self._handle().from_buffer(header) if header else "inode/x-empty"
+        except (OSError, magic.MagicException):
+            return None
+        if self.cache is not None:
+            self.cache.store(*key, self._kind, mime)
+        return mime
+
+    def prefetch(self, entries: Iterable[FileEntry]) -> None:
+        """Detect the types of many files at once on a pool of threads."""
+        entries = [e for e in entries if e.path not in self._types]
+        with WorkerPool(self.workers, name="organiserpro-magic") as pool:
+            for entry, mime in zip(entries, pool.map(self.detect, entries)):
+                self._types[entry.path] = mime
+
+    def mime_type(self, entry: FileEntry) -> Optional[str]:
+        """Return the MIME type of a file, detecting it if not prefetched."""
+        if entry.path not in self._types:
+            self._types[entry.path] = self.detect(entry)
+        return self._types[entry.path]
+
+    def bucket(self, entry: FileEntry) -> str:
+        """Return the folder a file is sorted into by its contents.
+
+        The file's own extension is kept whenever it agrees with the
+        detected type (``.jpeg`` for a JPEG stays ``jpeg``), and also for
+        text files, which libmagic cannot reliably tell apart. Otherwise
+        the usual extension of the detected type is used, so an
+        extensionless PDF is filed under ``pdf``. Files of unknown type
+        fall back to their extension.
+        """
+        extension = bucket_by_type(entry)
+        mime = self.mime_type(entry)
+        if mime is None or mime in _UNKNOWN_TYPES:
+            return extension
+        if Path(entry.name).suffix:
+            if mime.startswith("text/"):
+                return extension
+            if f".{extension}" in mimetypes.guess_all_extensions(mime):
+                return extension
+        guessed = mimetypes.guess_extension(mime)
+        if guessed:
+            return guessed[1:]
+        subtype = mime.partition("/")[2]
+        return subtype[2:] if subtype.startswith("x-") else subtype
@@ -1,108 +1,733 @@
+import os
+import sqlite3
+import time
 from collections import defaultdict
-from hashlib import sha256
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import click
 from rich.console import Console
-from rich.progress import Progress
 from rich.prompt import Confirm
 from rich.table import Table
 
+from .cache import HashCache
+from .cancel import CancelToken, OperationCancelled, cancel_on_interrupt, checkpoint
+from .hashing import DEFAULT_ALGORITHM, HashEngine, new_hasher
+from .index import FileIndex
+from .journal import Journal, open_journal
+from .metrics import count, observe
+from .mover import MovePlanner, replace_with_hardlink
+from .plan import (
+    ACTIONS,
+    DELETE,
+    LINK,
+    MOVE,
+    REFLINK,
+    OperationPlan,
+    PlannedAction,
+    execute_plan,
+    print_plan,
+)
+from .profiling import span
+from .progress import ProgressCallback, ProgressReporter, RichProgress
+from .reflink import ReflinkNotSupported, dedupe_file_range
+from .scanner import scan_files
+
 console = Console()
 
+# Number of bytes read from each end of a file by the partial-hash stage
+PARTIAL_BLOCK_SIZE = 4096
+
+# Ways of confirming candidate groups found with a fast hash
+VERIFY_MODES = ("none", "sha256", "bytes")
+
+
+@dataclass
+class DedupeStats:
+    """I/O accounting for a single :func:`find_duplicates` run.
+
+    Each stage of the pipeline records how many bytes it read and how many
+    bytes it ruled out, so callers can see how much reading was avoided.
+    Digests taken from the hash cache are counted separately from bytes
+    actually read, so a re-run over an unchanged tree reads nothing.
+    """
+
+    files_scanned: int = 0
+    bytes_scanned: int = 0
+    bytes_skipped_by_size: int = 0
+    bytes_read_partial: int = 0
+    bytes_skipped_by_partial: int = 0
+    bytes_read_full: int = 0
+    bytes_cached_partial: int = 0
+    bytes_cached_full: int = 0
+    cache_hits: int = 0
+    hardlinked_files: int = 0
+
+    @property
+    def bytes_read(self) -> int:
+        """Total number of bytes read across all stages."""
+        return self.bytes_read_partial + self.bytes_read_full
+
+    @property
+    def bytes_cached(self) -> int:
+        """Total number of bytes whose digest came from the hash cache."""
+        return self.bytes_cached_partial + self.bytes_cached_full
+
+    @property
+    def bytes_avoided(self) -> int:
+        """Number of bytes never read, as ruled out by size or partial hash.
+
+        Files hashed in full read their first and last blocks a second time,
+        so this is not simply :attr:`bytes_scanned` minus :attr:`bytes_read`.
+        """
+        return self.bytes_skipped_by_size + self.bytes_skipped_by_partial
+
+
+class DuplicateScan(NamedTuple):
+    """Result of :func:`find_duplicate_ids`.
+
+    Attributes:
+        index: Every file that was scanned
+        groups: Duplicate groups mapping a digest to ids of distinct inodes
+            with identical contents
+        hardlinks: Sets of ids that are hard links to one and the same
+            inode; these already share storage and are not duplicates
+    """
+
+    index: FileIndex
+    groups: Dict[str, List[int]]
+    hardlinks: List[List[int]]
+
+
+class _Digest(NamedTuple):
+    """A file's digest and whether it was taken from the hash cache."""
 
-def get_file_hash(file_path: Path, block_size: int = 65536) -> str:
+    digest: str
+    cached: bool = False
+
+
+def get_file_hash(
+    file_path: Path,
+    block_size: int = 65536,
+    cache: Optional[HashCache] = None,
+    algorithm: str = DEFAULT_ALGORITHM,
+    cancel: Optional[CancelToken] = None,
+) -> str:
     """
     Generate a hash for a file to uniquely identify its contents.
 
     Args:
         file_path: Path to the file
         block_size: Size of chunks to read at once
+        cache: Optional :class:`HashCache` consulted before reading the file
+        algorithm: Name of the hash algorithm to use (see
+            :func:`~OrganiserPro.hashing.available_algorithms`)
+        cancel: Optional token, checked between blocks so that even a very
+            large file stops being read within a fraction of a second
 
     Returns:
-        str: SHA-256 hash of the file contents
+        str: Hex digest of the file contents (SHA-256 by default)
+
+    Raises:
+        OperationCancelled: If ``cancel`` is cancelled while hashing
     """
-    hasher = sha256()
+    return _full_hash(file_path, block_size, cache, algorithm, cancel).digest
+
+
+def get_partial_hash(
+    file_path: Path,
+    block_size: int = PARTIAL_BLOCK_SIZE,
+    cache: Optional[HashCache] = None,
+    algorithm: str = DEFAULT_ALGORITHM,
+) -> str:
+    """
+    Hash the first and last block of a file.
+
+    Files that differ in their header or trailer are told apart without
+    reading the rest of their contents.
+
+    Args:
+        file_path: Path to the file
+        block_size: Number of bytes to read from each end of the file
+        cache: Optional :class:`HashCache` consulted before reading the file
+        algorithm: Name of the hash algorithm to use
+
+    Returns:
+        str: Hex digest of the first and last block, or "" on read errors
+    """
+    return _partial_hash(file_path, block_size, cache, algorithm).digest
+
+
+def _full_hash(
+    file_path: Path,
+    block_size: int = 65536,
+    cache: Optional[HashCache] = None,
+    algorithm: str = DEFAULT_ALGORITHM,
+    cancel: Optional[CancelToken] = None,
+) -> _Digest:
+    """Hash a whole file, reporting whether the digest came from the cache."""
+    hasher = new_hasher(algorithm)
+    st = None
     try:
+        if cache is not None:
+            count("stat_calls")
+            st = os.stat(file_path)
+            cached = cache.get(st, algorithm)
+            if cached is not None:
+                return _Digest(cached, cached=True)
+        started = time.perf_counter()
+        read = 0
         with open(file_path, "rb") as f:
             buf = f.read(block_size)
             while len(buf) > 0:
                 hasher.update(buf)
+                read += len(buf)
+                checkpoint(cancel)
                 buf = f.read(block_size)
-        return hasher.hexdigest()
+        digest = hasher.hexdigest()
+        observe("full_hash_seconds", time.perf_counter() - started)
+        count("files_hashed")
+        count("bytes_hashed", read)
+        if cache is not None and st is not None:
+            cache.put(st, algorithm, digest)
+        return _Digest(digest)
     except (IOError, PermissionError) as e:
         console.print(f"[yellow]Warning: Could not read {file_path}: {e}")
-        return ""
+        count("errors")
+        return _Digest("")
+
+
+def _partial_hash(
+    file_path: Path,
+    block_size: int = PARTIAL_BLOCK_SIZE,
+    cache: Optional[HashCache] = None,
+    algorithm: str = DEFAULT_ALGORITHM,
+) -> _Digest:
+    """Hash a file's first and last block, reporting cache hits."""
+    hasher = new_hasher(algorithm)
+    kind = f"{algorithm}-partial-{block_size}"
+    st = None
+    try:
+        if cache is not None:
+            count("stat_calls")
+            st = os.stat(file_path)
+            cached = cache.get(st, kind)
+            if cached is not None:
+                return _Digest(cached, cached=True)
+        started = time.perf_counter()
+        with open(file_path, "rb") as f:
+            head = f.read(block_size)
+            hasher.update(head)
+            read = len(head)
+            size = f.seek(0, 2)
+            if size > block_size:
+                f.seek(max(block_size, size - block_size))
+                tail = f.read(block_size)
+                hasher.update(tail)
+                read += len(tail)
+        digest = hasher.hexdigest()
+        observe("partial_hash_seconds", time.perf_counter() - started)
+        count("files_hashed")
+        count("bytes_hashed", read)
+        if cache is not None and st is not None:
+            cache.put(st, kind, digest)
+        return _Digest(digest)
+    except (IOError, PermissionError) as e:
+        console.print(f"[yellow]Warning: Could not read {file_path}: {e}")
+        count("errors")
+        return _Digest("")
+
 
+def _partial_or_full_hash(
+    item: Tuple[int, Path],
+    cache: Optional[HashCache] = None,
+    algorithm: str = DEFAULT_ALGORITHM,
+    cancel: Optional[CancelToken] = None,
+) -> _Digest:
+    """Hash a same-size candidate for the second pipeline stage.
 
-def find_duplicates(directory: str, recursive: bool = False) -> Dict[str, List[Path]]:
+    Files no larger than two blocks are hashed in full, since the partial
+    hash would read all of their contents anyway.
     """
-    Find duplicate files in the given directory.
+    size, file_path = item
+    if size <= 2 * PARTIAL_BLOCK_SIZE:
+        return _full_hash(file_path, cache=cache, algorithm=algorithm, cancel=cancel)
+    return _partial_hash(file_path, cache=cache, algorithm=algorithm)
+
+
+def files_equal(
+    first: Path,
+    second: Path,
+    block_size: int = 65536,
+    cancel: Optional[CancelToken] = None,
+) -> bool:
+    """
+    Compare two files byte by byte.
+
+    Args:
+        first: Path to the first file
+        second: Path to the second file
+        block_size: Size of chunks to read at once
+        cancel: Optional token, checked between blocks
+
+    Returns:
+        bool: True if both files have identical contents
+
+    Raises:
+        OperationCancelled: If ``cancel`` is cancelled while comparing
+    """
+    try:
+        with open(first, "rb") as f1, open(second, "rb") as f2:
+            while True:
+                buf1 = f1.read(block_size)
+                buf2 = f2.read(block_size)
+                if buf1 != buf2:
+                    return False
+                if not buf1:
+                    return True
+                checkpoint(cancel)
+    except (IOError, PermissionError) as e:
+        console.print(f"[yellow]Warning: Could not compare {first} and {second}: {e}")
+        return False
+
+
+def _verify_groups(
+    index: FileIndex,
+    groups: Dict[str, List[int]],
+    verify: str,
+    engine: HashEngine,
+    cache: Optional[HashCache] = None,
+    reporter: Optional[ProgressReporter] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Dict[str, List[int]]:
+    """Confirm candidate groups found with a fast hash.
+
+    With ``verify="sha256"`` every candidate is re-hashed with SHA-256 and
+    the groups are rebuilt from those digests. With ``verify="bytes"`` each
+    file is compared byte by byte against the first file of every subgroup
+    found so far, and files that match none start a new subgroup.
+    """
+    if verify == "sha256":
+        ids = [file_id for file_ids in groups.values() for file_id in file_ids]
+        digests = engine.map(
+            partial(get_file_hash, cache=cache, cancel=cancel),
+            [Path(index.path(file_id)) for file_id in ids],
+        )
+        confirmed: Dict[str, List[int]] = defaultdict(list)
+        for file_id, digest in zip(ids, digests):
+            if reporter is not None:
+                reporter.advance(1, index.size[file_id])
+            if digest:
+                confirmed[digest].append(file_id)
+        return confirmed
+
+    confirmed = {}
+    for file_hash, file_ids in groups.items():
+        subgroups: List[List[int]] = []
+        for file_id in file_ids:
+            path = Path(index.path(file_id))
+            for subgroup in subgroups:
+                if files_equal(Path(index.path(subgroup[0])), path, cancel=cancel):
+                    subgroup.append(file_id)
+                    break
+            else:
+                subgroups.append([file_id])
+            if reporter is not None:
+                reporter.advance(1, index.size[file_id])
+        for i, subgroup in enumerate(subgroups):
+            confirmed[file_hash if i == 0 else f"{file_hash}:{i}"] = subgroup
+    return confirmed
+
+
+def _print_stats(stats: DedupeStats) -> None:
+    """Print how many bytes each pipeline stage read and avoided reading."""
+    table = Table(title="Duplicate scan I/O")
+    table.add_column("Stage", style="cyan")
+    table.add_column("Bytes read", justify="right")
+    table.add_column("From cache", justify="right", style="blue")
+    table.add_column("Bytes avoided", justify="right", style="green")
+    table.add_row("size", "0", "0", f"{stats.bytes_skipped_by_size:,}")
+    table.add_row(
+        "partial",
+        f"{stats.bytes_read_partial:,}",
+        f"{stats.bytes_cached_partial:,}",
+        f"{stats.bytes_skipped_by_partial:,}",
+    )
+    table.add_row(
+        "full", f"{stats.bytes_read_full:,}", f"{stats.bytes_cached_full:,}", "0"
+    )
+    table.add_row(
+        "[bold]total[/]",
+        f"{stats.bytes_read:,}",
+        f"{stats.bytes_cached:,}",
+        f"{stats.bytes_avoided:,}",
+    )
+    console.print(table)
+    if stats.cache_hits:
+        console.print(f"Hash cache hits: {stats.cache_hits:,}")
+    if stats.hardlinked_files:
+        console.print(
+            f"Hard links skipped (already sharing storage): "
+            f"{stats.hardlinked_files:,}"
+        )
+
+
+def find_duplicate_ids(
+    directory: str,
+    recursive: bool = False,
+    stats: Optional[DedupeStats] = None,
+    workers: Optional[int] = None,
+    cache: Optional[HashCache] = None,
+    algorithm: str = DEFAULT_ALGORITHM,
+    verify: str = "none",
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> DuplicateScan:
+    """
+    Find duplicate files, returning them as ids into a compact file index.
+
+    This is the memory-efficient core of :func:`find_duplicates`: every
+    scanned file is stored once in a :class:`~OrganiserPro.index.FileIndex`
+    and duplicate groups refer to files by their integer id, so no ``Path``
+    objects are built for the files that turn out to be unique.
+
+    Hard links are recognised by their ``(st_dev, st_ino)`` pair before any
+    hashing. Each inode is read at most once and appears in a duplicate
+    group only once, through its first path; the other links to it are
+    reported separately in :attr:`DuplicateScan.hardlinks`.
+
+    Candidates are narrowed down in stages so that as little data as
+    possible is read from disk:
+
+    1. files are grouped by size; files with a unique size are never read
+    2. same-size files are grouped by a hash of their first and last block
+    3. only files that still collide are hashed in full
+    4. optionally, groups found with a fast hash are confirmed with SHA-256
+       or a byte-by-byte comparison
 
     Args:
         directory: Directory to search for duplicate files
         recursive: If True, search recursively in subdirectories
+        stats: Optional :class:`DedupeStats` to fill with per-stage I/O counts
+        workers: Number of hashing workers (defaults to the number of CPUs)
+        cache: Optional :class:`HashCache` used to skip re-hashing unchanged files
+        algorithm: Hash algorithm used to group candidates (see
+            :func:`~OrganiserPro.hashing.available_algorithms`)
+        verify: How to confirm candidate groups: ``"none"``, ``"sha256"``
+            or ``"bytes"``
+        progress: Optional callback receiving a
+            :class:`~OrganiserPro.progress.ProgressEvent` for the ``scan``,
+            ``partial``, ``full`` and ``verify`` phases, e.g. a
+            :class:`~OrganiserPro.progress.RichProgress`; nothing is
+            drawn without one
+        cancel: Optional :class:`~OrganiserPro.cancel.CancelToken` to pause
+            or stop the search with; it is checked between directories and
+            between blocks of every file read
 
     Returns:
-        Dict mapping file hashes to lists of duplicate file paths
+        DuplicateScan: The file index, duplicate groups and hard link sets
+
+    Raises:
+        OperationCancelled: If ``cancel`` is cancelled before the end
     """
-    files_by_size: Dict[int, List[Path]] = defaultdict(list)
-    files_by_hash: Dict[str, List[Path]] = defaultdict(list)
+    if verify not in VERIFY_MODES:
+        raise ValueError(f"verify must be one of {', '.join(VERIFY_MODES)}")
+    new_hasher(algorithm)  # Fail early on unknown algorithms
+    if stats is None:
+        stats = DedupeStats()
+    index = FileIndex()
+    files_by_hash: Dict[str, List[int]] = defaultdict(list)
     dir_path = Path(directory)
 
     if not dir_path.exists() or not dir_path.is_dir():
         console.print(f"[red]Error: {directory} is not a valid directory")
-        return {}
+        return DuplicateScan(index, {}, [])
+
+    # The scan is streamed straight into the index, so the total is not
+    # known up front and progress only counts files found so far.
+    with span("scan"), ProgressReporter(
+        progress, "scan", "Scanning files..."
+    ) as reporter:
+        for entry in scan_files(dir_path, recursive=recursive, cancel=cancel):
+            reporter.advance(1, entry.size)
+            index.add(entry)
+            stats.files_scanned += 1
+            stats.bytes_scanned += entry.size
+
+    # Group files by size; files with a unique size cannot have a duplicate.
+    # Hard links always share a size, so they are collapsed here as well.
+    same_size: List[Tuple[int, int]] = []
+    hardlinks: List[List[int]] = []
+    with span("group"):
+        for size, file_ids in index.same_size_runs():
+            links_by_inode: Dict[Tuple[int, int], List[int]] = {}
+            for file_id in file_ids:
+                key = (index.dev[file_id], index.inode[file_id])
+                links_by_inode.setdefault(key, []).append(file_id)
+            for links in links_by_inode.values():
+                if len(links) > 1:
+                    hardlinks.append(links)
+                    stats.hardlinked_files += len(links) - 1
+            if len(links_by_inode) > 1:
+                same_size.extend(
+                    (size, links[0]) for links in links_by_inode.values()
+                )
+        stats.bytes_skipped_by_size = stats.bytes_scanned - sum(
+            size for size, _ in same_size
+        )
+
+    cache_hits_before = cache.hits if cache is not None else 0
+
+    # For files with the same size, compare the first and last block
+    files_by_partial: Dict[tuple, List[int]] = defaultdict(list)
+    with span("hash") as phase, HashEngine(workers, cancel=cancel) as engine:
+        reporter = ProgressReporter(
+            progress,
+            "partial",
+            "Comparing file headers...",
+            len(same_size),
+            sum(min(size, 2 * PARTIAL_BLOCK_SIZE) for size, _ in same_size),
+        )
+        digests = engine.map(
+            partial(
+                _partial_or_full_hash, cache=cache, algorithm=algorithm, cancel=cancel
+            ),
+            [(size, Path(index.path(file_id))) for size, file_id in same_size],
+        )
+        for (size, file_id), (digest, cached) in zip(same_size, digests):
+            reporter.advance(1, min(size, 2 * PARTIAL_BLOCK_SIZE))
+            if not digest:
+                continue
+            # Both blocks cover a small file, so it was hashed outright
+            hashed = min(size, 2 * PARTIAL_BLOCK_SIZE)
+            if cached:
+                stats.bytes_cached_partial += hashed
+            else:
+                stats.bytes_read_partial += hashed
+            if size <= 2 * PARTIAL_BLOCK_SIZE:
+                files_by_hash[digest].append(file_id)
+            else:
+                files_by_partial[(size, digest)].append(file_id)
 
-    # First group files by size (potential duplicates will have same size)
-    with Progress() as progress:
-        task = progress.add_task("Scanning files...", total=0)
+        # Only files that still collide are hashed in full
+        candidates = []
+        for (size, _), file_ids in files_by_partial.items():
+            if len(file_ids) > 1:
+                candidates.extend(file_ids)
+            else:
+                stats.bytes_skipped_by_partial += size - 2 * PARTIAL_BLOCK_SIZE
+
+        reporter.finish()
+
+        reporter = ProgressReporter(
+            progress,
+            "full",
+            "Checking for duplicates...",
+            len(candidates),
+            sum(index.size[file_id] for file_id in candidates),
+        )
+        digests = engine.map(
+            partial(_full_hash, cache=cache, algorithm=algorithm, cancel=cancel),
+            [Path(index.path(file_id)) for file_id in candidates],
+        )
+        for file_id, (file_hash, cached) in zip(candidates, digests):
+            reporter.advance(1, index.size[file_id])
+            if not file_hash:  # Only add if we could read the file
+                continue
+            files_by_hash[file_hash].append(file_id)
+            if cached:
+                stats.bytes_cached_full += index.size[file_id]
+            else:
+                stats.bytes_read_full += index.size[file_id]
+        reporter.finish()
+
+        phase.bytes_read = stats.bytes_read
+        groups = {h: ids for h, ids in files_by_hash.items() if len(ids) > 1}
+        needs_verify = verify == "bytes" or (
+            verify == "sha256" and algorithm != "sha256"
+        )
+        if needs_verify and groups:
+            ids = [file_id for file_ids in groups.values() for file_id in file_ids]
+            with span("verify"), ProgressReporter(
+                progress,
+                "verify",
+                f"Confirming with {verify}...",
+                len(ids),
+                sum(index.size[file_id] for file_id in ids),
+            ) as reporter:
+                files_by_hash = _verify_groups(
+                    index,
+                    groups,
+                    verify,
+                    engine,
+                    cache=cache,
+                    reporter=reporter,
+                    cancel=cancel,
+                )
+
+    if cache is not None:
+        stats.cache_hits += cache.hits - cache_hits_before
 
-        # Get all files, recursively if requested
-        if recursive:
-            all_files = list(dir_path.rglob("*"))
-        else:
-            all_files = list(dir_path.glob("*"))
+    # Only keep hashes with multiple files
+    groups = {h: ids for h, ids in files_by_hash.items() if len(ids) > 1}
+    return DuplicateScan(index, groups, hardlinks)
 
-        progress.update(task, total=len(all_files))
 
-        for file_path in all_files:
-            progress.advance(task)
-            if file_path.is_file() and not file_path.name.startswith("."):
-                try:
-                    file_size = file_path.stat().st_size
-                    files_by_size[file_size].append(file_path)
-                except (OSError, PermissionError) as e:
-                    console.print(f"[yellow]Warning: Could not access {file_path}: {e}")
-
-    # For files with the same size, compare hashes
-    with Progress() as progress:
-        task = progress.add_task("Checking for duplicates...", total=len(files_by_size))
-
-        for size, files in files_by_size.items():
-            progress.advance(task)
-            if len(files) > 1:  # Potential duplicates
-                for file_path in files:
-                    file_hash = get_file_hash(file_path)
-                    if file_hash:  # Only add if we could read the file
-                        files_by_hash[file_hash].append(file_path)
+def find_duplicates(
+    directory: str,
+    recursive: bool = False,
+    stats: Optional[DedupeStats] = None,
+    workers: Optional[int] = None,
+    cache: Optional[HashCache] = None,
+    algorithm: str = DEFAULT_ALGORITHM,
+    verify: str = "none",
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Dict[str, List[Path]]:
+    """
+    Find duplicate files in the given directory.
 
-    # Only keep hashes with multiple files
-    return {h: paths for h, paths in files_by_hash.items() if len(paths) > 1}
+    This is a thin view over :func:`find_duplicate_ids` that turns the ids
+    of duplicate files back into paths; see there for how candidates are
+    narrowed down and how hard links are treated.
+
+    Args:
+        directory: Directory to search for duplicate files
+        recursive: If True, search recursively in subdirectories
+        stats: Optional :class:`DedupeStats` to fill with per-stage I/O counts
+        workers: Number of hashing workers (defaults to the number of CPUs)
+        cache: Optional :class:`HashCache` used to skip re-hashing unchanged files
+        algorithm: Hash algorithm used to group candidates (see
+            :func:`~OrganiserPro.hashing.available_algorithms`)
+        verify: How to confirm candidate groups: ``"none"``, ``"sha256"``
+            or ``"bytes"``
+        progress: Optional callback receiving progress events
+        cancel: Optional token to pause or stop the search with
+
+    Returns:
+        Dict mapping file hashes to lists of duplicate file paths
+
+    Raises:
+        OperationCancelled: If ``cancel`` is cancelled before the end
+    """
+    index, groups, _ = find_duplicate_ids(
+        directory,
+        recursive=recursive,
+        stats=stats,
+        workers=workers,
+        cache=cache,
+        algorithm=algorithm,
+        verify=verify,
+        progress=progress,
+        cancel=cancel,
+    )
+    return {
+        file_hash: [Path(index.path(file_id)) for file_id in file_ids]
+        for file_hash, file_ids in groups.items()
+    }
+
+
+def plan_duplicates(
+    scan: DuplicateScan,
+    directory: str,
+    action: str = DELETE,
+    move_to: Optional[str] = None,
+) -> OperationPlan:
+    """
+    Turn a duplicate scan into a plan that keeps the first file of each group.
+
+    The plan is fingerprinted with the size, mtime and inode every file had
+    when it was scanned, so it can be executed later without hashing again
+    as long as none of the files changed.
+
+    Args:
+        scan: Result of :func:`find_duplicate_ids`
+        directory: Directory that was scanned
+        action: What to do with each duplicate: ``"delete"``, ``"move"``,
+            ``"link"`` or ``"reflink"``
+        move_to: Directory to move duplicates into, for ``"move"``
+
+    Returns:
+        OperationPlan: The planned actions
+
+    Raises:
+        ValueError: If ``action`` is unknown, or ``"move"`` lacks ``move_to``
+    """
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown plan action: {action!r}")
+    if action == MOVE and not move_to:
+        raise ValueError("A move plan needs a destination directory")
+
+    index = scan.index
+    planner = MovePlanner()
+    actions: List[PlannedAction] = []
+    records = []
+    for file_ids in scan.groups.values():
+        original = index.path(file_ids[0])
+        for file_id in file_ids:
+            records.append(
+                (
+                    index.path(file_id),
+                    index.size[file_id],
+                    index.mtime_ns[file_id],
+                    index.inode[file_id],
+                )
+            )
+        for file_id in file_ids[1:]:
+            duplicate = index.path(file_id)
+            if action == MOVE:
+                target = planner.plan(duplicate, str(move_to))
+                actions.append(PlannedAction(MOVE, duplicate, target))
+            else:
+                actions.append(PlannedAction(action, duplicate, original))
+
+    plan = OperationPlan("dedupe", str(Path(directory).resolve()), actions)
+    return plan.seal(records)
 
 
 def handle_duplicates(
     duplicates: Dict[str, List[Path]],
     delete: bool = False,
     move_to: Optional[str] = None,
+    link: bool = False,
+    reflink: bool = False,
+    journal: Optional[Journal] = None,
+    cancel: Optional[CancelToken] = None,
 ) -> None:
-    """Handle duplicate files by printing, deleting, or moving them.
+    """Handle duplicate files by printing, deleting, moving or linking them.
 
     Args:
         duplicates: Dictionary mapping file hashes to lists of duplicate files
         delete: If True, delete all but the first file in each duplicate set
         move_to: If provided, move duplicates to this directory instead of deleting
+        link: If True, replace duplicates with hard links to the first file,
+            which reclaims their space while keeping every path in place
+        reflink: If True, make duplicates share the first file's extents
+            (copy-on-write) on filesystems such as btrfs and XFS; files on
+            filesystems without support are left untouched
+        journal: Optional :class:`~OrganiserPro.journal.Journal` that each
+            delete, move and link is durably recorded in before it happens
+        cancel: Optional token, checked before each duplicate is handled
+
+    Moves are planned with a :class:`~OrganiserPro.mover.MovePlanner` and
+    carried out as one batch by the move engine the sorters use, so names
+    are resolved in memory and moves work across filesystems.
+
+    Raises:
+        OperationCancelled: If ``cancel`` is cancelled; every duplicate
+            handled so far has been handled completely
     """
+
+    def log(action: str, duplicate: Path, target: Path) -> Optional[int]:
+        if journal is None:
+            return None
+        return journal.log([PlannedAction(action, str(duplicate), str(target))])[0]
+
+    def done(seq: Optional[int]) -> None:
+        if journal is not None and seq is not None:
+            journal.done(seq)
+
     # Count total files in all duplicate groups
     total_duplicate_groups = sum(1 for files in duplicates.values() if len(files) > 1)
     total_duplicate_files = sum(
@@ -120,11 +745,12 @@ def handle_duplicates(
         f"in {total_duplicate_groups} groups:"
     )
 
-    # Create destination directory if moving files
     if move_to:
         move_to_path = Path(move_to).expanduser().resolve()
-        move_to_path.mkdir(parents=True, exist_ok=True)
+        planner = MovePlanner()
 
+    bytes_reclaimed = 0
+    unsupported_devices = set()
     for file_hash, files in duplicates.items():
         if len(files) <= 1:
             continue
@@ -136,33 +762,75 @@ def handle_duplicates(
         console.print(f"  [green]Keep:[/] {original}")
 
         for duplicate in files[1:]:
+            checkpoint(cancel)
             if delete:
                 try:
+                    seq = log(DELETE, duplicate, original)
                     duplicate.unlink()
+                    done(seq)
+                    count("deletes")
                     console.print(f"  [red]Deleted:[/] {duplicate}")
                 except OSError as e:
                     msg = f"  [yellow]Error deleting {duplicate}: {e}"
                     console.print(msg)
+                    count("errors")
             elif move_to:
+                # Moved as one batch once every duplicate has been planned
+                target = planner.plan(str(duplicate), str(move_to_path))
+                console.print(f"  [yellow]Move to:[/] {target}")
+            elif link:
+                try:
+                    seq = log(LINK, duplicate, original)
+                    bytes_reclaimed += replace_with_hardlink(original, duplicate)
+                    done(seq)
+                    count("links")
+                    console.print(f"  [cyan]Linked:[/] {duplicate}")
+                except OSError as e:
+                    msg = f"  [yellow]Error linking {duplicate}: {e}"
+                    console.print(msg)
+                    count("errors")
+            elif reflink:
                 try:
-                    target = move_to_path / duplicate.name
-                    if target.exists():
-                        # Add a suffix if the target already exists
-                        suffix = 1
-                        while target.exists():
-                            target = target.with_stem(f"{duplicate.stem}_{suffix}")
-                            suffix += 1
-                    duplicate.rename(target)
-                    console.print(f"  [yellow]Moved to:[/] {target}")
+                    device = os.stat(duplicate).st_dev
+                    if device in unsupported_devices:
+                        console.print(f"  [yellow]Skipped:[/] {duplicate}")
+                        continue
+                    bytes_reclaimed += dedupe_file_range(original, duplicate)
+                    count("links")
+                    console.print(f"  [cyan]Shared extents:[/] {duplicate}")
+                except ReflinkNotSupported as e:
+                    unsupported_devices.add(device)
+                    console.print(
+                        f"  [yellow]Skipped {duplicate}: reflinks not supported "
+                        f"here ({e.strerror})"
+                    )
                 except OSError as e:
-                    msg = f"  [yellow]Error moving {duplicate}: {e}"
+                    msg = f"  [yellow]Error sharing extents of {duplicate}: {e}"
                     console.print(msg)
+                    count("errors")
             else:
                 console.print(f"  [yellow]Duplicate:[/] {duplicate}")
 
-    if not delete and not move_to:
-        msg = "\n[bold]Note:[/] Use --delete to remove "
-        msg += "duplicates or --move-to to move them"
+    if move_to and planner.ops:
+        plan = OperationPlan(
+            "dedupe",
+            str(move_to_path),
+            [PlannedAction(MOVE, op.source, op.target) for op in planner.ops],
+        )
+        result = execute_plan(plan, check=False, journal=journal, cancel=cancel)
+        for action, error in result.failed:
+            console.print(f"[yellow]Error moving {action.source}: {error}")
+        console.print(f"\nMoved {len(result.done):,} duplicates to {move_to_path}")
+        if result.cancelled:
+            raise OperationCancelled()
+
+    if link:
+        console.print(f"\nReclaimed {bytes_reclaimed:,} bytes with hard links")
+    elif reflink:
+        console.print(f"\nShared {bytes_reclaimed:,} bytes of extents with reflinks")
+    elif not delete and not move_to:
+        msg = "\n[bold]Note:[/] Use --delete to remove duplicates, --move-to to "
+        msg += "move them, or --hardlink/--reflink to share their storage"
         console.print(msg)
 
 
@@ -172,6 +840,13 @@ def find_duplicates_cli(
     delete: bool = False,
     move_to: Optional[str] = None,
     dry_run: bool = False,
+    workers: Optional[int] = None,
+    use_cache: bool = True,
+    algorithm: str = DEFAULT_ALGORITHM,
+    verify: str = "none",
+    link: bool = False,
+    reflink: bool = False,
+    save_plan: Optional[str] = None,
 ) -> None:
     """CLI interface for finding and handling duplicate files.
 
@@ -181,20 +856,74 @@ def find_duplicates_cli(
         delete: If True, delete duplicate files (keeping the oldest)
         move_to: If provided, move duplicate files to this directory instead of deleting
         dry_run: If True, only show what would be done without making changes
+        workers: Number of hashing workers (defaults to the number of CPUs)
+        use_cache: If True, reuse and update the on-disk hash cache
+        algorithm: Hash algorithm used to group candidates
+        verify: How to confirm candidate groups: "none", "sha256" or "bytes"
+        link: If True, replace duplicates with hard links to the kept file
+        reflink: If True, make duplicates share the kept file's extents
+        save_plan: If provided, write the plan to this JSON file instead of
+            acting on the duplicates (see ``organiserpro apply``)
     """
     console = Console()
 
-    if delete and move_to:
-        console.print("[red]Error: Cannot specify both --delete and --move-to")
+    if sum((delete, bool(move_to), link, reflink)) > 1:
+        console.print(
+            "[red]Error: Specify only one of --delete, --move-to, --hardlink "
+            "and --reflink"
+        )
         return
 
-    if not (delete or move_to) and not Confirm.ask(
+    planning = dry_run or bool(save_plan)
+    if not (planning or delete or move_to or link or reflink) and not Confirm.ask(
         "\n[red]WARNING: This will delete duplicate files. Continue?", default=False
     ):
         return
 
-    duplicates = find_duplicates(directory, recursive=recursive)
+    cache = None
+    if use_cache:
+        try:
+            cache = HashCache()
+        except (OSError, sqlite3.Error) as e:
+            console.print(f"[yellow]Warning: Hash cache unavailable: {e}")
 
+    stats = DedupeStats()
+    try:
+        with cancel_on_interrupt() as cancel, RichProgress(console) as progress:
+            index, groups, hardlinks = find_duplicate_ids(
+                directory,
+                recursive=recursive,
+                stats=stats,
+                workers=workers,
+                cache=cache,
+                algorithm=algorithm,
+                verify=verify,
+                progress=progress,
+                cancel=cancel,
+            )
+    except OperationCancelled:
+        console.print("[yellow]Cancelled; no files were changed")
+        return
+    finally:
+        if cache is not None:
+            cache.close()
+    _print_stats(stats)
+
+    if hardlinks:
+        table = Table(title="Hard-linked Files (already share storage)")
+        table.add_column("Inode", style="cyan")
+        table.add_column("Links", style="blue")
+        for links in hardlinks:
+            table.add_row(
+                str(index.inode[links[0]]),
+                "\n".join(index.path(file_id) for file_id in links),
+            )
+        console.print(table)
+
+    duplicates = {
+        file_hash: [Path(index.path(file_id)) for file_id in file_ids]
+        for file_hash, file_ids in groups.items()
+    }
     if not duplicates:
         console.print("\n[green]No duplicate files found![/]")
         return
@@ -209,13 +938,54 @@ def find_duplicates_cli(
 
     console.print(table)
 
+    if planning:
+        # Planning reuses this scan's hashes; nothing is modified
+        if move_to:
+            action = MOVE
+        elif link:
+            action = LINK
+        elif reflink:
+            action = REFLINK
+        else:
+            action = DELETE
+        plan = plan_duplicates(
+            DuplicateScan(index, groups, hardlinks), directory, action, move_to
+        )
+        print_plan(plan)
+        if save_plan:
+            plan.save(save_plan)
+            console.print(f"Saved plan to {save_plan}")
+        return
+
+    def handle(**action: object) -> None:
+        # Journal every change so it can be undone with `organiserpro undo`;
+        # reflinks leave both files independent and need no undo
+        journal = None if action.get("reflink") else open_journal("dedupe", directory)
+        try:
+            with span("act"), cancel_on_interrupt() as cancel:
+                handle_duplicates(
+                    duplicates, journal=journal, cancel=cancel, **action  # type: ignore
+                )
+        except OperationCancelled:
+            console.print("[yellow]Cancelled; the remaining duplicates were kept")
+        finally:
+            if journal is not None:
+                journal.close()
+                console.print(f"Undo with: organiserpro undo {journal.path}")
+
     if delete:
-        handle_duplicates(duplicates, delete=True)
+        handle(delete=True)
     elif move_to:
-        handle_duplicates(duplicates, move_to=move_to)
-    elif not (delete or move_to):  # Interactive mode if no flags were provided
+        handle(move_to=move_to)
+    elif link:
+        handle(link=True)
+    elif reflink:
+        handle(reflink=True)
+    else:  # Interactive mode if no flags were provided
         if Confirm.ask("\nDelete all but the first of each duplicate?", default=False):
-            handle_duplicates(duplicates, delete=True)
+            handle(delete=True)
         elif Confirm.ask("Move duplicates to a different directory?", default=False):
             move_to_dir = click.prompt("Enter destination directory")
-            handle_duplicates(duplicates, move_to=move_to_dir)
+            handle(move_to=move_to_dir)
+        elif Confirm.ask("Replace duplicates with hard links?", default=False):
+            handle(link=True)
@@ -10,15 +10,33 @@ import platform
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
+import time
 import queue
 import os
 import sys
 import platform
+from array import array
+from contextlib import contextmanager
 from pathlib import Path
+from typing import NamedTuple
 
 # Import our core modules
-from .sorter import sort_by_type, sort_by_date
-from .dedupe import find_duplicates, handle_duplicates
+from .cancel import CancelToken, OperationCancelled, checkpoint
+from .sorter import plan_sort_by_type, plan_sort_by_date
+from .dedupe import find_duplicate_ids, plan_duplicates
+from .index import FileIndex
+from .plan import OperationPlan
+from .journal import execute_journaled, undo_journal
+from .snapshot import (
+    create_snapshot,
+    prune_snapshots,
+    restore_snapshot,
+)
+from .profiling import new_profile_path, span, start_profiling, stop_profiling
+from .progress import ProgressEvent
+from .results import SORT_KEYS, ResultSet
+from .sizes import format_size, parse_size
+from .workers import default_workers
 
 # OrganiserPro Modern Theme Colors
 COLORS = {
@@ -42,6 +60,14 @@ COLORS = {
     'error': '#f44336'         # Error red
 }
 
+# Milliseconds between drains of the queue of UI updates from worker threads
+UI_POLL_MS = 50
+# Most queued updates applied per drain, so a flood of log lines from a
+# preview cannot starve redraws and input handling
+UI_BATCH = 500
+# Lines kept in the results area; the oldest lines are dropped beyond this
+MAX_LOG_LINES = 2000
+
 # Modern soft font configuration with safe fallbacks
 FONTS = {
     'default': ('Arial', 10),
@@ -52,6 +78,225 @@ FONTS = {
 }
 
 
+def format_duration(seconds: float) -> str:
+    """Format a duration for an ETA, e.g. ``45s``, ``3m 05s`` or ``1h 02m``."""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+
+class RunOptions(NamedTuple):
+    """Settings for one preview or operation, read from Tk on the main thread.
+
+    Worker threads must not touch Tk variables, so everything they need is
+    captured here before they start.
+    """
+
+    folder: Path
+    operation: str
+    recursive: bool
+
+
+class ResultsPane:
+    """Table of every file in a preview that only renders the visible rows.
+
+    The Treeview holds one item per line that fits on screen, however many
+    rows the :class:`~OrganiserPro.results.ResultSet` has. Scrolling refills
+    those items from the current view, and sorting or filtering swaps the
+    view (an array of row numbers) without rebuilding the widget.
+    """
+
+    # Milliseconds to wait after the last keystroke in a filter box
+    FILTER_DELAY_MS = 300
+
+    def __init__(self, parent, height: int = 8):
+        self.results = ResultSet()
+        self.view = array("l")
+        self.offset = 0
+        self.sort_by = "group"
+        self.descending = False
+        self._filter_job = None
+
+        self.frame = tk.Frame(parent, bg=COLORS['card_bg'])
+        self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(1, weight=1)
+
+        toolbar = tk.Frame(self.frame, bg=COLORS['card_bg'])
+        toolbar.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
+        self.group_filter = tk.StringVar()
+        self.min_size = tk.StringVar()
+        for label, variable, width in (
+            ("Group:", self.group_filter, 12),
+            ("Min size:", self.min_size, 8),
+        ):
+            tk.Label(
+                toolbar, text=label, bg=COLORS['card_bg'],
+                fg=COLORS['text_secondary'], font=FONTS['small']
+            ).pack(side=tk.LEFT)
+            tk.Entry(
+                toolbar, textvariable=variable, width=width,
+                bg=COLORS['background'], fg=COLORS['text'],
+                insertbackground=COLORS['text'], relief='solid', borderwidth=1
+            ).pack(side=tk.LEFT, padx=(4, 10))
+            variable.trace_add("write", self._schedule_filter)
+        self.count_var = tk.StringVar(value="No preview yet")
+        tk.Label(
+            toolbar, textvariable=self.count_var, bg=COLORS['card_bg'],
+            fg=COLORS['text_secondary'], font=FONTS['small']
+        ).pack(side=tk.RIGHT)
+
+        self.tree = ttk.Treeview(
+            self.frame,
+            columns=("group", "path", "size", "action"),
+            show="headings",
+            height=height,
+            selectmode="browse",
+            style='Results.Treeview'
+        )
+        for column, width, stretch in (
+            ("group", 80, False),
+            ("path", 260, True),
+            ("size", 70, False),
+            ("action", 60, False),
+        ):
+            self.tree.column(column, width=width, stretch=stretch,
+                             anchor=tk.E if column == "size" else tk.W)
+        self.tree.heading("action", text="Action")
+        self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        self.scrollbar = ttk.Scrollbar(
+            self.frame, orient=tk.VERTICAL, command=self._on_scrollbar
+        )
+        self.scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+
+        self.items = [self.tree.insert("", tk.END) for _ in range(height)]
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll_by(-e.delta // 40))
+        self.tree.bind('<Button-4>', lambda e: self.scroll_by(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_by(3))
+        self.tree.bind('<Prior>', lambda e: self.scroll_by(-len(self.items)))
+        self.tree.bind('<Next>', lambda e: self.scroll_by(len(self.items)))
+        self.tree.bind('<Home>', lambda e: self.scroll_to(0))
+        self.tree.bind('<End>', lambda e: self.scroll_to(len(self.view)))
+        self._update_headings()
+        self._render()
+
+    def show(self, results: ResultSet):
+        """Display a new result set, keeping the current filters."""
+        self.results = results
+        self.sort_by = "group"
+        self.descending = False
+        self._update_headings()
+        self.refresh()
+
+    def sort(self, column: str):
+        """Sort by a column, reversing the order if it is already sorted by it."""
+        if column == self.sort_by:
+            self.descending = not self.descending
+        else:
+            self.sort_by, self.descending = column, column == "size"
+        self._update_headings()
+        self.refresh()
+
+    def refresh(self):
+        """Recompute the view from the filters and sort order."""
+        self._filter_job = None
+        text = self.min_size.get().strip()
+        try:
+            min_size = parse_size(text) if text else 0
+        except ValueError:
+            self.count_var.set("Invalid size")
+            return
+        self.view = self.results.view(
+            sort_by=self.sort_by,
+            descending=self.descending,
+            group_filter=self.group_filter.get(),
+            min_size=min_size,
+        )
+        self.offset = 0
+        total = len(self.results)
+        shown = len(self.view)
+        self.count_var.set(
+            f"{total:,} files" if shown == total else f"{shown:,} of {total:,} files"
+        )
+        self._render()
+
+    def scroll_by(self, rows: int):
+        self.scroll_to(self.offset + rows)
+
+    def scroll_to(self, offset: int):
+        """Show the view from row ``offset``, clamped to the last full page."""
+        offset = max(0, min(offset, len(self.view) - len(self.items)))
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+
+    def _schedule_filter(self, *args):
+        """Refresh once typing in a filter box pauses."""
+        if self._filter_job is not None:
+            self.frame.after_cancel(self._filter_job)
+        self._filter_job = self.frame.after(self.FILTER_DELAY_MS, self.refresh)
+
+    def _update_headings(self):
+        titles = {"group": self.results.group_title, "path": "File", "size": "Size"}
+        for column in SORT_KEYS:
+            arrow = ""
+            if column == self.sort_by:
+                arrow = " ▼" if self.descending else " ▲"
+            self.tree.heading(
+                column,
+                text=titles[column] + arrow,
+                command=lambda c=column: self.sort(c)
+            )
+
+    def _render(self):
+        """Fill the visible items from the view and move the scrollbar."""
+        results, view = self.results, self.view
+        root = results.root.rstrip(os.sep) + os.sep
+        for position, item in enumerate(self.items):
+            i = self.offset + position
+            if i >= len(view):
+                self.tree.item(item, values=("", "", "", ""))
+                continue
+            group, path, size, action = results.row(view[i])
+            if path.startswith(root):
+                path = path[len(root):]
+            size_text = format_size(size) if size >= 0 else ""
+            self.tree.item(item, values=(group, path, size_text, action))
+        total = len(view)
+        if total:
+            first = self.offset / total
+            last = min(1.0, (self.offset + len(self.items)) / total)
+            self.scrollbar.set(first, last)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_scrollbar(self, *args):
+        """Handle the scrollbar's moveto and scroll commands."""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.view)))
+        elif args[0] == "scroll":
+            pages = args[2] == "pages"
+            self.scroll_by(int(args[1]) * (len(self.items) if pages else 1))
+
+    def _on_resize(self, event):
+        """Keep one item per line that fits in the widget's new height."""
+        bbox = self.tree.bbox(self.items[0]) if self.items else None
+        if not bbox:
+            return
+        # bbox gives the first row's offset (the heading) and height
+        lines = max(1, (event.height - bbox[1]) // bbox[3])
+        while len(self.items) < lines:
+            self.items.append(self.tree.insert("", tk.END))
+        while len(self.items) > lines:
+            self.tree.delete(self.items.pop())
+        self.scroll_to(self.offset)
+        self._render()
+
+
 class OrganiserProGUI:
     """Main GUI application for OrganiserPro Linux Edition."""
 
@@ -113,12 +358,31 @@ class OrganiserProGUI:
         self.preview_mode = tk.BooleanVar(value=True)
         self.recursive_scan = tk.BooleanVar(value=True)
 
-        # Progress tracking
+        # Plan computed by the last preview, reused by execute when current
+        self.current_plan = None
+        # Journal of the last executed operation, replayed in reverse by undo
+        self.last_journal_path = None
+        # Token of the running preview or operation, for Pause and Cancel
+        self.cancel_token = None
+
+        # Progress tracking. Worker threads never touch Tk widgets: they
+        # queue ("log", text), ("status", text), ("progress", event) and
+        # ("call", function) events, which the mainloop applies in batches
+        # (see _drain_ui_queue)
         self.progress_queue = queue.Queue()
         self.is_running = False
+        # Phase shown in the progress bar, and when it started, for the ETA
+        self.progress_phase = None
+        self.progress_started = 0.0
+        self.progress_animating = False
+
+        # Hidden debug toggle (Ctrl+Shift+D): profile previews and operations
+        self.profiling_enabled = False
 
         self.setup_ui()
         self.setup_drag_drop()
+        self.root.bind('<Control-Shift-D>', self.toggle_profiling)
+        self.root.after(UI_POLL_MS, self._drain_ui_queue)
 
     def setup_styles(self):
         """Configure modern professional TTK styles with enhanced theming."""
@@ -248,6 +512,32 @@ class OrganiserProGUI:
                            focuscolor=COLORS['turquoise'],
                            indicatorcolor=COLORS['turquoise'])
 
+        # Results tabs and the table of previewed files
+        self.style.configure('Results.TNotebook',
+                           background=COLORS['card_bg'],
+                           borderwidth=0)
+        self.style.configure('Results.TNotebook.Tab',
+                           background=COLORS['card_highlight'],
+                           foreground=COLORS['text_secondary'],
+                           font=FONTS['small'],
+                           padding=(12, 4))
+        self.style.map('Results.TNotebook.Tab',
+                      background=[('selected', COLORS['background'])],
+                      foreground=[('selected', COLORS['turquoise'])])
+        self.style.configure('Results.Treeview',
+                           background=COLORS['background'],
+                           fieldbackground=COLORS['background'],
+                           foreground=COLORS['text'],
+                           font=FONTS['small'],
+                           borderwidth=0)
+        self.style.configure('Results.Treeview.Heading',
+                           background=COLORS['card_highlight'],
+                           foreground=COLORS['turquoise'],
+                           font=FONTS['small'],
+                           relief='flat')
+        self.style.map('Results.Treeview',
+                      background=[('selected', COLORS['purple'])])
+
     def setup_ui(self):
         """Set up the main user interface with fixed layout that fits perfectly."""
         # Main container with padding
@@ -454,6 +744,25 @@ class OrganiserProGUI:
         )
         self.progress.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=20)
 
+        # Pause and Cancel act on the running preview or operation, which
+        # stops between two files, so no file is ever left half-moved
+        self.pause_button = ttk.Button(
+            progress_frame,
+            text="Pause",
+            command=self.toggle_pause,
+            style='Secondary.TButton',
+            state=tk.DISABLED
+        )
+        self.pause_button.grid(row=0, column=1, padx=(0, 10))
+        self.cancel_button = ttk.Button(
+            progress_frame,
+            text="Cancel",
+            command=self.cancel_operation,
+            style='Warning.TButton',
+            state=tk.DISABLED
+        )
+        self.cancel_button.grid(row=0, column=2, padx=(0, 20))
+
         # Results section with neon styling
         results_frame = tk.Frame(main_frame, bg=COLORS['card_bg'], relief='solid', bd=2, padx=25, pady=20)
         results_frame.grid(row=4, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10), padx=10)
@@ -470,8 +779,12 @@ class OrganiserProGUI:
         results_header.grid(row=0, column=0, sticky=tk.W, pady=(0, 15))
         main_frame.rowconfigure(4, weight=1)
 
+        # The log and a table of every file in the last preview
+        self.results_tabs = ttk.Notebook(results_frame, style='Results.TNotebook')
+        self.results_tabs.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
         self.results_text = scrolledtext.ScrolledText(
-            results_frame,
+            self.results_tabs,
             height=6,
             wrap=tk.WORD,
             state=tk.DISABLED,
@@ -481,7 +794,10 @@ class OrganiserProGUI:
             relief='solid',
             borderwidth=1
         )
-        self.results_text.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.results_tabs.add(self.results_text.frame, text="Log")
+
+        self.results_pane = ResultsPane(self.results_tabs)
+        self.results_tabs.add(self.results_pane.frame, text="Files")
 
         # Status bar with modern styling
         status_frame = ttk.Frame(main_frame, style='Card.TFrame', padding="10")
@@ -563,9 +879,11 @@ class OrganiserProGUI:
             self.selected_folder.set(folder)
 
     def log_message(self, message: str, level: str = "info"):
-        """Add a message to the results area."""
-        self.results_text.config(state=tk.NORMAL)
+        """Add a message to the results area.
 
+        Safe to call from any thread: the message is queued and shown on
+        the next drain of the UI queue.
+        """
         # Add timestamp and format message
         import datetime
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
@@ -579,11 +897,135 @@ class OrganiserProGUI:
         else:
             formatted_msg = f"[{timestamp}] ℹ️ {message}\n"
 
-        # Insert the message
-        self.results_text.insert(tk.END, formatted_msg)
-        self.results_text.see(tk.END)
-        self.results_text.config(state=tk.DISABLED)
-        self.root.update_idletasks()
+        self.progress_queue.put(("log", formatted_msg))
+
+    def set_status(self, text: str):
+        """Show text in the status bar; safe to call from any thread."""
+        self.progress_queue.put(("status", text))
+
+    def call_in_ui(self, function):
+        """Run a function on the Tk mainloop; safe to call from any thread."""
+        self.progress_queue.put(("call", function))
+
+    def ask_in_ui(self, title: str, message: str) -> bool:
+        """Ask a yes/no question from a worker thread and wait for the answer."""
+        answered = threading.Event()
+        answer = [False]
+
+        def ask():
+            try:
+                answer[0] = messagebox.askyesno(title, message, icon='warning')
+            finally:
+                answered.set()
+
+        self.call_in_ui(ask)
+        answered.wait()
+        return answer[0]
+
+    def report_progress(self, event: ProgressEvent):
+        """Progress callback for the core functions; safe from any thread."""
+        self.progress_queue.put(("progress", event))
+
+    def _drain_ui_queue(self):
+        """Apply queued UI updates in one batch, then schedule the next drain.
+
+        Log lines are inserted with a single call and only the latest
+        status or progress event of the batch is shown, so thousands of
+        preview lines cost one redraw rather than thousands.
+        """
+        lines = []
+        status = None
+        try:
+            for _ in range(UI_BATCH):
+                kind, payload = self.progress_queue.get_nowait()
+                if kind == "log":
+                    lines.append(payload)
+                    continue
+                if kind in ("status", "progress"):
+                    status = payload
+                    continue
+                # Keep log lines and status ordered with the calls around them
+                self._append_log(lines)
+                lines = []
+                self._apply_status(status)
+                status = None
+                payload()
+        except queue.Empty:
+            pass
+        finally:
+            self._append_log(lines)
+            self._apply_status(status)
+            self.root.after(UI_POLL_MS, self._drain_ui_queue)
+
+    def _apply_status(self, status):
+        """Show a queued status text or progress event."""
+        if isinstance(status, ProgressEvent):
+            self._show_progress(status)
+        elif status is not None:
+            self.status_var.set(status)
+
+    def _show_progress(self, event: ProgressEvent):
+        """Fill the progress bar by bytes (or files) and show an ETA."""
+        now = time.monotonic()
+        if event.phase != self.progress_phase:
+            self.progress_phase = event.phase
+            self.progress_started = now
+
+        fraction = event.fraction
+        if fraction is None:
+            # Nothing to measure against yet, e.g. while scanning
+            self._animate_progress()
+        else:
+            if self.progress_animating:
+                self.progress.stop()
+                self.progress_animating = False
+            self.progress.config(mode='determinate', maximum=100)
+            self.progress['value'] = fraction * 100
+
+        text = f"{event.description} {event.done:,}"
+        if event.total is not None:
+            text += f" of {event.total:,}"
+        text += " files"
+        if event.bytes_total is not None:
+            text += (
+                f", {format_size(event.bytes_done)} of "
+                f"{format_size(event.bytes_total)}"
+            )
+        elapsed = now - self.progress_started
+        # Early estimates swing wildly, so wait for a second and 1% of work
+        if fraction and not event.finished and elapsed >= 1 and fraction >= 0.01:
+            remaining = elapsed * (1 - fraction) / fraction
+            text += f" - about {format_duration(remaining)} left"
+        self.status_var.set(text)
+
+    def _animate_progress(self):
+        """Show an indeterminate, moving progress bar."""
+        if not self.progress_animating:
+            self.progress.config(mode='indeterminate')
+            self.progress.start()
+            self.progress_animating = True
+
+    def _reset_progress(self):
+        """Stop and empty the progress bar."""
+        self.progress.stop()
+        self.progress_animating = False
+        self.progress_phase = None
+        self.progress.config(mode='determinate')
+        self.progress['value'] = 0
+
+    def _append_log(self, lines):
+        """Insert formatted log lines, dropping the oldest beyond MAX_LOG_LINES."""
+        if not lines:
+            return
+        text = self.results_text
+        text.config(state=tk.NORMAL)
+        text.insert(tk.END, "".join(lines))
+        # The text always ends with an empty line after the last newline
+        excess = int(text.index("end-1c").split(".")[0]) - 1 - MAX_LOG_LINES
+        if excess > 0:
+            text.delete("1.0", f"{excess + 1}.0")
+        text.see(tk.END)
+        text.config(state=tk.DISABLED)
 
     def validate_inputs(self):
         """Validate user inputs before executing operations."""
@@ -623,10 +1065,14 @@ class OrganiserProGUI:
             return
 
         self.log_message("Starting preview operation...")
-        self.status_var.set("Previewing...")
+        self.set_status("Previewing...")
+        self._animate_progress()
+        self._start_cancellable()
 
         # Run preview in separate thread to avoid blocking UI
-        thread = threading.Thread(target=self._run_preview, daemon=True)
+        thread = threading.Thread(
+            target=self._run_preview, args=(self._run_options(),), daemon=True
+        )
         thread.start()
 
     def execute_operation(self):
@@ -650,12 +1096,17 @@ class OrganiserProGUI:
             if not result:
                 return
 
+        if operation == "dedupe":
+            safety = "Deleted duplicates can be restored with Undo."
+        else:
+            safety = "A backup will be created before making changes."
+
         if not self.preview_mode.get():
             # Enhanced confirmation without preview
             result = messagebox.askyesno(
                 "Confirm Operation",
                 f"You are about to {operation.replace('_', ' ')} files without previewing changes first.\n\n"
-                f"This will modify your files. A backup will be created for safety.\n\n"
+                f"This will modify your files. {safety}\n\n"
                 f"Are you sure you want to continue?",
                 icon='warning'
             )
@@ -666,70 +1117,160 @@ class OrganiserProGUI:
             result = messagebox.askyesno(
                 "Execute Operation",
                 f"Ready to {operation.replace('_', ' ')} files in:\n{folder}\n\n"
-                f"A backup will be created before making changes.\n\n"
+                f"{safety}\n\n"
                 f"Continue with the operation?"
             )
             if not result:
                 return
 
-        self.log_message("Creating backup before operation...")
-        self.status_var.set("Creating backup...")
-        self.progress.start()
+        if operation != "dedupe":
+            self.log_message("Creating backup before operation...")
+            self.set_status("Creating backup...")
+        self._animate_progress()
 
         # Disable buttons during operation
-        self.preview_button.config(state=tk.DISABLED)
-        self.execute_button.config(state=tk.DISABLED)
+        self.action_button.config(state=tk.DISABLED)
+        self._start_cancellable()
         
         # Add undo button if it doesn't exist
         if not hasattr(self, 'undo_button'):
             self._add_undo_button()
 
         # Run operation in separate thread
-        thread = threading.Thread(target=self._run_operation_with_backup, daemon=True)
+        thread = threading.Thread(
+            target=self._run_operation_with_backup,
+            args=(self._run_options(),),
+            daemon=True,
+        )
         thread.start()
 
-    def _run_preview(self):
-        """Run preview operation in background thread."""
+    def _start_cancellable(self):
+        """Give the work about to start a fresh token and enable Pause/Cancel."""
+        self.cancel_token = CancelToken()
+        self.pause_button.config(text="Pause", state=tk.NORMAL)
+        self.cancel_button.config(state=tk.NORMAL)
+
+    def _end_cancellable(self):
+        """Disable Pause/Cancel once the work has stopped."""
+        self.cancel_token = None
+        self.pause_button.config(text="Pause", state=tk.DISABLED)
+        self.cancel_button.config(state=tk.DISABLED)
+
+    def toggle_pause(self):
+        """Pause the running preview or operation, or resume it."""
+        token = self.cancel_token
+        if token is None:
+            return
+        if token.paused:
+            token.resume()
+            self.pause_button.config(text="Pause")
+            self.set_status("Resuming...")
+        else:
+            token.pause()
+            self.pause_button.config(text="Resume")
+            self.set_status("Paused")
+
+    def cancel_operation(self):
+        """Stop the running preview or operation after the current file."""
+        token = self.cancel_token
+        if token is None:
+            return
+        token.cancel()
+        self.pause_button.config(text="Pause", state=tk.DISABLED)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.log_message("Cancelling...", "warning")
+        self.set_status("Cancelling...")
+
+    def toggle_profiling(self, event=None):
+        """Switch debug profiling of previews and operations on or off."""
+        self.profiling_enabled = not self.profiling_enabled
+        state = "enabled" if self.profiling_enabled else "disabled"
+        self.log_message(f"Debug profiling {state}")
+
+    @contextmanager
+    def _profiled(self, operation: str):
+        """Profile the enclosed work if debug profiling is on.
+
+        The breakdown per phase is logged and the cProfile data is saved
+        for ``python -m pstats``.
+        """
+        if not self.profiling_enabled:
+            yield
+            return
+        start_profiling(cprofile=True)
         try:
-            folder = Path(self.selected_folder.get())
-            operation = self.operation_mode.get()
-
-            if operation == "sort_type":
-                self._preview_sort_by_type(folder)
-            elif operation == "sort_date":
-                self._preview_sort_by_date(folder)
-            elif operation == "dedupe":
-                self._preview_dedupe(folder)
+            yield
+        finally:
+            profiler = stop_profiling()
+            for line in profiler.summary():
+                self.log_message(f"Profile {line}")
+            try:
+                path = new_profile_path(operation)
+                profiler.dump_stats(path)
+                self.log_message(f"Profile saved to {path}")
+            except OSError as e:
+                self.log_message(f"Could not save profile: {e}", "warning")
+
+    def _run_options(self) -> RunOptions:
+        """Read the settings a worker thread needs; call on the main thread."""
+        return RunOptions(
+            folder=Path(self.selected_folder.get()),
+            operation=self.operation_mode.get(),
+            recursive=self.recursive_scan.get(),
+        )
 
+    def _run_preview(self, options: RunOptions):
+        """Run preview operation in background thread."""
+        try:
+            operation = options.operation
+
+            with self._profiled(f"preview-{operation}"):
+                if operation == "sort_type":
+                    self._preview_sort_by_type(options)
+                elif operation == "sort_date":
+                    self._preview_sort_by_date(options)
+                elif operation == "dedupe":
+                    self._preview_dedupe(options)
+
+        except OperationCancelled:
+            self.log_message("Preview cancelled", "warning")
         except Exception as e:
             self.log_message(f"Preview failed: {str(e)}", "error")
         finally:
-            self.status_var.set("Ready")
+            self.call_in_ui(self._reset_progress)
+            self.call_in_ui(self._end_cancellable)
+            self.set_status("Ready")
 
-    def _run_operation_with_backup(self):
+    def _run_operation_with_backup(self, options: RunOptions):
         """Run actual operation with backup creation in background thread."""
         backup_path = None
+        # A failed run must not record or undo the journal of an earlier one
+        self.last_journal_path = None
+        folder, operation = options.folder, options.operation
         try:
-            folder = Path(self.selected_folder.get())
-            operation = self.operation_mode.get()
-
-            # Create backup
-            backup_path = self._create_backup(folder)
-            if backup_path:
-                self.log_message(f"Backup created: {backup_path}", "success")
-                self.last_backup_path = backup_path
-                self.last_operation_folder = str(folder)
-                self.last_operation_type = operation
-            
-            self.log_message("Starting operation...")
-            self.status_var.set("Processing...")
-
-            if operation == "sort_type":
-                self._execute_sort_by_type(folder)
-            elif operation == "sort_date":
-                self._execute_sort_by_date(folder)
-            elif operation == "dedupe":
-                self._execute_dedupe(folder)
+            with self._profiled(operation):
+                # Deleted duplicates are restored from the journal and their
+                # kept copies; a snapshot would only hard-link the files
+                # being deleted and keep their space in use
+                if operation != "dedupe":
+                    backup_path = self._create_backup(folder)
+                if backup_path:
+                    self.log_message(f"Backup created: {backup_path}", "success")
+                    self.last_backup_path = backup_path
+                    self.last_operation_folder = str(folder)
+                    self.last_operation_type = operation
+                # Cancelling during the backup stops before any file is touched
+                checkpoint(self.cancel_token)
+
+                self.log_message("Starting operation...")
+                self.set_status("Processing...")
+
+                if operation == "sort_type":
+                    self._execute_sort_by_type(options)
+                elif operation == "sort_date":
+                    self._execute_sort_by_date(options)
+                elif operation == "dedupe":
+                    self._execute_dedupe(options)
 
             # Record successful operation
             self._record_operation(folder, operation)
@@ -738,63 +1279,244 @@ class OrganiserProGUI:
             
             # Enable undo button
             if hasattr(self, 'undo_button'):
-                self.undo_button.config(state=tk.NORMAL)
+                self.call_in_ui(lambda: self.undo_button.config(state=tk.NORMAL))
 
+        except OperationCancelled:
+            self.log_message("Operation cancelled", "warning")
+            # Whatever was done before the cancel can still be undone
+            if self.last_journal_path is not None and hasattr(self, 'undo_button'):
+                self.call_in_ui(lambda: self.undo_button.config(state=tk.NORMAL))
         except Exception as e:
             self.log_message(f"Operation failed: {str(e)}", "error")
+            if self.last_journal_path is not None and hasattr(self, 'undo_button'):
+                self.call_in_ui(lambda: self.undo_button.config(state=tk.NORMAL))
             # If operation failed and we have a backup, offer to restore
             if backup_path and backup_path.exists():
-                result = messagebox.askyesno(
-                    "Operation Failed",
-                    f"The operation failed: {str(e)}\n\n"
-                    f"Would you like to restore from the backup?"
+                error = str(e)
+                self.call_in_ui(
+                    lambda: self._offer_restore(error, backup_path, folder)
                 )
-                if result:
-                    self._restore_from_backup(backup_path, folder)
         finally:
-            self.progress.stop()
-            self.preview_button.config(state=tk.NORMAL)
-            self.execute_button.config(state=tk.NORMAL)
-            self.status_var.set("Ready")
-
-    def _run_operation(self):
+            self._finish_operation()
+
+    def _finish_operation(self):
+        """Stop the progress bar and re-enable the action button."""
+        def finish():
+            self._reset_progress()
+            self._end_cancellable()
+            self.action_button.config(state=tk.NORMAL)
+
+        self.call_in_ui(finish)
+        self.set_status("Ready")
+
+    def _offer_restore(self, error: str, backup_path: Path, folder: Path):
+        """Ask whether to restore the backup of a failed operation."""
+        result = messagebox.askyesno(
+            "Operation Failed",
+            f"The operation failed: {error}\n\n"
+            f"Would you like to restore from the backup?"
+        )
+        if result:
+            threading.Thread(
+                target=self._restore_from_backup,
+                args=(backup_path, folder),
+                daemon=True,
+            ).start()
+
+    def _run_operation(self, options: RunOptions):
         """Run actual operation in background thread (legacy method)."""
+        self.last_journal_path = None
         try:
-            folder = Path(self.selected_folder.get())
-            operation = self.operation_mode.get()
+            operation = options.operation
 
             if operation == "sort_type":
-                self._execute_sort_by_type(folder)
+                self._execute_sort_by_type(options)
             elif operation == "sort_date":
-                self._execute_sort_by_date(folder)
+                self._execute_sort_by_date(options)
             elif operation == "dedupe":
-                self._execute_dedupe(folder)
+                self._execute_dedupe(options)
 
             self.log_message("Operation completed successfully!", "success")
 
         except Exception as e:
             self.log_message(f"Operation failed: {str(e)}", "error")
         finally:
-            self.progress.stop()
-            self.preview_button.config(state=tk.NORMAL)
-            self.execute_button.config(state=tk.NORMAL)
-            self.status_var.set("Ready")
+            self._finish_operation()
 
-    def _preview_sort_by_type(self, folder: Path):
+    def _preview_sort_by_type(self, options: RunOptions):
         """Preview sort by type operation."""
-        # Get file counts by type
-        files_by_type = {}
-        for file_path in folder.rglob("*") if self.recursive_scan.get() else folder.iterdir():
-            if file_path.is_file() and not file_path.name.startswith("."):
-                ext = file_path.suffix.lower() or "no_extension"
-                files_by_type[ext] = files_by_type.get(ext, 0) + 1
+        folder = options.folder
+        index = FileIndex()
+        plan = plan_sort_by_type(
+            str(folder),
+            recursive=options.recursive,
+            index=index,
+            progress=self.report_progress,
+            cancel=self.cancel_token,
+        )
+        self.current_plan = plan
 
         self.log_message(f"Preview: Sort by Type in {folder}")
-        self.log_message(f"Found {sum(files_by_type.values())} files")
-
-        for ext, count in sorted(files_by_type.items()):
-            folder_name = ext[1:] if ext.startswith('.') else ext
+        self._log_move_plan(plan)
+        self._show_results(ResultSet.from_plan(plan, index))
+
+    def _show_results(self, results: ResultSet):
+        """Show every file of a preview in the Files tab."""
+        def show():
+            self.results_pane.show(results)
+            if len(results):
+                self.results_tabs.select(self.results_pane.frame)
+
+        self.call_in_ui(show)
+
+    def _log_move_plan(self, plan: OperationPlan):
+        """Log how many files a sort plan moves into each folder."""
+        files_by_folder = {}
+        for action in plan.actions:
+            folder_name = os.path.relpath(Path(action.target).parent, plan.root)
+            files_by_folder[folder_name] = files_by_folder.get(folder_name, 0) + 1
+
+        self.log_message(f"Found {len(plan.actions)} files")
+        for folder_name, count in sorted(files_by_folder.items()):
             self.log_message(f"  → {folder_name}/ ({count} files)")
+        if plan.actions:
+            self.log_message("Every file is listed in the Files tab")
+
+    def _take_plan(self, options: RunOptions, operation: str):
+        """Return the previewed plan for this operation if it is still valid.
+
+        The plan is used at most once; None means the operation has to be
+        planned again because nothing was previewed or files have changed.
+        """
+        plan, self.current_plan = self.current_plan, None
+        if (
+            plan is None
+            or plan.operation != operation
+            or Path(plan.root) != options.folder.resolve()
+            or plan.options.get("recursive") != options.recursive
+        ):
+            return None
+        if not plan.is_current():
+            self.log_message("Files changed since the preview; rescanning...")
+            return None
+        return plan
+
+    def _create_backup(self, folder: Path):
+        """Snapshot the folder with hard links before an operation.
+
+        Returns the snapshot directory, or None if no snapshot could be made
+        and the user chose to carry on without one.
+
+        Raises:
+            OperationCancelled: If no snapshot could be made and the user
+                chose not to carry on
+        """
+        try:
+            with span("backup"):
+                snapshot, stats = create_snapshot(folder)
+        except OSError as e:
+            self.log_message(f"Could not create backup: {e}", "warning")
+            if not self.ask_in_ui(
+                "Backup Failed",
+                f"Could not create a backup of {folder}:\n{e}\n\n"
+                "The operation can still be undone from its journal.\n\n"
+                "Continue without a backup?"
+            ):
+                raise OperationCancelled()
+            return None
+        if stats.cloned or stats.copied:
+            self.log_message(
+                f"Backup linked {stats.linked} files, cloned {stats.cloned} "
+                f"and copied {stats.copied}"
+            )
+        pruned = prune_snapshots(folder)
+        if pruned:
+            self.log_message(f"Removed {pruned} old backups")
+        return snapshot
+
+    def _restore_from_backup(self, backup_path: Path, folder: Path):
+        """Restore the folder from a snapshot made by _create_backup."""
+        self.set_status("Restoring backup...")
+        try:
+            stats = restore_snapshot(backup_path, folder)
+            restored = stats.linked + stats.cloned + stats.copied
+            self.log_message(
+                f"Restored {restored} files from backup, removed {stats.removed}",
+                "success"
+            )
+        except Exception as e:
+            self.log_message(f"Restore failed: {str(e)}", "error")
+        finally:
+            self.set_status("Ready")
+
+    def _add_undo_button(self):
+        """Add an Undo button next to the action button."""
+        self.undo_button = ttk.Button(
+            self.action_button.master,
+            text="Undo Last Operation",
+            command=self.undo_last_operation,
+            style='Warning.TButton',
+            state=tk.DISABLED
+        )
+        self.undo_button.grid(row=0, column=1, pady=20, padx=(10, 0))
+
+    def undo_last_operation(self):
+        """Undo the last operation by replaying its journal in reverse."""
+        if self.last_journal_path is None:
+            self.log_message("Nothing to undo", "warning")
+            return
+        if not messagebox.askyesno(
+            "Undo Operation",
+            f"Put every file changed by the last operation back where it was?\n\n"
+            f"Journal: {self.last_journal_path}"
+        ):
+            return
+
+        self.undo_button.config(state=tk.DISABLED)
+        self.set_status("Undoing...")
+        thread = threading.Thread(target=self._run_undo, daemon=True)
+        thread.start()
+
+    def _run_undo(self):
+        """Undo the last journaled operation in a background thread."""
+        try:
+            result = undo_journal(self.last_journal_path)
+            for intent, reason in result.skipped:
+                self.log_message(f"Skipped {intent['source']}: {reason}", "warning")
+            for intent, error in result.failed:
+                self.log_message(f"Could not restore {intent['source']}: {error}", "error")
+            self.log_message(f"Undo restored {result.restored} files", "success")
+            self.last_journal_path = None
+        except Exception as e:
+            self.log_message(f"Undo failed: {str(e)}", "error")
+            self.call_in_ui(lambda: self.undo_button.config(state=tk.NORMAL))
+        finally:
+            self.set_status("Ready")
+
+    def _record_operation(self, folder: Path, operation: str):
+        """Record an operation in the folder's history for _check_recent_operation."""
+        import json
+        import time
+
+        history_file = Path(folder) / '.organiserpro_history.json'
+        try:
+            with open(history_file, 'r') as f:
+                history = json.load(f)
+        except (OSError, ValueError):
+            history = {}
+
+        operations = history.setdefault('operations', [])
+        operations.append({
+            'operation': operation,
+            'timestamp': time.time(),
+            'journal': str(self.last_journal_path) if self.last_journal_path else None,
+        })
+        del operations[:-50]  # Keep the history file small
+        try:
+            with open(history_file, 'w') as f:
+                json.dump(history, f, indent=2)
+        except OSError as e:
+            self.log_message(f"Could not record operation history: {e}", "warning")
 
     def _check_recent_operation(self, folder: str, operation: str) -> bool:
         """Check if this operation was recently performed on this folder."""
@@ -821,61 +1543,130 @@ class OrganiserProGUI:
         except Exception:
             return False
 
-    def _preview_sort_by_date(self, folder: Path):
+    def _preview_sort_by_date(self, options: RunOptions):
         """Preview sort by date operation."""
+        folder = options.folder
+        index = FileIndex()
+        plan = plan_sort_by_date(
+            str(folder),
+            recursive=options.recursive,
+            index=index,
+            progress=self.report_progress,
+            cancel=self.cancel_token,
+        )
+        self.current_plan = plan
+
         self.log_message(f"Preview: Sort by Date in {folder}")
-        # Implementation would analyze files by date and show preview
-        self.log_message("Date sorting preview - feature coming soon!")
+        self._log_move_plan(plan)
+        self._show_results(ResultSet.from_plan(plan, index))
 
-    def _preview_dedupe(self, folder: Path):
+    def _preview_dedupe(self, options: RunOptions):
         """Preview duplicate detection."""
+        folder = options.folder
         self.log_message(f"Preview: Find Duplicates in {folder}")
 
-        duplicates = find_duplicates(str(folder), recursive=self.recursive_scan.get())
-
-        if duplicates:
-            # Convert dict to list of groups for display
-            duplicate_groups = [files for files in duplicates.values() if len(files) > 1]
-            self.log_message(f"Found {len(duplicate_groups)} groups of duplicate files:")
-            for i, group in enumerate(duplicate_groups[:5], 1):  # Show first 5 groups
-                self.log_message(f"  Group {i}: {len(group)} duplicates")
-                for file_path in group[:3]:  # Show first 3 files in group
-                    self.log_message(f"    • {file_path}")
-                if len(group) > 3:
-                    self.log_message(f"    ... and {len(group) - 3} more")
-            if len(duplicate_groups) > 5:
-                self.log_message(f"  ... and {len(duplicate_groups) - 5} more groups")
+        scan = find_duplicate_ids(
+            str(folder),
+            recursive=options.recursive,
+            progress=self.report_progress,
+            cancel=self.cancel_token,
+        )
+        self.current_plan = plan_duplicates(scan, str(folder))
+        self.current_plan.options["recursive"] = options.recursive
+
+        results = ResultSet.from_duplicates(scan, self.current_plan)
+        self._show_results(results)
+        if scan.groups:
+            reclaimable = sum(
+                scan.index.size[file_ids[0]] * (len(file_ids) - 1)
+                for file_ids in scan.groups.values()
+            )
+            self.log_message(
+                f"Found {len(scan.groups):,} groups of duplicate files "
+                f"({len(results) - len(scan.groups):,} duplicates, "
+                f"{format_size(reclaimable)} reclaimable)"
+            )
+            self.log_message("Every group is listed in the Files tab")
         else:
             self.log_message("No duplicate files found!", "success")
 
-    def _execute_sort_by_type(self, folder: Path):
+    def _execute_plan(self, plan: OperationPlan):
+        """Execute a plan and log any files that could not be handled."""
+        # Plans are either fresh or were just checked by _take_plan
+        result, journal_path = execute_journaled(
+            plan,
+            check=False,
+            workers=default_workers(),
+            progress=self.report_progress,
+            cancel=self.cancel_token,
+        )
+        if journal_path is not None:
+            self.last_journal_path = journal_path
+            self.log_message(f"Changes journaled to {journal_path}")
+        for action, error in result.failed:
+            self.log_message(
+                f"Could not {action.action} {action.source}: {error}", "warning"
+            )
+        if result.cancelled:
+            self.log_message(
+                f"Handled {len(result.done)} files; {len(result.cancelled)} were "
+                "left untouched"
+            )
+            raise OperationCancelled()
+        return result
+
+    def _execute_sort_by_type(self, options: RunOptions):
         """Execute sort by type operation."""
-        try:
-            sort_by_type(str(folder), dry_run=False)
-            self.log_message("Files sorted by type successfully!")
-        except Exception as e:
-            self.log_message(f"Error sorting files: {str(e)}", "error")
+        folder = options.folder
+        plan = self._take_plan(options, "sort_by_type")
+        self._execute_plan(
+            plan or plan_sort_by_type(
+                str(folder),
+                recursive=options.recursive,
+                progress=self.report_progress,
+                cancel=self.cancel_token,
+            )
+        )
+        self.log_message("Files sorted by type successfully!")
 
-    def _execute_sort_by_date(self, folder: Path):
+    def _execute_sort_by_date(self, options: RunOptions):
         """Execute sort by date operation."""
-        try:
-            sort_by_date(str(folder), dry_run=False)
-            self.log_message("Files sorted by date successfully!")
-        except Exception as e:
-            self.log_message(f"Error sorting files by date: {str(e)}", "error")
-
-    def _execute_dedupe(self, folder: Path):
-        """Execute duplicate removal."""
-        duplicates = find_duplicates(str(folder), recursive=self.recursive_scan.get())
-
-        if duplicates:
-            # Convert dict to list of groups for counting
-            duplicate_groups = [files for files in duplicates.values() if len(files) > 1]
-            total_duplicates = sum(len(group) - 1 for group in duplicate_groups)  # Keep one from each group
-            self.log_message(f"Found {total_duplicates} duplicate files that could be removed")
-            self.log_message("Automatic duplicate removal coming in future update!")
-        else:
+        folder = options.folder
+        plan = self._take_plan(options, "sort_by_date")
+        self._execute_plan(
+            plan or plan_sort_by_date(
+                str(folder),
+                recursive=options.recursive,
+                progress=self.report_progress,
+                cancel=self.cancel_token,
+            )
+        )
+        self.log_message("Files sorted by date successfully!")
+
+    def _execute_dedupe(self, options: RunOptions):
+        """Delete every duplicate but the first of each group, journaled."""
+        folder = options.folder
+        # A current preview already hashed everything, so don't hash again
+        plan = self._take_plan(options, "dedupe")
+        if plan is None:
+            scan = find_duplicate_ids(
+                str(folder),
+                recursive=options.recursive,
+                progress=self.report_progress,
+                cancel=self.cancel_token,
+            )
+            plan = plan_duplicates(scan, str(folder))
+
+        if not plan.actions:
             self.log_message("No duplicates found - your files are already organized!", "success")
+            return
+
+        # Undo recreates deleted duplicates from the copy that was kept
+        result = self._execute_plan(plan)
+        self.log_message(
+            f"Removed {len(result.done)} duplicate files, reclaiming "
+            f"{format_size(result.bytes_reclaimed)}"
+        )
 
     def run(self):
         """Start the GUI application."""
@@ -0,0 +1,73 @@
+"""Parallel hashing engine used by duplicate detection."""
+
+import hashlib
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - optional dependency
+    xxhash = None
+
+from .cancel import CancelToken
+from .workers import WorkerPool
+
+DEFAULT_ALGORITHM = "sha256"
+
+# Digest constructors by name. Cryptographic digests come from hashlib;
+# the much faster xxHash family is available when ``xxhash`` is installed.
+HASH_ALGORITHMS: Dict[str, Callable[[], Any]] = {
+    "sha256": hashlib.sha256,
+    "blake2b": hashlib.blake2b,
+    "blake2s": hashlib.blake2s,
+}
+if xxhash is not None:
+    HASH_ALGORITHMS["xxh64"] = xxhash.xxh64
+    HASH_ALGORITHMS["xxh3"] = xxhash.xxh3_128
+
+
+def available_algorithms() -> List[str]:
+    """Return the names of the hash algorithms usable on this system."""
+    return list(HASH_ALGORITHMS)
+
+
+def new_hasher(algorithm: str = DEFAULT_ALGORITHM) -> Any:
+    """Create a fresh hash object for ``algorithm``.
+
+    Args:
+        algorithm: One of :func:`available_algorithms`
+
+    Returns:
+        A hashlib-compatible object with ``update`` and ``hexdigest``
+
+    Raises:
+        ValueError: If the algorithm is unknown or its module is not installed
+    """
+    try:
+        return HASH_ALGORITHMS[algorithm]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown hash algorithm {algorithm!r}; "
+            f"choose one of: {', '.join(available_algorithms())}"
+        ) from None
+
+
+class HashEngine(WorkerPool):
+    """Run hash functions over many files on a pool of threads.
+
+    ``hashlib`` releases the GIL while digesting large buffers, so a thread
+    pool scales with the number of cores for file hashing. Results come
+    back in input order and honour a cancel token as described for
+    :class:`~OrganiserPro.workers.WorkerPool`.
+
+    Args:
+        workers: Number of workers; defaults to the number of CPUs.
+            With a single worker everything runs inline in the caller.
+        cancel: Optional token to pause or cancel the run with
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        cancel: Optional[CancelToken] = None,
+    ):
+        super().__init__(workers, cancel, name="organiserpro-hash")
@@ -0,0 +1,106 @@
+"""Compact column store for large file scans."""
+
+import os
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .scanner import FileEntry
+
+# Bits reserved for the file id when sorting by (size, id) packed in one int
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+
+
+class FileIndex:
+    """Memory-efficient index of scanned files.
+
+    Instead of one ``Path`` object per file, the index keeps parallel typed
+    arrays for the numeric stat fields, stores each file name once and
+    shares each directory prefix between all files in that directory.
+    Files are addressed by their integer position in the index; full path
+    strings are only rebuilt on demand with :meth:`path`.
+    """
+
+    __slots__ = (
+        "_dirs",
+        "_dir_ids",
+        "dir_id",
+        "names",
+        "size",
+        "mtime_ns",
+        "inode",
+        "dev",
+    )
+
+    def __init__(self) -> None:
+        self._dirs: List[str] = []
+        self._dir_ids: Dict[str, int] = {}
+        self.dir_id = array("l")
+        self.names: List[str] = []
+        self.size = array("q")
+        self.mtime_ns = array("q")
+        self.inode = array("Q")
+        self.dev = array("Q")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, entry: FileEntry) -> int:
+        """Append a scanned file and return its id."""
+        directory, name = os.path.split(entry.path)
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            dir_id = len(self._dirs)
+            self._dirs.append(directory)
+            self._dir_ids[directory] = dir_id
+        self.dir_id.append(dir_id)
+        self.names.append(name)
+        self.size.append(entry.size)
+        self.mtime_ns.append(entry.mtime_ns)
+        self.inode.append(entry.inode)
+        self.dev.append(entry.dev)
+        return len(self.names) - 1
+
+    def extend(self, entries: Iterable[FileEntry]) -> None:
+        """Append every entry from an iterable, such as a running scan."""
+        for entry in entries:
+            self.add(entry)
+
+    def path(self, file_id: int) -> str:
+        """Rebuild the full path of a file from its directory and name."""
+        return os.path.join(self._dirs[self.dir_id[file_id]], self.names[file_id])
+
+    def entry(self, file_id: int) -> FileEntry:
+        """Return the :class:`FileEntry` for a file id."""
+        return FileEntry(
+            self.path(file_id),
+            self.names[file_id],
+            self.size[file_id],
+            self.mtime_ns[file_id],
+            self.inode[file_id],
+            self.dev[file_id],
+        )
+
+    def same_size_runs(self) -> Iterator[Tuple[int, array]]:
+        """Yield ``(size, ids)`` for every size shared by more than one file.
+
+        Files are ordered by a single in-place sort of ``size << 32 | id``
+        keys, so no per-size dictionary is built for files with a unique
+        size. Ids within a run come out in scan order.
+        """
+        keys = [(size << _ID_BITS) | i for i, size in enumerate(self.size)]
+        keys.sort()
+        run = array("l")
+        run_size = -1
+        for key in keys:
+            size = key >> _ID_BITS
+            if size != run_size:
+                if len(run) > 1:
+                    yield run_size, run
+                    run = array("l")
+                else:
+                    del run[:]
+                run_size = size
+            run.append(key & _ID_MASK)
+        if len(run) > 1:
+            yield run_size, run
@@ -0,0 +1,394 @@
+"""Write-ahead journal of file operations, used for crash recovery and undo."""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from rich.console import Console
+
+from .cancel import CancelToken
+from .mover import move_noreplace
+from .plan import (
+    DELETE,
+    LINK,
+    MOVE,
+    OperationPlan,
+    PlannedAction,
+    PlanResult,
+    execute_plan,
+)
+from .progress import ProgressCallback
+
+console = Console()
+
+JOURNAL_VERSION = 1
+
+
+def default_journal_dir() -> Path:
+    """Return the directory journals are written to by default.
+
+    Honours ``$XDG_STATE_HOME`` and falls back to ``~/.local/state``.
+    """
+    base = os.environ.get("XDG_STATE_HOME") or os.path.join("~", ".local", "state")
+    return Path(base).expanduser() / "organiserpro" / "journals"
+
+
+def latest_journal(directory: Optional[Path] = None) -> Optional[Path]:
+    """Return the most recently written journal, if there is one."""
+    directory = directory or default_journal_dir()
+    try:
+        journals = [p for p in directory.iterdir() if p.suffix == ".jsonl"]
+    except OSError:
+        return None
+    return max(journals, key=lambda p: p.stat().st_mtime_ns, default=None)
+
+
+class Journal:
+    """Append-only log of the file operations made by one command.
+
+    Every operation is recorded as an *intent* before it is carried out, and
+    the intents are fsync'd to disk before any file is touched. Completed
+    operations are followed by a *done* record carrying their final target.
+    If the process dies part-way, the journal therefore lists every
+    operation that may have happened, and :func:`undo_journal` checks the
+    file system to see which of them actually did.
+
+    Intents are written in batches with a single fsync per batch, so
+    journaling a sort costs a constant number of flushes rather than one
+    per file.
+
+    Args:
+        path: File to write the journal to; must not exist yet
+        operation: Name of the operation being journaled
+        root: Directory the operation works on
+    """
+
+    def __init__(self, path: Path, operation: str, root: str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "x", encoding="utf-8")
+        self._seq = 0
+        self._write(
+            {
+                "type": "journal",
+                "version": JOURNAL_VERSION,
+                "operation": operation,
+                "root": root,
+                "created": time.time(),
+            }
+        )
+        self._sync()
+        # Make the new journal's directory entry durable as well
+        dir_fd = os.open(self.path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    @classmethod
+    def create(
+        cls, operation: str, root: str, directory: Optional[Path] = None
+    ) -> "Journal":
+        """Start a new journal with a timestamped name in ``directory``."""
+        directory = directory or default_journal_dir()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = directory / f"{stamp}-{operation}-{os.getpid()}.jsonl"
+        return cls(path, operation, root)
+
+    def _write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def log(self, actions: Sequence[PlannedAction]) -> List[int]:
+        """
+        Durably record actions that are about to be carried out.
+
+        Deletes and links also record the size, mode and mtime of the file
+        they replace, so an undo can recreate it from the kept original, and
+        the mtime of that original, so an undo can tell it has not changed.
+
+        Args:
+            actions: Actions to record, in the order they will be attempted
+
+        Returns:
+            List[int]: Sequence number of each action, for :meth:`done`
+        """
+        seqs = []
+        for action in actions:
+            self._seq += 1
+            record = {"type": "intent", "seq": self._seq, **action._asdict()}
+            if action.action in (DELETE, LINK):
+                try:
+                    st = os.stat(action.source)
+                    record.update(
+                        size=st.st_size, mode=st.st_mode, mtime_ns=st.st_mtime_ns
+                    )
+                    record["kept_mtime_ns"] = os.stat(action.target).st_mtime_ns
+                except OSError:
+                    pass  # The action itself will fail and be reported
+            self._write(record)
+            seqs.append(self._seq)
+        self._sync()
+        return seqs
+
+    def done(self, seq: int, target: Optional[str] = None) -> None:
+        """Record that an action completed, with its final target if moved."""
+        record: Dict[str, object] = {"type": "done", "seq": seq}
+        if target is not None:
+            record["target"] = target
+        self._write(record)
+
+    def created_dir(self, directory: str) -> None:
+        """Record a directory the operation made, so an undo can remove it."""
+        self._write({"type": "mkdir", "path": directory})
+
+    def cancelled(self, seq: int) -> None:
+        """Record that an action was never started because the run was cancelled."""
+        self._write({"type": "cancelled", "seq": seq})
+
+    def close(self) -> None:
+        """Flush the journal to disk and close it."""
+        if not self._file.closed:
+            self._sync()
+            self._file.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def open_journal(operation: str, root: str) -> Optional[Journal]:
+    """Start a journal in the default location, warning if that fails."""
+    try:
+        return Journal.create(operation, root)
+    except OSError as e:
+        console.print(f"[yellow]Warning: Could not create undo journal: {e}")
+        return None
+
+
+def execute_journaled(
+    plan: OperationPlan,
+    check: bool = True,
+    workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Tuple[PlanResult, Optional[Path]]:
+    """
+    Execute a plan with every action recorded in a new journal.
+
+    Args:
+        plan: Plan to execute
+        check: If True, refuse to run a plan whose files have changed
+        workers: Number of threads for cross-device moves
+        progress: Optional callback receiving progress events (see
+            :func:`~OrganiserPro.plan.execute_plan`)
+        cancel: Optional token to pause or stop the run with; actions that
+            were never started are left out of an undo
+
+    Returns:
+        Tuple of the result and the journal's path, or None if no journal
+        could be created
+
+    Raises:
+        StalePlanError: If ``check`` is set and the plan is out of date
+    """
+    journal = open_journal(plan.operation, plan.root) if plan.actions else None
+    try:
+        result = execute_plan(
+            plan,
+            check=check,
+            workers=workers,
+            journal=journal,
+            progress=progress,
+            cancel=cancel,
+        )
+    finally:
+        if journal is not None:
+            journal.close()
+    return result, journal.path if journal is not None else None
+
+
+def read_journal(path: Path) -> Tuple[dict, List[dict], List[str]]:
+    """
+    Read a journal back.
+
+    A torn final line, left behind if the process died mid-write, is
+    ignored.
+
+    Args:
+        path: Journal file to read
+
+    Returns:
+        Tuple of the journal header, its intents in order and the
+        directories the operation created. Each intent is updated with the
+        final target from its done record and a ``done`` flag; intents of
+        cancelled actions are left out
+
+    Raises:
+        ValueError: If the file is not a supported journal
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+
+    records = []
+    for number, line in enumerate(lines, 1):
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            if number != len(lines):
+                raise ValueError(f"Corrupt journal line {number} in {path}")
+    if not records or records[0].get("type") != "journal":
+        raise ValueError(f"{path} is not an OrganiserPro journal")
+    header = records[0]
+    if header.get("version") != JOURNAL_VERSION:
+        raise ValueError(f"Unsupported journal version: {header.get('version')!r}")
+
+    intents: Dict[int, dict] = {}
+    created_dirs: List[str] = []
+    for record in records[1:]:
+        if record["type"] == "intent":
+            intents[record["seq"]] = dict(record, done=False)
+        elif record["type"] == "done" and record["seq"] in intents:
+            intent = intents[record["seq"]]
+            intent["done"] = True
+            intent["target"] = record.get("target", intent["target"])
+        elif record["type"] == "cancelled":
+            intents.pop(record["seq"], None)
+        elif record["type"] == "mkdir":
+            created_dirs.append(record["path"])
+    return header, list(intents.values()), created_dirs
+
+
+@dataclass
+class UndoResult:
+    """Outcome of :func:`undo_journal`.
+
+    Attributes:
+        restored: Number of files put back the way they were
+        skipped: Intents that needed no undo or could not safely be undone,
+            with the reason
+        failed: Intents whose undo raised an error
+    """
+
+    restored: int = 0
+    skipped: List[Tuple[dict, str]] = field(default_factory=list)
+    failed: List[Tuple[dict, OSError]] = field(default_factory=list)
+
+
+def _restore_copy(intent: dict, replace: bool) -> None:
+    """Recreate a file as an independent copy of the original it matched.
+
+    The copy is written under a fresh temporary name with the recorded
+    mode and mtime, then either renamed over the path (``replace``) or
+    hard-linked into place, which fails rather than overwrite a file that
+    reappeared.
+    """
+    path, original = intent["source"], intent["target"]
+    directory, name = os.path.split(path)
+    fd, temp = tempfile.mkstemp(
+        prefix=f".{name}.", suffix=".organiserpro-undo", dir=directory
+    )
+    os.close(fd)
+    try:
+        shutil.copyfile(original, temp)
+        if "mode" in intent:
+            os.chmod(temp, intent["mode"] & 0o7777)
+            os.utime(temp, ns=(intent["mtime_ns"], intent["mtime_ns"]))
+        else:
+            shutil.copymode(original, temp)
+        if replace:
+            os.replace(temp, path)
+            return
+        os.link(temp, path)
+    except OSError:
+        os.unlink(temp)
+        raise
+    os.unlink(temp)
+
+
+def undo_journal(path: Path) -> UndoResult:
+    """
+    Reverse the operations recorded in a journal, strictly newest first.
+
+    Only the files named in the journal are touched, so the cost of an undo
+    is proportional to the number of changes, not the size of the folder.
+    Each intent is checked against the file system first, which makes undo
+    safe after a crash and safe to run more than once:
+
+    - moves are renamed back if the file is still at its target and its
+      original path is free; a file that takes that path meanwhile fails
+      the undo rather than being renamed around, and the directories the
+      operation created are removed once this leaves them empty
+    - deletes are recreated by copying the kept original, as long as it
+      still has the recorded size and modification time
+    - hard links are split back into an independent copy
+    - reflinks need no undo, as both files already have their own inode
+
+    Args:
+        path: Journal to undo
+
+    Returns:
+        UndoResult: What was restored, skipped or failed
+
+    Raises:
+        ValueError: If the file is not a supported journal
+    """
+    _, intents, created_dirs = read_journal(path)
+    result = UndoResult()
+
+    for intent in reversed(intents):
+        action, source, target = intent["action"], intent["source"], intent["target"]
+        try:
+            if action == MOVE:
+                if os.path.lexists(source) and not os.path.lexists(target):
+                    result.skipped.append((intent, "file was not moved"))
+                elif os.path.lexists(source):
+                    result.skipped.append((intent, f"{source} already exists"))
+                elif not os.path.lexists(target):
+                    result.skipped.append((intent, f"{target} no longer exists"))
+                else:
+                    os.makedirs(os.path.dirname(os.path.abspath(source)), exist_ok=True)
+                    move_noreplace(target, source)
+                    result.restored += 1
+            elif action == DELETE:
+                kept = None if os.path.lexists(source) else os.stat(target)
+                if kept is None:
+                    result.skipped.append((intent, "file was not deleted"))
+                elif kept.st_size != intent.get("size") or kept.st_mtime_ns != (
+                    intent.get("kept_mtime_ns", kept.st_mtime_ns)
+                ):
+                    result.skipped.append((intent, f"{target} has changed"))
+                else:
+                    _restore_copy(intent, replace=False)
+                    result.restored += 1
+            elif action == LINK:
+                source_stat, target_stat = os.stat(source), os.stat(target)
+                if (source_stat.st_dev, source_stat.st_ino) != (
+                    target_stat.st_dev,
+                    target_stat.st_ino,
+                ):
+                    result.skipped.append((intent, "file is not hard-linked"))
+                else:
+                    _restore_copy(intent, replace=True)
+                    result.restored += 1
+        except OSError as e:
+            result.failed.append((intent, e))
+
+    # Remove the folders the operation created, once they are empty
+    for directory in sorted(set(created_dirs), reverse=True):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
+    return result
@@ -0,0 +1,207 @@
+"""Read the dates files are sorted by, including camera capture times."""
+
+import os
+import struct
+from datetime import datetime
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from PIL import Image
+
+from .cache import HashCache
+from .scanner import FileEntry
+from .workers import WorkerPool
+
+DATE_SOURCES = ("auto", "exif", "mtime", "ctime")
+
+# EXIF tags, from the EXIF 2.3 specification
+_EXIF_IFD = 0x8769
+_DATETIME_ORIGINAL = 0x9003
+_DATETIME_DIGITIZED = 0x9004
+_DATETIME = 0x0132
+_EXIF_DATE_FORMAT = "%Y:%m:%d %H:%M:%S"
+
+# Formats whose EXIF block is in the header, so reading it decodes no pixels;
+# MPO files are opened by the JPEG plugin. PNG is left out because Pillow
+# loads the whole image to find a trailing eXIf chunk.
+_EXIF_FORMATS = ("JPEG", "TIFF", "WEBP")
+# Only files with these extensions are opened; DNG and most camera raw
+# formats are TIFF containers
+_EXIF_EXTENSIONS = frozenset(
+    {
+        ".jpg",
+        ".jpeg",
+        ".jpe",
+        ".mpo",
+        ".tif",
+        ".tiff",
+        ".webp",
+        ".dng",
+        ".nef",
+        ".cr2",
+        ".arw",
+        ".orf",
+        ".rw2",
+        ".pef",
+    }
+)
+
+# Cache kind for capture times; files without one are cached as ""
+_CACHE_KIND = "exif-time"
+
+
+def _parse_exif_date(value: object) -> Optional[float]:
+    """Turn an EXIF ``YYYY:MM:DD HH:MM:SS`` string into a timestamp."""
+    if isinstance(value, bytes):
+        value = value.decode("ascii", "replace")
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value.strip("\0 ")[:19], _EXIF_DATE_FORMAT).timestamp()
+    except ValueError:
+        return None  # Blank ("    :  :  ") or malformed dates are common
+
+
+def _exif_sub_ifd(exif: Any) -> Mapping[int, Any]:
+    """Return the EXIF sub-IFD holding the original and digitised times.
+
+    ``Exif.get_ifd`` only exists from Pillow 8.2; older releases return the
+    sub-IFD as a plain dict when its tag is looked up. If neither works,
+    only the IFD0 date is used.
+    """
+    try:
+        return exif.get_ifd(_EXIF_IFD)
+    except AttributeError:
+        sub_ifd = exif.get(_EXIF_IFD)
+        return sub_ifd if isinstance(sub_ifd, dict) else {}
+
+
+def may_have_exif(path: str) -> bool:
+    """Return True if a file is an image format that can carry a capture time."""
+    return os.path.splitext(path)[1].lower() in _EXIF_EXTENSIONS
+
+
+def exif_capture_time(path: str) -> Optional[float]:
+    """
+    Return when a photo was taken, from its EXIF data.
+
+    Only the image header is parsed; no pixel data is decoded. The original
+    capture time is preferred, then the time it was digitised, then the
+    time the file was last written by the camera or an editor.
+
+    Args:
+        path: Path to the image
+
+    Returns:
+        Capture time as a POSIX timestamp, or None if the file has no
+        usable EXIF date or is not a supported image
+    """
+    if not may_have_exif(path):
+        return None
+    try:
+        with Image.open(path, formats=_EXIF_FORMATS) as image:
+            exif = image.getexif()
+            sub_ifd = _exif_sub_ifd(exif)
+            for value in (
+                sub_ifd.get(_DATETIME_ORIGINAL),
+                sub_ifd.get(_DATETIME_DIGITIZED),
+                exif.get(_DATETIME),
+            ):
+                timestamp = _parse_exif_date(value)
+                if timestamp is not None:
+                    return timestamp
+    except (
+        OSError,
+        SyntaxError,
+        ValueError,
+        struct.error,
+        Image.DecompressionBombError,
+    ):
+        pass  # Unreadable or corrupt headers are treated as having no date
+    return None
+
+
+class CaptureTimeReader:
+    """Work out the date each file is sorted by, for a given date source.
+
+    ``mtime`` and ``ctime`` come from the file system. ``exif`` is the
+    capture time of photos, read with :func:`exif_capture_time`; files
+    without one have no date. ``auto`` uses the capture time where there
+    is one and the mtime for everything else.
+
+    EXIF headers are parsed on a pool of threads by :meth:`prefetch`, and
+    the results, including the absence of a capture time, are cached by
+    inode and mtime in a :class:`~OrganiserPro.cache.HashCache`, so a
+    photo library is only read once.
+
+    Args:
+        source: One of :data:`DATE_SOURCES`
+        cache: Optional cache of capture times from earlier runs
+        workers: Number of threads used by :meth:`prefetch`
+
+    Raises:
+        ValueError: If ``source`` is not a known date source
+    """
+
+    def __init__(
+        self,
+        source: str = "auto",
+        cache: Optional[HashCache] = None,
+        workers: Optional[int] = None,
+    ) -> None:
+        if source not in DATE_SOURCES:
+            raise ValueError(
+                f"Unknown date source {source!r}; "
+                f"choose one of: {', '.join(DATE_SOURCES)}"
+            )
+        self.source = source
+        self.cache = cache
+        self.workers = workers
+        self._times: Dict[str, Optional[float]] = {}
+
+    def _read(self, entry: FileEntry) -> Optional[float]:
+        """Return the date of one file, reading its header if needed."""
+        if self.source == "mtime":
+            return entry.mtime
+        if self.source == "ctime":
+            try:
+                return os.stat(entry.path).st_ctime
+            except OSError:
+                return entry.mtime
+
+        if not may_have_exif(entry.path):
+            return entry.mtime if self.source == "auto" else None
+
+        key = (entry.dev, entry.inode, entry.size, entry.mtime_ns)
+        cached = None
+        if self.cache is not None:
+            cached = self.cache.lookup(*key, _CACHE_KIND)
+        if cached is not None:
+            captured = float(cached) if cached else None
+        else:
+            captured = exif_capture_time(entry.path)
+            if self.cache is not None:
+                self.cache.store(
+                    *key, _CACHE_KIND, repr(captured) if captured is not None else ""
+                )
+        if captured is None and self.source == "auto":
+            return entry.mtime
+        return captured
+
+    def prefetch(self, entries: Iterable[FileEntry]) -> None:
+        """Read the dates of many files at once on a pool of threads."""
+        if self.source == "mtime":
+            return  # Already in the scan results; nothing to read
+        entries = [e for e in entries if e.path not in self._times]
+        with WorkerPool(self.workers, name="organiserpro-exif") as pool:
+            for entry, timestamp in zip(entries, pool.map(self._read, entries)):
+                self._times[entry.path] = timestamp
+
+    def timestamp(self, entry: FileEntry) -> Optional[float]:
+        """Return the date a file is sorted by, as a POSIX timestamp.
+
+        Returns None for files without a capture time when the source is
+        ``exif``.
+        """
+        if entry.path not in self._times:
+            self._times[entry.path] = self._read(entry)
+        return self._times[entry.path]
@@ -0,0 +1,289 @@
+"""Run counters and latency histograms, exported for monitoring with --metrics-out."""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Prefix of every exported metric name
+NAMESPACE = "organiserpro"
+
+# Counters kept for every run, with their help text
+COUNTERS: Dict[str, str] = {
+    "entries_scanned": "Directory entries read while scanning",
+    "stat_calls": "stat() calls made on files",
+    "bytes_hashed": "Bytes of file contents read and hashed",
+    "files_hashed": "Files hashed in part or in full",
+    "cache_hits": "Lookups answered by the hash and metadata cache",
+    "cache_misses": "Lookups the hash and metadata cache could not answer",
+    "moves": "Files moved",
+    "deletes": "Duplicate files deleted",
+    "links": "Duplicate files replaced with hard links or reflinks",
+    "errors": "Files that could not be scanned, read, moved or linked",
+}
+
+# Upper bounds in seconds of the latency histogram buckets; a 4 KiB
+# partial hash from the page cache takes tens of microseconds, a full hash
+# of a large file on a spinning disk takes seconds
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Histograms kept for every run, with their help text
+HISTOGRAMS: Dict[str, str] = {
+    "partial_hash_seconds": "Time to hash the first and last block of one file",
+    "full_hash_seconds": "Time to hash the whole contents of one file",
+}
+
+# Export formats; "auto" picks Prometheus for ``.prom`` files and JSON otherwise
+METRICS_FORMATS = ("auto", "json", "prometheus")
+
+
+@dataclass
+class Histogram:
+    """Distribution of observed values over fixed buckets.
+
+    Attributes:
+        bounds: Inclusive upper bound of each bucket, ascending
+        counts: Observations per bucket, plus one for values above every bound
+        total: Sum of all observed values
+    """
+
+    bounds: Tuple[float, ...] = LATENCY_BUCKETS
+    counts: List[int] = field(default_factory=list)
+    total: float = 0.0
+
+    def __post_init__(self) -> None:
+        self.counts = self.counts or [0] * (len(self.bounds) + 1)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, value: float) -> None:
+        """Add one observation."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket it falls in.
+
+        Returns:
+            The bound, ``inf`` if it lies above every bound, or None if
+            nothing was observed
+        """
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            seen += count
+            if count and seen >= target:
+                return bound
+        return None
+
+
+class Metrics:
+    """Counters and histograms collected over one run.
+
+    Counters are updated from scanning, hashing and moving threads alike,
+    so every update takes a lock; that is cheap next to the system call
+    being counted.
+
+    Args:
+        command: Name of the command being measured, exported as a label
+    """
+
+    def __init__(self, command: str = "") -> None:
+        self.command = command
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self.histograms: Dict[str, Histogram] = {
+            name: Histogram() for name in HISTOGRAMS
+        }
+        self.started = time.time()
+        self.duration = 0.0
+        self.failed = False
+        self._clock = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, amount: int = 1) -> None:
+        """Increase a counter."""
+        with self._lock:
+            self.counters[name] += amount
+
+    def observe(self, name: str, value: float) -> None:
+        """Add an observation to a histogram."""
+        with self._lock:
+            self.histograms[name].observe(value)
+
+    def stop(self) -> None:
+        """Fix the duration of the run."""
+        self.duration = time.perf_counter() - self._clock
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Describe the run as plain data, with derived throughput."""
+        duration = self.duration
+        rates = {
+            "entries_per_s": self.counters["entries_scanned"],
+            "bytes_hashed_per_s": self.counters["bytes_hashed"],
+            "files_hashed_per_s": self.counters["files_hashed"],
+            "moves_per_s": self.counters["moves"],
+        }
+        histograms = {}
+        for name, histogram in self.histograms.items():
+            histograms[name] = {
+                "bounds": list(histogram.bounds),
+                "counts": histogram.counts,
+                "count": histogram.count,
+                "sum": round(histogram.total, 6),
+                "p50": histogram.quantile(0.5),
+                "p99": histogram.quantile(0.99),
+            }
+        return {
+            "command": self.command,
+            "started": self.started,
+            "duration_seconds": round(duration, 6),
+            "success": not self.failed,
+            "counters": dict(self.counters),
+            "throughput": {
+                name: round(value / duration, 1) if duration else None
+                for name, value in rates.items()
+            },
+            "histograms": histograms,
+        }
+
+    def to_prometheus(self) -> str:
+        """Render the run in the Prometheus text exposition format.
+
+        The output suits the node-exporter textfile collector: every metric
+        carries a ``command`` label, counters end in ``_total`` and the
+        latency histograms have cumulative ``le`` buckets.
+        """
+        label = f'command="{self.command}"'
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str) -> str:
+            full = f"{NAMESPACE}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            return full
+
+        for name, help_text in COUNTERS.items():
+            full = metric(f"{name}_total", "counter", help_text)
+            lines.append(f"{full}{{{label}}} {self.counters[name]}")
+
+        for name, help_text in HISTOGRAMS.items():
+            histogram = self.histograms[name]
+            full = metric(name, "histogram", help_text)
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{full}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{full}_bucket{{{label},le="+Inf"}} {histogram.count}')
+            lines.append(f"{full}_sum{{{label}}} {histogram.total:.6f}")
+            lines.append(f"{full}_count{{{label}}} {histogram.count}")
+
+        full = metric("run_duration_seconds", "gauge", "Wall time of the last run")
+        lines.append(f"{full}{{{label}}} {self.duration:.6f}")
+        full = metric(
+            "last_run_timestamp_seconds", "gauge", "Unix time the last run started"
+        )
+        lines.append(f"{full}{{{label}}} {self.started:.3f}")
+        full = metric("last_run_success", "gauge", "1 if the last run succeeded")
+        lines.append(f"{full}{{{label}}} {0 if self.failed else 1}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path, fmt: str = "auto") -> None:
+        """
+        Write the metrics to a file, replacing it atomically.
+
+        The file is written next to its destination and renamed into place,
+        so a collector polling the directory never reads half a file.
+
+        Args:
+            path: File to write
+            fmt: One of :data:`METRICS_FORMATS`
+
+        Raises:
+            OSError: If the file cannot be written
+        """
+        path = Path(path)
+        if fmt == "auto":
+            fmt = "prometheus" if path.suffix == ".prom" else "json"
+        if fmt == "prometheus":
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.to_dict(), indent=2) + "\n"
+
+        directory = path.parent
+        fd, temp = tempfile.mkstemp(
+            prefix=f".{path.name}.", suffix=".tmp", dir=str(directory)
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(temp, path)
+        except OSError:
+            os.unlink(temp)
+            raise
+
+
+_active: Optional[Metrics] = None
+
+
+def start_metrics(command: str = "") -> Metrics:
+    """Start collecting metrics until :func:`stop_metrics`."""
+    global _active
+    _active = Metrics(command)
+    return _active
+
+
+def stop_metrics() -> Optional[Metrics]:
+    """Stop collecting and return the metrics that were active, if any."""
+    global _active
+    metrics, _active = _active, None
+    if metrics is not None:
+        metrics.stop()
+    return metrics
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Increase a counter of the active run; a single check when inactive.
+
+    Args:
+        name: One of :data:`COUNTERS`
+        amount: How much to add
+    """
+    metrics = _active
+    if metrics is not None and amount:
+        metrics.add(name, amount)
+
+
+def observe(name: str, value: float) -> None:
+    """Record a value in a histogram of the active run, if there is one.
+
+    Args:
+        name: One of :data:`HISTOGRAMS`
+        value: Observed value, in seconds for latencies
+    """
+    metrics = _active
+    if metrics is not None:
+        metrics.observe(name, value)
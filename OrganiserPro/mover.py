@@ -0,0 +1,434 @@
+"""Batch move and link engine shared by the sorters and dedupe."""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+from rich.console import Console
+
+from .cancel import CancelToken, OperationCancelled, checkpoint
+from .metrics import count
+from .progress import ProgressCallback, ProgressReporter
+
+console = Console()
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+# From <linux/fs.h> and <fcntl.h>
+_AT_FDCWD = -100
+_RENAME_NOREPLACE = 1
+
+_libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+_renameat2 = getattr(_libc, "renameat2", None)
+if _renameat2 is not None:
+    _renameat2.argtypes = [
+        ctypes.c_int,
+        ctypes.c_char_p,
+        ctypes.c_int,
+        ctypes.c_char_p,
+        ctypes.c_uint,
+    ]
+    _renameat2.restype = ctypes.c_int
+
+
+class MoveOp(NamedTuple):
+    """A single planned move from ``source`` to ``target``."""
+
+    source: str
+    target: str
+
+
+@dataclass
+class MoveResult:
+    """Outcome of :func:`execute_moves`.
+
+    Attributes:
+        moved: Moves that completed, with their final targets
+        failed: Moves that could not be completed, with the error
+        cross_device: Number of moves that had to copy between filesystems
+        cancelled: Moves that were not started because the batch was
+            cancelled; their files are untouched
+        created_dirs: Directories made to hold the targets, parents first
+    """
+
+    moved: List[MoveOp] = field(default_factory=list)
+    failed: List[Tuple[MoveOp, OSError]] = field(default_factory=list)
+    cross_device: int = 0
+    cancelled: List[MoveOp] = field(default_factory=list)
+    created_dirs: List[str] = field(default_factory=list)
+
+
+def unique_name(name: str, taken: Set[str]) -> str:
+    """Return ``name``, or ``stem_N.suffix`` for the first N not in ``taken``."""
+    if name not in taken:
+        return name
+    stem, suffix = os.path.splitext(name)
+    counter = 1
+    while f"{stem}_{counter}{suffix}" in taken:
+        counter += 1
+    return f"{stem}_{counter}{suffix}"
+
+
+class MovePlanner:
+    """Plan move destinations, resolving name collisions in memory.
+
+    The contents of each target directory are listed once, the first time
+    a file is planned into it, and every planned name is added to that set.
+    Collisions are therefore resolved without a ``stat`` per candidate
+    name, and two files planned into the same directory never collide.
+    """
+
+    def __init__(self) -> None:
+        self._taken: Dict[str, Set[str]] = {}
+        self.ops: List[MoveOp] = []
+
+    def _names_in(self, directory: str) -> Set[str]:
+        names = self._taken.get(directory)
+        if names is None:
+            try:
+                names = set(os.listdir(directory))
+            except OSError:
+                # Missing (or unusable) target directories are created, or
+                # reported as failed, when the moves are executed
+                names = set()
+            self._taken[directory] = names
+        return names
+
+    def plan(self, source: str, target_dir: str, name: Optional[str] = None) -> str:
+        """Plan a move of ``source`` into ``target_dir`` and return the target.
+
+        Args:
+            source: Path of the file to move
+            target_dir: Directory to move it into
+            name: File name in the target directory; defaults to the source's
+
+        Returns:
+            str: The collision-free target path
+        """
+        names = self._names_in(target_dir)
+        final_name = unique_name(name or os.path.basename(source), names)
+        names.add(final_name)
+        target = os.path.join(target_dir, final_name)
+        self.ops.append(MoveOp(source, target))
+        return target
+
+
+def make_dirs(directory: str) -> List[str]:
+    """
+    Create a directory and its missing parents, like ``os.makedirs``.
+
+    Args:
+        directory: Directory that must exist afterwards
+
+    Returns:
+        List[str]: The directories this call created, parents first; ones
+        that already existed or were made concurrently are not included
+
+    Raises:
+        OSError: If a directory cannot be created
+    """
+    missing = []
+    path = directory
+    while path and not os.path.isdir(path):
+        missing.append(path)
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    created = []
+    for path in reversed(missing):
+        try:
+            os.mkdir(path)
+        except FileExistsError:
+            if not os.path.isdir(path):
+                raise
+            continue
+        created.append(path)
+    return created
+
+
+def _rename_noreplace(source: str, target: str) -> None:
+    """Rename without ever overwriting an existing target.
+
+    Uses ``renameat2(RENAME_NOREPLACE)`` where the C library and the
+    filesystem support it, and an existence check otherwise.
+
+    Raises:
+        FileExistsError: If the target already exists
+        OSError: For any other failure, including ``EXDEV`` across devices
+    """
+    if _renameat2 is not None:
+        result = _renameat2(
+            _AT_FDCWD,
+            os.fsencode(source),
+            _AT_FDCWD,
+            os.fsencode(target),
+            _RENAME_NOREPLACE,
+        )
+        if result == 0:
+            return
+        err = ctypes.get_errno()
+        if err not in (errno.EINVAL, errno.ENOSYS):
+            raise OSError(err, os.strerror(err), source, None, target)
+    if os.path.lexists(target):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), target)
+    os.rename(source, target)
+
+
+def _retarget(op: MoveOp) -> MoveOp:
+    """Pick a fresh name for a move whose target appeared after planning."""
+    directory, name = os.path.split(op.target)
+    taken = set(os.listdir(directory))
+    return MoveOp(op.source, os.path.join(directory, unique_name(name, taken)))
+
+
+def _move_same_device(op: MoveOp) -> MoveOp:
+    """Rename a file, picking a new name if the target appeared meanwhile."""
+    try:
+        _rename_noreplace(op.source, op.target)
+    except FileExistsError:
+        op = _retarget(op)
+        _rename_noreplace(op.source, op.target)
+    return op
+
+
+def _move_cross_device(
+    op: MoveOp, cancel: Optional[CancelToken] = None, exact: bool = False
+) -> MoveOp:
+    """Copy a file to another filesystem, flush it, then remove the source.
+
+    The copy is written to a fresh temporary file next to the target and
+    only renamed into place once its data has been fsync'd, so an
+    interrupted move never leaves a truncated file at the target.
+    ``cancel`` is checked before the copy starts; a copy that has started
+    is always finished. With ``exact`` a target that appeared meanwhile
+    fails the move instead of getting a new name.
+
+    If the source cannot be removed afterwards, the copy is removed again
+    and the move fails with the source untouched; only if that is
+    impossible too is the move reported as done, with a warning, so the
+    result and the journal always point at where the file really is.
+    """
+    checkpoint(cancel)
+    directory, name = os.path.split(op.target)
+    fd, temp = tempfile.mkstemp(
+        prefix=f".{name}.", suffix=".organiserpro-tmp", dir=directory
+    )
+    os.close(fd)
+    try:
+        shutil.copy2(op.source, temp)
+        fd = os.open(temp, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        if exact:
+            _rename_noreplace(temp, op.target)
+            moved = op
+        else:
+            moved = MoveOp(
+                op.source, _move_same_device(MoveOp(temp, op.target)).target
+            )
+    except BaseException:
+        os.unlink(temp)
+        raise
+    try:
+        os.unlink(op.source)
+    except OSError as e:
+        try:
+            os.unlink(moved.target)
+        except OSError:
+            console.print(
+                f"[yellow]Warning: Moved {op.source} to {moved.target} but could "
+                f"not remove the original: {e}"
+            )
+            return moved
+        raise
+    return moved
+
+
+def move_noreplace(source: str, target: str) -> None:
+    """
+    Move a file to exactly ``target``, never picking another name.
+
+    Unlike the moves of :func:`execute_moves`, a target that exists is an
+    error rather than a collision to resolve; across filesystems the file
+    is copied, flushed and renamed into place like any other move.
+
+    Args:
+        source: File to move
+        target: Path it must end up at
+
+    Raises:
+        FileExistsError: If ``target`` exists
+        OSError: If the move fails for any other reason
+    """
+    try:
+        _rename_noreplace(source, target)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        _move_cross_device(MoveOp(source, target), exact=True)
+
+
+def _move_group(
+    ops: Sequence[MoveOp],
+    reporter: Optional[ProgressReporter] = None,
+    cancel: Optional[CancelToken] = None,
+) -> MoveResult:
+    """Rename a batch of files, deferring cross-device moves to the caller."""
+    result = MoveResult()
+    for position, op in enumerate(ops):
+        try:
+            checkpoint(cancel)
+        except OperationCancelled:
+            result.cancelled.extend(ops[position:])
+            break
+        try:
+            result.moved.append(_move_same_device(op))
+        except OSError as e:
+            # EXDEV failures are retried as copies by execute_moves
+            result.failed.append((op, e))
+            continue
+        if reporter is not None:
+            reporter.advance()
+    return result
+
+
+def execute_moves(
+    ops: Sequence[MoveOp],
+    workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> MoveResult:
+    """
+    Run a batch of planned moves.
+
+    Target directories are created once up front. Each move is first tried
+    as a plain ``rename(2)``, which never overwrites an existing file. Moves
+    that fail with ``EXDEV`` cross a filesystem boundary and are carried out
+    as copy + fsync + unlink on a thread pool.
+
+    Moves into different target directories cannot collide with each other,
+    so when ``workers`` is more than one, each target directory's moves run
+    as an independent task on the pool. Moves into the same directory are
+    always made in plan order, and results are reported in plan order per
+    directory, so the outcome does not depend on scheduling.
+
+    A cancelled batch stops between two moves: every file is either at
+    its source or at its target, and the moves that were not started are
+    listed in :attr:`MoveResult.cancelled` rather than raised.
+
+    Args:
+        ops: Planned moves, e.g. from :class:`MovePlanner`
+        workers: Number of threads for moves into different directories and
+            for cross-device copies; renames run on the calling thread if
+            this is None or 1
+        progress: Optional callback receiving ``move`` progress events
+        cancel: Optional token to pause or stop the batch with, checked
+            before each move
+
+    Returns:
+        MoveResult: Completed and failed moves
+    """
+    result = MoveResult()
+
+    groups: Dict[str, List[MoveOp]] = {}
+    for op in ops:
+        groups.setdefault(os.path.dirname(op.target), []).append(op)
+
+    runnable: List[List[MoveOp]] = []
+    for directory in sorted(groups):
+        try:
+            result.created_dirs.extend(make_dirs(directory))
+            runnable.append(groups[directory])
+        except OSError as e:
+            result.failed.extend((op, e) for op in groups[directory])
+
+    reporter = ProgressReporter(progress, "move", "Moving files...", len(ops))
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="organiserpro-move"
+    ) as pool, reporter:
+        # Moves into folders that could not be created are already done with
+        reporter.advance(len(result.failed))
+        move_group = partial(_move_group, reporter=reporter, cancel=cancel)
+        if workers is not None and workers > 1 and len(runnable) > 1:
+            outcomes = list(pool.map(move_group, runnable))
+        else:
+            outcomes = [move_group([op for group in runnable for op in group])]
+
+        cross_device: List[MoveOp] = []
+        for outcome in outcomes:
+            result.moved.extend(outcome.moved)
+            result.cancelled.extend(outcome.cancelled)
+            for op, error in outcome.failed:
+                if error.errno == errno.EXDEV:
+                    cross_device.append(op)
+                else:
+                    result.failed.append((op, error))
+                    reporter.advance()
+
+        if cross_device:
+            result.cross_device = len(cross_device)
+            futures = [
+                (op, pool.submit(_move_cross_device, op, cancel)) for op in cross_device
+            ]
+            for op, future in futures:
+                try:
+                    result.moved.append(future.result())
+                except OperationCancelled:
+                    result.cancelled.append(op)
+                    continue
+                except OSError as e:
+                    result.failed.append((op, e))
+                reporter.advance()
+
+    count("moves", len(result.moved))
+    count("errors", len(result.failed))
+    return result
+
+
+def replace_with_hardlink(original: PathLike, duplicate: PathLike) -> int:
+    """
+    Replace a duplicate file with a hard link to the original.
+
+    The link is created under a fresh temporary name next to the duplicate
+    and then renamed over it, so the duplicate's path never disappears and
+    a link left behind by a crashed run never gets in the way.
+
+    Args:
+        original: File to keep
+        duplicate: File with identical contents to replace
+
+    Returns:
+        int: Number of bytes reclaimed; 0 if the duplicate's inode is still
+        referenced by other links
+
+    Raises:
+        OSError: If the files are on different filesystems or linking fails
+    """
+    original_stat = os.stat(original)
+    duplicate_stat = os.stat(duplicate)
+    if original_stat.st_dev != duplicate_stat.st_dev:
+        raise OSError(errno.EXDEV, "Not on the same filesystem", str(duplicate))
+    if original_stat.st_ino == duplicate_stat.st_ino:
+        return 0
+
+    directory, name = os.path.split(os.fspath(duplicate))
+    temp_link = os.path.join(
+        directory, f".{name}.{os.urandom(6).hex()}.organiserpro-link"
+    )
+    os.link(original, temp_link)
+    try:
+        os.replace(temp_link, duplicate)
+    except OSError:
+        os.unlink(temp_link)
+        raise
+    return duplicate_stat.st_size if duplicate_stat.st_nlink == 1 else 0
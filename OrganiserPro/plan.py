@@ -0,0 +1,359 @@
+"""Serialisable operation plans shared by preview, dry-run and execution."""
+
+import json
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from hashlib import sha256
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from rich.console import Console
+from rich.table import Table
+
+from .cancel import CancelToken, OperationCancelled, checkpoint
+from .metrics import count
+from .mover import MoveOp, execute_moves, replace_with_hardlink
+from .profiling import span
+from .progress import ProgressCallback, ProgressReporter
+from .reflink import dedupe_file_range
+
+if TYPE_CHECKING:
+    from .journal import Journal
+
+console = Console()
+
+PLAN_VERSION = 1
+
+# Kinds of planned action
+MOVE = "move"
+DELETE = "delete"
+LINK = "link"
+REFLINK = "reflink"
+ACTIONS = (MOVE, DELETE, LINK, REFLINK)
+
+
+class PlannedAction(NamedTuple):
+    """A single file operation in a plan.
+
+    For ``move`` the target is the destination path. For ``delete``,
+    ``link`` and ``reflink`` the source is the duplicate being acted on and
+    the target is the original that is kept.
+    """
+
+    action: str
+    source: str
+    target: str
+
+
+class StalePlanError(Exception):
+    """Raised when the files a plan was made from have changed since."""
+
+
+def fingerprint(stats: Iterable[Tuple[str, int, int, int]]) -> str:
+    """Digest ``(path, size, mtime_ns, inode)`` records into a fingerprint.
+
+    Args:
+        stats: One record per file the plan depends on
+
+    Returns:
+        str: Hex digest that changes whenever any of the files changes
+    """
+    hasher = sha256()
+    for path, size, mtime_ns, inode in sorted(stats):
+        record = f"{path}\0{size}\0{mtime_ns}\0{inode}\n"
+        hasher.update(record.encode("utf-8", "surrogateescape"))
+    return hasher.hexdigest()
+
+
+def _stat_records(paths: Iterable[str]) -> List[Tuple[str, int, int, int]]:
+    """Stat every path, recording missing files with zeroed fields."""
+    records = []
+    for path in set(paths):
+        try:
+            st = os.stat(path)
+            records.append((path, st.st_size, st.st_mtime_ns, st.st_ino))
+        except OSError:
+            records.append((path, -1, 0, 0))
+    count("stat_calls", len(records))
+    return records
+
+
+@dataclass
+class OperationPlan:
+    """A computed set of file operations that can be reviewed and executed.
+
+    A plan is produced by scanning once (e.g. :func:`~OrganiserPro.sorter.
+    plan_sort_by_type` or :func:`~OrganiserPro.dedupe.plan_duplicates`). Its
+    fingerprint covers every file the plan reads, so :func:`execute_plan`
+    can run it later without rescanning or rehashing, as long as none of
+    those files changed in the meantime. Files added to the tree after
+    planning do not invalidate a plan; they are simply not part of it.
+
+    Attributes:
+        operation: Name of the operation, e.g. ``"sort_by_type"``
+        root: Directory the plan was computed for
+        actions: Planned file operations, in execution order
+        fingerprint: Fingerprint of the files the plan depends on
+        created: Time the plan was made, in seconds since the epoch
+        options: Options the plan was made with, e.g. ``{"recursive": True}``
+    """
+
+    operation: str
+    root: str
+    actions: List[PlannedAction] = field(default_factory=list)
+    fingerprint: str = ""
+    created: float = field(default_factory=time.time)
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    def depends_on(self) -> List[str]:
+        """Return every path whose state the plan relies on."""
+        paths = [action.source for action in self.actions]
+        paths.extend(a.target for a in self.actions if a.action != MOVE)
+        return paths
+
+    def seal(
+        self, records: Optional[Iterable[Tuple[str, int, int, int]]] = None
+    ) -> "OperationPlan":
+        """Fingerprint the files the plan depends on.
+
+        Args:
+            records: ``(path, size, mtime_ns, inode)`` for each file as it was
+                scanned, so changes made while planning are caught too. The
+                files are stat'ed afresh if omitted.
+
+        Returns:
+            OperationPlan: The plan itself
+        """
+        paths = set(self.depends_on())
+        if records is None:
+            records = _stat_records(paths)
+        self.fingerprint = fingerprint(r for r in records if r[0] in paths)
+        return self
+
+    def is_current(self) -> bool:
+        """Return True if no file the plan depends on has changed."""
+        return fingerprint(_stat_records(self.depends_on())) == self.fingerprint
+
+    def to_dict(self) -> dict:
+        """Return the plan as JSON-serialisable data."""
+        return {
+            "version": PLAN_VERSION,
+            "operation": self.operation,
+            "root": self.root,
+            "created": self.created,
+            "fingerprint": self.fingerprint,
+            "options": self.options,
+            "actions": [action._asdict() for action in self.actions],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "OperationPlan":
+        """Rebuild a plan from :meth:`to_dict` output.
+
+        Raises:
+            ValueError: If the data is not a supported plan
+        """
+        if data.get("version") != PLAN_VERSION:
+            raise ValueError(f"Unsupported plan version: {data.get('version')!r}")
+        actions = [PlannedAction(**action) for action in data["actions"]]
+        for action in actions:
+            if action.action not in ACTIONS:
+                raise ValueError(f"Unknown plan action: {action.action!r}")
+        return cls(
+            operation=data["operation"],
+            root=data["root"],
+            actions=actions,
+            fingerprint=data["fingerprint"],
+            created=data["created"],
+            options=data.get("options", {}),
+        )
+
+    def save(self, path: str) -> None:
+        """Write the plan to a JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    @classmethod
+    def load(cls, path: str) -> "OperationPlan":
+        """Read a plan written by :meth:`save`."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+@dataclass
+class PlanResult:
+    """Outcome of :func:`execute_plan`.
+
+    Attributes:
+        done: Actions that completed; moves carry their final target
+        failed: Actions that could not be completed, with the error
+        bytes_reclaimed: Space freed by delete, link and reflink actions
+        cancelled: Actions that were not started because the run was
+            cancelled
+    """
+
+    done: List[PlannedAction] = field(default_factory=list)
+    failed: List[Tuple[PlannedAction, OSError]] = field(default_factory=list)
+    bytes_reclaimed: int = 0
+    cancelled: List[PlannedAction] = field(default_factory=list)
+
+
+def apply_action(action: PlannedAction) -> Tuple[PlannedAction, int]:
+    """
+    Carry out a single planned action.
+
+    Args:
+        action: The action to perform
+
+    Returns:
+        Tuple of the action as performed (a move may land on a different
+        name if its target appeared meanwhile) and the bytes reclaimed
+
+    Raises:
+        OSError: If the action fails
+    """
+    if action.action == MOVE:
+        result = execute_moves([MoveOp(action.source, action.target)])
+        if result.failed:
+            raise result.failed[0][1]
+        return action._replace(target=result.moved[0].target), 0
+    if action.action == DELETE:
+        size = os.stat(action.source).st_size
+        os.unlink(action.source)
+        count("deletes")
+        return action, size
+    if action.action == LINK:
+        reclaimed = replace_with_hardlink(action.target, action.source)
+        count("links")
+        return action, reclaimed
+    if action.action == REFLINK:
+        reclaimed = dedupe_file_range(Path(action.target), Path(action.source))
+        count("links")
+        return action, reclaimed
+    raise ValueError(f"Unknown plan action: {action.action!r}")
+
+
+def execute_plan(
+    plan: OperationPlan,
+    check: bool = True,
+    workers: Optional[int] = None,
+    journal: Optional["Journal"] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> PlanResult:
+    """
+    Execute a plan without rescanning the tree.
+
+    Moves are run as one batch through :func:`~OrganiserPro.mover.
+    execute_moves`; other actions run one at a time in plan order.
+    Cancelling stops the run between two actions; the actions not yet
+    started are returned in :attr:`PlanResult.cancelled`.
+
+    Args:
+        plan: Plan to execute
+        check: If True, refuse to run a plan whose files have changed
+        workers: Number of threads for moves into different folders and for
+            cross-device moves
+        journal: Optional :class:`~OrganiserPro.journal.Journal` that every
+            action is durably recorded in before any file is touched
+        progress: Optional callback receiving progress events for the
+            ``move`` phase and the ``act`` phase of other actions
+        cancel: Optional :class:`~OrganiserPro.cancel.CancelToken` to pause
+            or stop the run with
+
+    Returns:
+        PlanResult: Completed, failed and cancelled actions
+
+    Raises:
+        StalePlanError: If ``check`` is set and the plan is out of date
+    """
+    with span("check"):
+        current = not check or plan.is_current()
+    if not current:
+        raise StalePlanError(
+            f"Files in {plan.root} changed since the plan was made; "
+            "preview the operation again"
+        )
+
+    with span("act"):
+        result = PlanResult()
+        seqs = {}
+        if journal is not None:
+            sources = [action.source for action in plan.actions]
+            seqs = dict(zip(sources, journal.log(plan.actions)))
+
+        moves = [a for a in plan.actions if a.action == MOVE]
+        if moves:
+            ops = [MoveOp(a.source, a.target) for a in moves]
+            moved = execute_moves(ops, workers, progress, cancel)
+            for op in moved.moved:
+                result.done.append(PlannedAction(MOVE, *op))
+                if journal is not None:
+                    journal.done(seqs[op.source], op.target)
+            result.failed.extend(
+                (PlannedAction(MOVE, *op), error) for op, error in moved.failed
+            )
+            result.cancelled.extend(PlannedAction(MOVE, *op) for op in moved.cancelled)
+            if journal is not None:
+                for directory in moved.created_dirs:
+                    journal.created_dir(directory)
+
+        others = [a for a in plan.actions if a.action != MOVE]
+        reporter = ProgressReporter(
+            progress if others else None, "act", "Applying actions...", len(others)
+        )
+        for position, action in enumerate(others):
+            try:
+                checkpoint(cancel)
+            except OperationCancelled:
+                result.cancelled.extend(others[position:])
+                break
+            reporter.advance()
+            try:
+                done, reclaimed = apply_action(action)
+            except OSError as e:
+                result.failed.append((action, e))
+                count("errors")
+                continue
+            if journal is not None:
+                journal.done(seqs[action.source])
+            result.done.append(done)
+            result.bytes_reclaimed += reclaimed
+        reporter.finish()
+        if journal is not None:
+            for action in result.cancelled:
+                journal.cancelled(seqs[action.source])
+    return result
+
+
+def print_plan(plan: OperationPlan) -> None:
+    """Print a summary of what a plan would do, grouped by destination."""
+    if not plan.actions:
+        console.print("[yellow]Nothing to do![/]")
+        return
+
+    table = Table(title=f"Plan: {plan.operation} in {plan.root}")
+    table.add_column("Action", style="cyan")
+    table.add_column("Destination", style="magenta")
+    table.add_column("Files", justify="right")
+    counts = Counter(
+        (a.action, os.path.dirname(a.target) if a.action == MOVE else "-")
+        for a in plan.actions
+    )
+    root = plan.root.rstrip(os.sep) + os.sep
+    for (action, destination), total in sorted(counts.items()):
+        if destination.startswith(root):
+            destination = destination[len(root):] + os.sep
+        table.add_row(action, destination, str(total))
+    console.print(table)
@@ -0,0 +1,208 @@
+"""Timing spans that break a run down into phases, for --profile."""
+
+import cProfile
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+_MB = 1024 * 1024
+
+
+def default_profile_dir() -> Path:
+    """Return the directory the GUI writes profiles to.
+
+    Honours ``$XDG_STATE_HOME`` and falls back to ``~/.local/state``.
+    """
+    base = os.environ.get("XDG_STATE_HOME") or os.path.join("~", ".local", "state")
+    return Path(base).expanduser() / "organiserpro" / "profiles"
+
+
+@dataclass
+class PhaseStats:
+    """Time spent in one phase, summed over every span of that name.
+
+    Attributes:
+        calls: Number of spans recorded
+        wall: Elapsed seconds
+        cpu: CPU seconds of the whole process, worker threads included, so
+            ``cpu / wall`` above 1 means the phase kept several cores busy
+            and well below 1 means it was waiting on the disk
+        bytes_read: Bytes of file contents read, where the phase reports it
+    """
+
+    calls: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+    bytes_read: int = 0
+
+
+class Span:
+    """An open timing span; set :attr:`bytes_read` to report I/O."""
+
+    __slots__ = ("name", "bytes_read")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.bytes_read = 0
+
+
+class Profiler:
+    """Collects timing spans, and optionally a cProfile, for one run.
+
+    cProfile only sees the thread that started it; work done on the
+    hashing threads shows up there as time spent waiting for results, and
+    in the span breakdown as CPU time.
+
+    Args:
+        cprofile: If True, also run :mod:`cProfile` while profiling
+    """
+
+    def __init__(self, cprofile: bool = False) -> None:
+        self.phases: Dict[str, PhaseStats] = {}
+        self.wall = 0.0
+        self.cpu = 0.0
+        self._lock = threading.Lock()
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._started = (0.0, 0.0)
+
+    def start(self) -> None:
+        """Start the clock, and cProfile if enabled."""
+        self._started = (time.perf_counter(), time.process_time())
+        if self._cprofile is not None:
+            try:
+                self._cprofile.enable()
+            except ValueError as e:  # Another profiler is already active
+                console.print(f"[yellow]Warning: cProfile unavailable: {e}")
+                self._cprofile = None
+
+    def stop(self) -> None:
+        """Stop the clock and cProfile."""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self.wall = time.perf_counter() - self._started[0]
+        self.cpu = time.process_time() - self._started[1]
+
+    def record(self, name: str, wall: float, cpu: float, bytes_read: int) -> None:
+        """Add a finished span to its phase."""
+        with self._lock:
+            phase = self.phases.setdefault(name, PhaseStats())
+            phase.calls += 1
+            phase.wall += wall
+            phase.cpu += cpu
+            phase.bytes_read += bytes_read
+
+    def dump_stats(self, path: Path) -> bool:
+        """Write the cProfile data for ``pstats``; False if there is none."""
+        if self._cprofile is None:
+            return False
+        self._cprofile.dump_stats(str(path))
+        return True
+
+    def summary(self) -> List[str]:
+        """Describe every phase on one line each, for plain-text logs."""
+        lines = []
+        for name, phase in self.phases.items():
+            line = f"{name}: {phase.wall:.2f}s wall, {phase.cpu:.2f}s CPU"
+            if phase.bytes_read:
+                line += f", {phase.bytes_read / _MB:,.1f} MiB read"
+            lines.append(line)
+        lines.append(f"total: {self.wall:.2f}s wall, {self.cpu:.2f}s CPU")
+        return lines
+
+    def print_report(self) -> None:
+        """Print a table of where the run's time went."""
+        table = Table(title="Profile")
+        table.add_column("Phase", style="cyan")
+        table.add_column("Calls", justify="right")
+        table.add_column("Wall s", justify="right")
+        table.add_column("CPU s", justify="right")
+        table.add_column("CPU/wall", justify="right")
+        table.add_column("MiB read", justify="right")
+        table.add_column("MiB/s", justify="right")
+
+        def row(name: str, calls: str, wall: float, cpu: float, read: int) -> None:
+            table.add_row(
+                name,
+                calls,
+                f"{wall:.3f}",
+                f"{cpu:.3f}",
+                f"{cpu / wall:.2f}" if wall else "-",
+                f"{read / _MB:,.1f}" if read else "-",
+                f"{read / _MB / wall:,.1f}" if read and wall else "-",
+            )
+
+        for name, phase in self.phases.items():
+            row(name, str(phase.calls), phase.wall, phase.cpu, phase.bytes_read)
+        # Phases may overlap or leave gaps, so the total is measured directly
+        row("[bold]total[/]", "", self.wall, self.cpu, 0)
+        console.print(table)
+
+
+_active: Optional[Profiler] = None
+
+
+def start_profiling(cprofile: bool = False) -> Profiler:
+    """Start recording spans (and a cProfile) until :func:`stop_profiling`."""
+    global _active
+    profiler = Profiler(cprofile)
+    profiler.start()
+    _active = profiler
+    return profiler
+
+
+def stop_profiling() -> Optional[Profiler]:
+    """Stop recording and return the profiler that was active, if any."""
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+@contextmanager
+def span(name: str) -> Iterator[Span]:
+    """
+    Time a phase of work while profiling is active.
+
+    When profiling is off this costs a single check, so spans can stay in
+    the hot paths of every run.
+
+    Args:
+        name: Phase the time is added to, e.g. ``"scan"`` or ``"hash"``
+
+    Yields:
+        Span: Set its ``bytes_read`` to record how much the phase read
+    """
+    current = Span(name)
+    profiler = _active
+    if profiler is None:
+        yield current
+        return
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield current
+    finally:
+        profiler.record(
+            name,
+            time.perf_counter() - wall,
+            time.process_time() - cpu,
+            current.bytes_read,
+        )
+
+
+def new_profile_path(operation: str) -> Path:
+    """Return a fresh timestamped path for a profile in the default directory."""
+    directory = default_profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    return directory / f"{stamp}-{operation}.pstats"
@@ -0,0 +1,196 @@
+"""Progress events reported by scans, hashing and moves, and a rich renderer."""
+
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional
+
+from rich.console import Console
+from rich.progress import (
+    BarColumn,
+    Progress,
+    TaskID,
+    TextColumn,
+    TimeElapsedColumn,
+    TimeRemainingColumn,
+)
+
+from .sizes import format_size
+
+# Seconds between two events of the same phase; the last event of a phase
+# is always delivered
+DEFAULT_INTERVAL = 0.1
+
+
+class ProgressEvent(NamedTuple):
+    """How far one phase of an operation has got.
+
+    Attributes:
+        phase: Short name of the phase, e.g. ``"scan"``, ``"partial"``,
+            ``"full"`` or ``"move"``
+        description: What the phase is doing, for display
+        done: Items (usually files) finished so far
+        total: Items in the phase, or None while that is not known yet
+        bytes_done: Bytes processed so far
+        bytes_total: Bytes the phase will process, or None if unknown
+        finished: True for the last event of the phase
+    """
+
+    phase: str
+    description: str
+    done: int
+    total: Optional[int]
+    bytes_done: int = 0
+    bytes_total: Optional[int] = None
+    finished: bool = False
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """Share of the phase that is done, by bytes where known, else by items."""
+        if self.bytes_total:
+            return min(self.bytes_done / self.bytes_total, 1.0)
+        if self.total:
+            return min(self.done / self.total, 1.0)
+        return 1.0 if self.finished else None
+
+
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+class ProgressReporter:
+    """Turn per-item updates of one phase into rate-limited progress events.
+
+    ``advance`` may be called from several worker threads at once. Events
+    are sent at most every ``interval`` seconds, so a callback that redraws
+    a widget is not called once per file; without a callback every call is
+    a single check.
+
+    Args:
+        callback: Receives the events; None disables reporting
+        phase: Name of the phase, see :class:`ProgressEvent`
+        description: What the phase is doing
+        total: Number of items, if known
+        bytes_total: Number of bytes, if known
+        interval: Least number of seconds between two events
+    """
+
+    def __init__(
+        self,
+        callback: Optional[ProgressCallback],
+        phase: str,
+        description: str,
+        total: Optional[int] = None,
+        bytes_total: Optional[int] = None,
+        interval: float = DEFAULT_INTERVAL,
+    ) -> None:
+        self.callback = callback
+        self.phase = phase
+        self.description = description
+        self.total = total
+        self.bytes_total = bytes_total
+        self.interval = interval
+        self.done = 0
+        self.bytes_done = 0
+        self._lock = threading.Lock()
+        self._next = 0.0
+        if callback is not None:
+            self._emit(False)
+
+    def __enter__(self) -> "ProgressReporter":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.finish()
+
+    def advance(self, items: int = 1, nbytes: int = 0) -> None:
+        """Count finished items and bytes, sending an event if one is due."""
+        if self.callback is None:
+            return
+        with self._lock:
+            self.done += items
+            self.bytes_done += nbytes
+            now = time.monotonic()
+            if now < self._next:
+                return
+            self._next = now + self.interval
+            event = self._event(False)
+        self.callback(event)
+
+    def finish(self) -> None:
+        """Send the final event of the phase."""
+        if self.callback is not None:
+            self._emit(True)
+            self.callback = None
+
+    def _event(self, finished: bool) -> ProgressEvent:
+        return ProgressEvent(
+            self.phase,
+            self.description,
+            self.done,
+            self.total,
+            self.bytes_done,
+            self.bytes_total,
+            finished,
+        )
+
+    def _emit(self, finished: bool) -> None:
+        with self._lock:
+            event = self._event(finished)
+        if self.callback is not None:
+            self.callback(event)
+
+
+class RichProgress:
+    """Render progress events as rich progress bars, one per phase.
+
+    Bars advance by bytes where the phase knows how many it will read, so
+    the time remaining is not thrown off by a few large files.
+
+    Use it as a context manager around the operation and pass it as the
+    progress callback::
+
+        with RichProgress() as progress:
+            find_duplicate_ids(directory, progress=progress)
+
+    Args:
+        console: Console to draw on; a new one by default
+    """
+
+    def __init__(self, console: Optional[Console] = None) -> None:
+        self._progress = Progress(
+            TextColumn("{task.description}"),
+            BarColumn(),
+            TextColumn("{task.fields[counts]}"),
+            TimeElapsedColumn(),
+            TimeRemainingColumn(),
+            console=console,
+        )
+        self._tasks: Dict[str, TaskID] = {}
+
+    def __enter__(self) -> "RichProgress":
+        self._progress.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._progress.stop()
+
+    def __call__(self, event: ProgressEvent) -> None:
+        task = self._tasks.get(event.phase)
+        if task is None:
+            task = self._tasks[event.phase] = self._progress.add_task(
+                event.description, total=None, counts=""
+            )
+        counts = f"{event.done:,}"
+        if event.total is not None:
+            counts += f"/{event.total:,}"
+        counts += " files"
+        if event.bytes_total is not None:
+            counts += (
+                f", {format_size(event.bytes_done)}/{format_size(event.bytes_total)}"
+            )
+            completed, total = event.bytes_done, event.bytes_total
+        else:
+            completed, total = event.done, event.total
+        if event.finished and total is None:
+            # Let a bar of unknown length end full rather than pulsing
+            total = completed
+        self._progress.update(task, completed=completed, total=total, counts=counts)
@@ -0,0 +1,183 @@
+"""In-memory result sets behind the GUI's results pane."""
+
+import os
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from .dedupe import DuplicateScan
+from .index import FileIndex
+from .plan import DELETE, OperationPlan
+
+# Columns a result view can be sorted by
+SORT_KEYS = ("group", "path", "size")
+
+# Action shown for the file that is kept in each duplicate group
+KEEP = "keep"
+
+
+class ResultSet:
+    """Every file of a preview, in compact columns.
+
+    Rows are stored as parallel arrays rather than one object per file, so
+    previews of millions of files stay small; the GUI only turns the rows
+    it is showing into strings. Each row belongs to a group: the folder a
+    sort moves it to, or the duplicate group it was found in.
+
+    Attributes:
+        root: Directory the preview was made for
+        group_title: Heading of the group column, e.g. ``"Folder"``
+        group_names: Name of each group, indexed by group number
+        paths: Path of each row
+        sizes: Size of each row in bytes, or -1 if unknown
+        groups: Group number of each row
+        actions: Index into :attr:`action_names` of each row
+        action_names: Distinct actions, e.g. ``["keep", "delete"]``
+    """
+
+    def __init__(self, root: str = "", group_title: str = "Group") -> None:
+        self.root = root
+        self.group_title = group_title
+        self.group_names: List[str] = []
+        self.paths: List[str] = []
+        self.sizes = array("q")
+        self.groups = array("l")
+        self.actions = array("b")
+        self.action_names: List[str] = []
+        self._action_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def add_group(self, name: str) -> int:
+        """Add a group and return its number."""
+        self.group_names.append(name)
+        return len(self.group_names) - 1
+
+    def add(self, group: int, path: str, size: int, action: str) -> None:
+        """Append a row."""
+        action_id = self._action_ids.get(action)
+        if action_id is None:
+            action_id = self._action_ids[action] = len(self.action_names)
+            self.action_names.append(action)
+        self.paths.append(path)
+        self.sizes.append(size)
+        self.groups.append(group)
+        self.actions.append(action_id)
+
+    def row(self, i: int) -> Tuple[str, str, int, str]:
+        """Return ``(group name, path, size, action)`` of a row."""
+        return (
+            self.group_names[self.groups[i]],
+            self.paths[i],
+            self.sizes[i],
+            self.action_names[self.actions[i]],
+        )
+
+    @classmethod
+    def from_duplicates(cls, scan: DuplicateScan, plan: OperationPlan) -> "ResultSet":
+        """
+        Build the rows of a duplicate preview.
+
+        Args:
+            scan: Result of :func:`~OrganiserPro.dedupe.find_duplicate_ids`
+            plan: Plan made from ``scan`` by
+                :func:`~OrganiserPro.dedupe.plan_duplicates`, which keeps
+                the first file of every group
+
+        Returns:
+            ResultSet: One group per set of duplicates, numbered from 1
+        """
+        results = cls(plan.root, "Group")
+        action = plan.actions[0].action if plan.actions else DELETE
+        index = scan.index
+        for number, file_ids in enumerate(scan.groups.values(), 1):
+            group = results.add_group(str(number))
+            for position, file_id in enumerate(file_ids):
+                results.add(
+                    group,
+                    index.path(file_id),
+                    index.size[file_id],
+                    action if position else KEEP,
+                )
+        return results
+
+    @classmethod
+    def from_plan(
+        cls, plan: OperationPlan, index: Optional[FileIndex] = None
+    ) -> "ResultSet":
+        """
+        Build the rows of a sort preview, grouped by destination folder.
+
+        Args:
+            plan: Sort plan to show
+            index: Files scanned for the plan, to show their sizes
+
+        Returns:
+            ResultSet: One group per destination folder
+        """
+        results = cls(plan.root, "Folder")
+        sizes: Dict[str, int] = {}
+        if index is not None:
+            sizes = {index.path(i): index.size[i] for i in range(len(index))}
+        folders: Dict[str, int] = {}
+        for action in plan.actions:
+            folder = os.path.dirname(action.target)
+            group = folders.get(folder)
+            if group is None:
+                name = os.path.relpath(folder, plan.root) + os.sep
+                group = folders[folder] = results.add_group(name)
+            size = sizes.get(action.source, -1)
+            results.add(group, action.source, size, action.action)
+        return results
+
+    def view(
+        self,
+        sort_by: str = "group",
+        descending: bool = False,
+        group_filter: str = "",
+        min_size: int = 0,
+        max_size: Optional[int] = None,
+    ) -> array:
+        """
+        Select and order rows without copying them.
+
+        Args:
+            sort_by: One of :data:`SORT_KEYS`; groups are ordered by when
+                they were first seen, and ties keep their original order
+            descending: If True, sort in descending order
+            group_filter: Only keep rows of groups with this exact name, or
+                whose name contains it if no group has that name (case is
+                ignored)
+            min_size: Only keep rows at least this large
+            max_size: Only keep rows at most this large
+
+        Returns:
+            array: Row numbers in display order
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"sort_by must be one of {', '.join(SORT_KEYS)}")
+        rows = range(len(self))
+
+        wanted_groups = self._matching_groups(group_filter)
+        if wanted_groups is not None:
+            groups = self.groups
+            rows = [i for i in rows if groups[i] in wanted_groups]
+        if min_size > 0 or max_size is not None:
+            sizes = self.sizes
+            upper = max_size if max_size is not None else float("inf")
+            rows = [i for i in rows if min_size <= sizes[i] <= upper]
+
+        columns = {"group": self.groups, "path": self.paths, "size": self.sizes}
+        rows = sorted(rows, key=columns[sort_by].__getitem__, reverse=descending)
+        return array("l", rows)
+
+    def _matching_groups(self, text: str) -> Optional[set]:
+        """Return the numbers of groups a filter selects, or None for all."""
+        text = text.strip().lower()
+        if not text:
+            return None
+        names = [name.lower() for name in self.group_names]
+        exact = {i for i, name in enumerate(names) if name.rstrip(os.sep) == text}
+        if exact:
+            return exact
+        return {i for i, name in enumerate(names) if text in name}
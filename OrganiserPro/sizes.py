@@ -0,0 +1,190 @@
+"""Size buckets for sorting by file size, and size histograms for previews."""
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable, List, Sequence, Tuple
+
+from rich.console import Console
+from rich.table import Table
+
+if TYPE_CHECKING:
+    from .scanner import FileEntry
+
+console = Console()
+
+_UNITS = "KMGTPE"
+_SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGTPE]?)(?:i?B)?\s*$", re.I)
+
+# Upper bounds of the default named buckets; "huge" has none
+DEFAULT_BOUNDARIES = (64 * 1024, 1024**2, 128 * 1024**2, 1024**3)
+DEFAULT_NAMES = ("tiny", "small", "medium", "large", "huge")
+
+# Range of the power-of-two buckets made by SizeBuckets.log2
+LOG2_SMALLEST = 1024
+LOG2_LARGEST = 1024**4
+
+
+def parse_size(text: str) -> int:
+    """Parse a size such as ``512``, ``100K``, ``1.5M`` or ``2GiB`` into bytes.
+
+    Units are binary, so ``1K`` is 1024 bytes.
+
+    Raises:
+        ValueError: If the text is not a size
+    """
+    match = _SIZE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Invalid size: {text!r}")
+    number, unit = match.groups()
+    power = _UNITS.index(unit.upper()) + 1 if unit else 0
+    return int(float(number) * 1024**power)
+
+
+def format_size(size: int) -> str:
+    """Format a byte count compactly with binary units, e.g. ``1.5M``."""
+    value = float(size)
+    unit = ""
+    for next_unit in _UNITS:
+        if value < 1024:
+            break
+        value /= 1024
+        unit = next_unit
+    return f"{value:.0f}{unit}" if value == int(value) else f"{value:.1f}{unit}"
+
+
+@dataclass(frozen=True)
+class SizeBuckets:
+    """Ranges of file sizes, each sorted into its own folder.
+
+    A file of ``size`` bytes belongs to the first bucket whose upper bound
+    is greater than ``size``; the last bucket has no upper bound. Looking a
+    file up is a binary search over the bounds, so the cost per file does
+    not grow with the number of buckets.
+
+    Attributes:
+        boundaries: Upper bounds of every bucket but the last, ascending
+        names: Folder name of each bucket, one more than ``boundaries``
+
+    Raises:
+        ValueError: If the bounds are not strictly ascending positive sizes
+            or the number of names does not match
+    """
+
+    boundaries: Tuple[int, ...] = DEFAULT_BOUNDARIES
+    names: Tuple[str, ...] = DEFAULT_NAMES
+
+    def __post_init__(self) -> None:
+        if len(self.names) != len(self.boundaries) + 1:
+            raise ValueError("Size buckets need one more name than boundaries")
+        if any(b <= 0 for b in self.boundaries) or any(
+            a >= b for a, b in zip(self.boundaries, self.boundaries[1:])
+        ):
+            raise ValueError("Size boundaries must be positive and ascending")
+
+    @classmethod
+    def from_boundaries(cls, boundaries: Sequence[int]) -> "SizeBuckets":
+        """Make buckets named after their ranges, e.g. ``1M-10M``."""
+        bounds = tuple(boundaries)
+        if not bounds:
+            return cls((), ("all",))
+        labels = [format_size(b) for b in bounds]
+        names = [f"under-{labels[0]}"]
+        names += [f"{low}-{high}" for low, high in zip(labels, labels[1:])]
+        names.append(f"{labels[-1]}-and-over")
+        return cls(bounds, tuple(names))
+
+    @classmethod
+    def log2(
+        cls, smallest: int = LOG2_SMALLEST, largest: int = LOG2_LARGEST
+    ) -> "SizeBuckets":
+        """Make one bucket per power of two between ``smallest`` and ``largest``.
+
+        Each folder holds files up to twice the size of the one before, which
+        shows at a glance which orders of magnitude fill a disk.
+        """
+        bounds = []
+        bound = smallest
+        while bound <= largest:
+            bounds.append(bound)
+            bound *= 2
+        return cls.from_boundaries(bounds)
+
+    def index(self, size: int) -> int:
+        """Return the position of the bucket that a size falls into."""
+        return bisect_right(self.boundaries, size)
+
+    def bucket(self, entry: "FileEntry") -> str:
+        """Return the folder a file is sorted into by size."""
+        return self.names[self.index(entry.size)]
+
+    def range_label(self, index: int) -> str:
+        """Describe the sizes in a bucket, e.g. ``64K - 1M``."""
+        low = format_size(self.boundaries[index - 1]) if index else "0"
+        if index == len(self.boundaries):
+            return f"{low} and over"
+        return f"{low} - {format_size(self.boundaries[index])}"
+
+
+@dataclass
+class SizeHistogram:
+    """Number and total size of the files in each size bucket.
+
+    It is built from scan results alone, so no file is ever opened.
+
+    Attributes:
+        buckets: Buckets the files are counted in
+        counts: Number of files in each bucket
+        sizes: Total bytes in each bucket
+    """
+
+    buckets: SizeBuckets
+    counts: List[int] = field(default_factory=list)
+    sizes: List[int] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.counts = self.counts or [0] * len(self.buckets.names)
+        self.sizes = self.sizes or [0] * len(self.buckets.names)
+
+    def add(self, entries: Iterable["FileEntry"]) -> None:
+        """Count files into their buckets."""
+        index, counts, sizes = self.buckets.index, self.counts, self.sizes
+        for entry in entries:
+            i = index(entry.size)
+            counts[i] += 1
+            sizes[i] += entry.size
+
+    @property
+    def total_files(self) -> int:
+        return sum(self.counts)
+
+    @property
+    def total_size(self) -> int:
+        return sum(self.sizes)
+
+
+def print_size_histogram(histogram: SizeHistogram, bar_width: int = 30) -> None:
+    """Print a table of a histogram with a bar for each bucket's share of bytes."""
+    total = histogram.total_size
+    table = Table(
+        title=f"Size distribution: {histogram.total_files:,} files, "
+        f"{format_size(total)}"
+    )
+    table.add_column("Folder", style="cyan")
+    table.add_column("Range")
+    table.add_column("Files", justify="right")
+    table.add_column("Size", justify="right")
+    table.add_column("Share of bytes", style="magenta")
+    buckets = histogram.buckets
+    for i, name in enumerate(buckets.names):
+        if not histogram.counts[i]:
+            continue
+        share = histogram.sizes[i] / total if total else 0.0
+        table.add_row(
+            name,
+            buckets.range_label(i),
+            f"{histogram.counts[i]:,}",
+            format_size(histogram.sizes[i]),
+            "█" * round(share * bar_width) + f" {share:.0%}",
+        )
+    console.print(table)
@@ -0,0 +1,278 @@
+"""Hard-link snapshots of a folder, taken before an operation changes it."""
+
+import errno
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from rich.console import Console
+
+from .reflink import ReflinkNotSupported, clone_file
+from .scanner import SNAPSHOTS_DIR_NAME, scan_files
+
+console = Console()
+
+# Snapshots kept per folder, newest first, by prune_snapshots
+DEFAULT_KEEP = 5
+# Snapshots older than this are dropped by prune_snapshots
+DEFAULT_MAX_AGE_DAYS = 14
+
+_MARKER = ".organiserpro-snapshot.json"
+
+# Errors after which a hard link is replaced by a clone or a copy
+_LINK_FALLBACK_ERRNOS = frozenset({errno.EXDEV, errno.EMLINK, errno.EPERM})
+
+
+@dataclass
+class SnapshotStats:
+    """How each file got into a snapshot, or back out of one.
+
+    Attributes:
+        linked: Files hard-linked, costing no data at all
+        cloned: Files cloned with shared extents (reflink)
+        copied: Files whose bytes had to be copied
+        removed: Files removed from the folder by a restore
+    """
+
+    linked: int = 0
+    cloned: int = 0
+    copied: int = 0
+    removed: int = 0
+
+
+def default_snapshot_root() -> Path:
+    """Return the directory snapshots are kept in when it can hold them.
+
+    Honours ``$XDG_STATE_HOME`` and falls back to ``~/.local/state``.
+    """
+    base = os.environ.get("XDG_STATE_HOME") or os.path.join("~", ".local", "state")
+    return Path(base).expanduser() / "organiserpro" / "snapshots"
+
+
+def _device(path: Path) -> Optional[int]:
+    """Return the device of ``path``, or of its nearest existing parent."""
+    for candidate in (path, *path.parents):
+        try:
+            return os.stat(candidate).st_dev
+        except OSError:
+            continue
+    return None
+
+
+def snapshots_dir(folder: Path) -> Path:
+    """Return the directory holding the snapshots of ``folder``.
+
+    Snapshots are hard links, so they must be on the folder's filesystem.
+    They are kept under :func:`default_snapshot_root` when that is, and
+    otherwise in a ``.organiserpro-snapshots`` directory inside the folder,
+    which is writable whenever the folder can be organised at all and which
+    scans never descend into. Either way they are never next to the folder,
+    where a scan of its parent would pick them up.
+    """
+    folder = Path(folder).resolve()
+    root = default_snapshot_root()
+    if _device(root) == _device(folder):
+        key = sha256(os.fsencode(folder)).hexdigest()[:12]
+        return root / f"{folder.name or 'root'}-{key}"
+    return folder / SNAPSHOTS_DIR_NAME
+
+
+def _materialise(source: str, target: str, stats: SnapshotStats) -> None:
+    """Hard-link ``source`` to ``target``, cloning or copying if that fails."""
+    try:
+        os.link(source, target, follow_symlinks=False)
+        stats.linked += 1
+        return
+    except OSError as e:
+        if e.errno not in _LINK_FALLBACK_ERRNOS:
+            raise
+    try:
+        clone_file(Path(source), Path(target))
+        shutil.copystat(source, target)
+        stats.cloned += 1
+    except ReflinkNotSupported:
+        shutil.copy2(source, target)
+        stats.copied += 1
+
+
+def create_snapshot(folder: Path) -> Tuple[Path, SnapshotStats]:
+    """
+    Take a snapshot of a folder by mirroring its tree with hard links.
+
+    Like ``cp -al``, every file in the snapshot is a hard link to the
+    original, so taking it only costs metadata, not a copy of the data.
+    Files that cannot be hard-linked, e.g. because the snapshot is on
+    another filesystem, are cloned with shared extents where the
+    filesystem supports it and copied otherwise.
+
+    A hard link shares its contents with the original file, so the
+    snapshot protects against renames, moves, deletes and hard-link
+    replacement (everything OrganiserPro does) but not against a file
+    being edited in place.
+
+    Args:
+        folder: Folder to snapshot, including all subfolders and hidden files
+
+    Returns:
+        Tuple of the new snapshot's directory and how its files were made
+    """
+    folder = Path(folder).resolve()
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    snapshot = snapshots_dir(folder) / stamp
+    snapshot.mkdir(parents=True)
+
+    stats = SnapshotStats()
+    root = str(folder)
+    made_dirs: Set[str] = set()
+    for entry in scan_files(folder, recursive=True, include_hidden=True):
+        relative = os.path.relpath(entry.path, root)
+        target = os.path.join(str(snapshot), relative)
+        parent = os.path.dirname(target)
+        if parent not in made_dirs:
+            os.makedirs(parent, exist_ok=True)
+            made_dirs.add(parent)
+        try:
+            _materialise(entry.path, target, stats)
+        except OSError as e:
+            console.print(f"[yellow]Warning: Could not snapshot {entry.path}: {e}")
+
+    with open(snapshot / _MARKER, "w", encoding="utf-8") as f:
+        json.dump({"folder": root, "created": time.time()}, f)
+    return snapshot, stats
+
+
+def list_snapshots(folder: Path) -> List[Path]:
+    """Return the snapshots of a folder, oldest first."""
+    try:
+        entries = list(snapshots_dir(folder).iterdir())
+    except OSError:
+        return []
+    return sorted(p for p in entries if (p / _MARKER).is_file())
+
+
+def restore_snapshot(snapshot: Path, folder: Path) -> SnapshotStats:
+    """
+    Put a folder's files back the way they were when a snapshot was taken.
+
+    Files that still are the same inode as in the snapshot are left alone,
+    so only what the operation changed is touched. Files that the operation
+    moved elsewhere in the folder are recognised by their inode and removed
+    once their original path is back; anything added to the folder since
+    the snapshot is kept.
+
+    Args:
+        snapshot: Snapshot directory from :func:`create_snapshot`
+        folder: Folder to restore
+
+    Returns:
+        SnapshotStats: How many files were relinked, copied or removed
+    """
+    folder = Path(folder).resolve()
+    snap_root, root = str(snapshot), str(folder)
+    stats = SnapshotStats()
+
+    saved: Dict[str, Tuple[int, int]] = {}
+    for entry in scan_files(snapshot, recursive=True, include_hidden=True):
+        relative = os.path.relpath(entry.path, snap_root)
+        if relative == _MARKER:
+            continue
+        saved[relative] = (entry.dev, entry.inode)
+        target = os.path.join(root, relative)
+        try:
+            st = os.lstat(target)
+            if (st.st_dev, st.st_ino) == saved[relative]:
+                continue
+        except OSError:
+            pass
+        directory, name = os.path.split(target)
+        os.makedirs(directory, exist_ok=True)
+        temp = os.path.join(directory, f".{name}.organiserpro-restore")
+        try:
+            _materialise(entry.path, temp, stats)
+            os.replace(temp, target)
+        except OSError as e:
+            console.print(f"[yellow]Warning: Could not restore {target}: {e}")
+            if os.path.lexists(temp):
+                os.unlink(temp)
+
+    # Remove the copies an operation moved into new places
+    inodes = set(saved.values())
+    emptied: Set[str] = set()
+    for entry in scan_files(folder, recursive=True, include_hidden=True):
+        relative = os.path.relpath(entry.path, root)
+        if relative not in saved and (entry.dev, entry.inode) in inodes:
+            try:
+                os.unlink(entry.path)
+                stats.removed += 1
+                emptied.add(os.path.dirname(entry.path))
+            except OSError as e:
+                console.print(f"[yellow]Warning: Could not remove {entry.path}: {e}")
+    for directory in sorted(emptied, reverse=True):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass  # Not empty, so it holds files the snapshot does not know
+    return stats
+
+
+def prune_snapshots(
+    folder: Path,
+    keep: int = DEFAULT_KEEP,
+    max_age_days: Optional[float] = DEFAULT_MAX_AGE_DAYS,
+) -> int:
+    """
+    Delete old snapshots of a folder.
+
+    The newest snapshot is always kept. Removing a hard-link snapshot only
+    drops links, so it frees no space for files the folder still holds.
+
+    Args:
+        folder: Folder whose snapshots to prune
+        keep: Keep at most this many snapshots
+        max_age_days: Also delete snapshots older than this; None for no limit
+
+    Returns:
+        int: Number of snapshots deleted
+    """
+    snapshots = list_snapshots(folder)
+    doomed = snapshots[: max(len(snapshots) - max(keep, 1), 0)]
+    if max_age_days is not None:
+        cutoff = time.time() - max_age_days * 86400
+        doomed.extend(
+            p
+            for p in snapshots[len(doomed) : -1]
+            if (p / _MARKER).stat().st_mtime < cutoff
+        )
+    for snapshot in doomed:
+        shutil.rmtree(snapshot, ignore_errors=True)
+    return len(doomed)
+
+
+def remove_snapshots(folder: Path) -> int:
+    """
+    Delete every snapshot of a folder.
+
+    Snapshot links keep the inodes of deleted files alive, so the space a
+    dedupe frees is only returned once no snapshot refers to the removed
+    duplicates any more.
+
+    Args:
+        folder: Folder whose snapshots to delete
+
+    Returns:
+        int: Number of snapshots deleted
+    """
+    snapshots = list_snapshots(folder)
+    for snapshot in snapshots:
+        shutil.rmtree(snapshot, ignore_errors=True)
+    try:
+        snapshots_dir(folder).rmdir()
+    except OSError:
+        pass  # Not there, or holds something that is not a snapshot
+    return len(snapshots)
@@ -1,9 +1,31 @@
-import shutil
+import os
+import sqlite3
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, List, Optional
 
 from rich.console import Console
 
+from .cache import HashCache
+from .cancel import CancelToken, OperationCancelled, cancel_on_interrupt, checkpoint
+from .index import FileIndex
+from .journal import execute_journaled
+from .metadata import CaptureTimeReader
+from .mover import MovePlanner
+from .plan import (
+    MOVE,
+    OperationPlan,
+    PlannedAction,
+    PlanResult,
+    execute_plan,
+    print_plan,
+)
+from .profiling import span
+from .progress import ProgressCallback, ProgressReporter, RichProgress
+from .scanner import FileEntry, scan_files, scan_tree
+from .sizes import SizeBuckets, SizeHistogram, print_size_histogram
+from .workers import default_workers
+
 console = Console()
 
 
@@ -24,72 +46,433 @@ def get_file_extension(file_path: Path) -> str:
     return file_path.suffix[1:].lower()
 
 
-def sort_by_type(directory: str, dry_run: bool = False) -> None:
-    """Sort files in the given directory into subdirectories by file type.
+def bucket_by_type(entry: FileEntry) -> str:
+    """Return the folder a file is sorted into by type: its extension."""
+    return get_file_extension(Path(entry.name))
+
+
+def date_bucketer(
+    date_format: str = "%Y-%m",
+    timestamp: Optional[Callable[[FileEntry], Optional[float]]] = None,
+) -> Callable[[FileEntry], str]:
+    """Return a function naming the folder a file is sorted into by date.
+
+    Args:
+        date_format: strftime format, or one using ``YYYY``, ``MM`` and ``DD``
+        timestamp: Returns the date of a file; defaults to its modification
+            time. Files it returns None for are left where they are.
+
+    Returns:
+        Callable mapping a :class:`~OrganiserPro.scanner.FileEntry` to its
+        date formatted with ``date_format``
+    """
+    date_format = (
+        date_format.replace("YYYY", "%Y").replace("MM", "%m").replace("DD", "%d")
+    )
+
+    def bucket_by_date(entry: FileEntry) -> str:
+        when = entry.mtime if timestamp is None else timestamp(entry)
+        if when is None:
+            return ""  # The file's own directory
+        return datetime.fromtimestamp(when).strftime(date_format)
+
+    return bucket_by_date
+
+
+def _is_bucket_folder(
+    directory: str, entries: List[FileEntry], bucket: Callable[[FileEntry], str]
+) -> bool:
+    """Return True if every file in a directory is already in its own bucket.
+
+    Such a directory is a folder made by an earlier sort (``.../pdf`` holding
+    only PDFs, or ``.../2024-05`` holding only files from May 2024), and
+    sorting it again would only nest another level of folders.
+    """
+    return bool(entries) and all(
+        directory.endswith(os.sep + os.path.normpath(bucket(entry)))
+        for entry in entries
+    )
+
+
+def _sort_plan(
+    operation: str,
+    source_dir: Path,
+    bucket: Callable[[FileEntry], str],
+    recursive: bool = False,
+    flatten: bool = False,
+    workers: Optional[int] = None,
+    prepare: Optional[Callable[[List[FileEntry]], None]] = None,
+    index: Optional[FileIndex] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> OperationPlan:
+    """Plan moving each file into a folder named by ``bucket(entry)``.
+
+    Without ``recursive`` only the top level of ``source_dir`` is sorted.
+    With it, every directory in the tree is sorted in place, or with
+    ``flatten`` all files are gathered into folders under ``source_dir``.
+    Directories are planned in path order and files in name order, so
+    collisions always resolve the same way however the scan was scheduled.
+    If given, ``prepare`` is called once with every scanned file before
+    ``bucket`` is, so bucketing work can be batched, and every scanned file
+    is added to ``index``. ``progress`` receives events for the ``scan``
+    and ``inspect`` phases, and ``cancel`` is checked between directories
+    and around ``prepare``.
+    """
+    root = str(source_dir)
+    with span("scan"):
+        if recursive:
+            tree = scan_tree(source_dir, workers, progress, cancel)
+        else:
+            # Only the top-level files (excluding hidden files)
+            with ProgressReporter(progress, "scan", "Scanning files...") as reporter:
+                files = list(scan_files(source_dir, cancel=cancel))
+                reporter.advance(len(files), sum(entry.size for entry in files))
+            tree = [(root, files)]
+    if index is not None:
+        for _, entries in tree:
+            index.extend(entries)
+    if prepare is not None:
+        entries = [entry for _, entries in tree for entry in entries]
+        with span("inspect"), ProgressReporter(
+            progress, "inspect", "Inspecting files...", len(entries)
+        ) as reporter:
+            checkpoint(cancel)
+            prepare(entries)
+            reporter.advance(len(entries))
+        checkpoint(cancel)
+
+    planner = MovePlanner()
+    records = []
+    with span("plan"):
+        for directory, entries in tree:
+            if not flatten and directory != root:
+                if _is_bucket_folder(directory, entries, bucket):
+                    continue
+            sort_root = root if flatten else directory
+            for entry in entries:
+                target_dir = os.path.normpath(os.path.join(sort_root, bucket(entry)))
+                if target_dir == directory:
+                    continue  # Already where it belongs
+                planner.plan(entry.path, target_dir)
+                records.append((entry.path, entry.size, entry.mtime_ns, entry.inode))
+
+    plan = OperationPlan(
+        operation,
+        root,
+        [PlannedAction(MOVE, op.source, op.target) for op in planner.ops],
+        options={"recursive": recursive, "flatten": flatten},
+    )
+    return plan.seal(records)
+
+
+def plan_sort_by_type(
+    directory: str,
+    recursive: bool = False,
+    flatten: bool = False,
+    workers: Optional[int] = None,
+    by_content: bool = False,
+    cache: Optional[HashCache] = None,
+    index: Optional[FileIndex] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> OperationPlan:
+    """Plan sorting the files in a directory into subdirectories by type.
 
     Args:
         directory: Path to the directory containing files to sort
-        dry_run: If True, only show what would be done without making changes
+        recursive: If True, also sort the files in every subdirectory,
+            skipping hidden directories and folders made by an earlier sort
+        flatten: With ``recursive``, gather all files into type folders in
+            ``directory`` instead of sorting each subdirectory in place
+        workers: Maximum number of directories scanned at once, and of
+            files read at once with ``by_content``
+        by_content: If True, work out each file's type from its first few
+            kilobytes with libmagic rather than trusting its extension
+        cache: Optional cache of content types from earlier runs
+        index: Optional :class:`~OrganiserPro.index.FileIndex` that every
+            scanned file is added to, e.g. to show sizes in a preview
+        progress: Optional callback receiving ``scan`` and ``inspect``
+            progress events
+        cancel: Optional :class:`~OrganiserPro.cancel.CancelToken` to pause
+            or stop planning with
+
+    Returns:
+        OperationPlan: Moves that :func:`~OrganiserPro.plan.execute_plan` can
+        carry out without scanning the directory again
+
+    Raises:
+        ImportError: If ``by_content`` is set and python-magic is missing
+        OperationCancelled: If ``cancel`` is cancelled while planning
+    """
+    source_dir = Path(directory).expanduser().resolve()
+    if not by_content:
+        return _sort_plan(
+            "sort_by_type",
+            source_dir,
+            bucket_by_type,
+            recursive,
+            flatten,
+            workers,
+            index=index,
+            progress=progress,
+            cancel=cancel,
+        )
+
+    from .content import ContentTypeDetector
+
+    detector = ContentTypeDetector(cache=cache, workers=workers)
+    plan = _sort_plan(
+        "sort_by_type",
+        source_dir,
+        detector.bucket,
+        recursive,
+        flatten,
+        workers,
+        prepare=detector.prefetch,
+        index=index,
+        progress=progress,
+        cancel=cancel,
+    )
+    plan.options["by_content"] = True
+    return plan
+
+
+def plan_sort_by_date(
+    directory: str,
+    date_format: str = "%Y-%m",
+    recursive: bool = False,
+    flatten: bool = False,
+    workers: Optional[int] = None,
+    date_source: str = "mtime",
+    cache: Optional[HashCache] = None,
+    index: Optional[FileIndex] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> OperationPlan:
+    """Plan sorting the files in a directory into subdirectories by date.
+
+    Args:
+        directory: Directory to sort
+        date_format: Format string for date-based sorting
+        recursive: If True, also sort the files in every subdirectory,
+            skipping hidden directories and folders made by an earlier sort
+        flatten: With ``recursive``, gather all files into date folders in
+            ``directory`` instead of sorting each subdirectory in place
+        workers: Maximum number of directories scanned at once, and of
+            image headers read at once for EXIF dates
+        date_source: Which date to sort by, one of
+            :data:`~OrganiserPro.metadata.DATE_SOURCES`: ``mtime``,
+            ``ctime``, ``exif`` (photos' capture time; other files are left
+            alone) or ``auto`` (capture time, else mtime)
+        cache: Optional cache of capture times from earlier runs
+        index: Optional :class:`~OrganiserPro.index.FileIndex` that every
+            scanned file is added to, e.g. to show sizes in a preview
+        progress: Optional callback receiving ``scan`` and ``inspect``
+            progress events
+        cancel: Optional token to pause or stop planning with
+
+    Returns:
+        OperationPlan: Moves that :func:`~OrganiserPro.plan.execute_plan` can
+        carry out without scanning the directory again
+
+    Raises:
+        ValueError: If ``date_source`` is unknown
+        OperationCancelled: If ``cancel`` is cancelled while planning
+    """
+    source_dir = Path(directory).expanduser().resolve()
+
+    if date_source == "mtime":
+        # Format each file's last modified time from the scan
+        bucket = date_bucketer(date_format)
+        return _sort_plan(
+            "sort_by_date",
+            source_dir,
+            bucket,
+            recursive,
+            flatten,
+            workers,
+            index=index,
+            progress=progress,
+            cancel=cancel,
+        )
+
+    reader = CaptureTimeReader(date_source, cache=cache, workers=workers)
+    plan = _sort_plan(
+        "sort_by_date",
+        source_dir,
+        date_bucketer(date_format, reader.timestamp),
+        recursive,
+        flatten,
+        workers,
+        prepare=reader.prefetch,
+        index=index,
+        progress=progress,
+        cancel=cancel,
+    )
+    plan.options["date_source"] = date_source
+    return plan
+
+
+def plan_sort_by_size(
+    directory: str,
+    buckets: Optional[SizeBuckets] = None,
+    recursive: bool = False,
+    flatten: bool = False,
+    workers: Optional[int] = None,
+    histogram: Optional[SizeHistogram] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> OperationPlan:
+    """Plan sorting the files in a directory into subdirectories by size.
+
+    Sizes come from the directory scan, so no file is opened.
+
+    Args:
+        directory: Directory to sort
+        buckets: Size ranges to sort into; defaults to the named buckets
+            ``tiny`` to ``huge`` (see :class:`~OrganiserPro.sizes.SizeBuckets`)
+        recursive: If True, also sort the files in every subdirectory,
+            skipping hidden directories and folders made by an earlier sort
+        flatten: With ``recursive``, gather all files into size folders in
+            ``directory`` instead of sorting each subdirectory in place
+        workers: Maximum number of directories scanned at once
+        histogram: Optional histogram that every scanned file is counted
+            into, including files that are already in place
+        progress: Optional callback receiving ``scan`` progress events
+        cancel: Optional token to pause or stop planning with
+
+    Returns:
+        OperationPlan: Moves that :func:`~OrganiserPro.plan.execute_plan` can
+        carry out without scanning the directory again
+
+    Raises:
+        OperationCancelled: If ``cancel`` is cancelled while planning
     """
     source_dir = Path(directory).expanduser().resolve()
+    buckets = buckets or SizeBuckets()
+    plan = _sort_plan(
+        "sort_by_size",
+        source_dir,
+        buckets.bucket,
+        recursive,
+        flatten,
+        workers,
+        prepare=histogram.add if histogram is not None else None,
+        progress=progress,
+        cancel=cancel,
+    )
+    plan.options["boundaries"] = list(buckets.boundaries)
+    return plan
+
 
-    # Get all files (excluding hidden files)
-    all_files = []
-    for file_path in source_dir.glob("*"):  # Only process top-level files
-        if file_path.is_file() and not file_path.name.startswith("."):
-            all_files.append(file_path)
+def _open_cache() -> Optional[HashCache]:
+    """Open the cache of per-file metadata, warning if that fails."""
+    try:
+        return HashCache()
+    except (OSError, sqlite3.Error) as e:
+        console.print(f"[yellow]Warning: Metadata cache unavailable: {e}")
+        return None
+
+
+def _run_sort_plan(
+    plan: OperationPlan, journal: bool, workers: Optional[int]
+) -> PlanResult:
+    """Execute a freshly computed sort plan, journaling it if asked to.
+
+    Ctrl+C stops the run after the move in progress.
+    """
+    journal_path = None
+    with cancel_on_interrupt() as cancel, RichProgress(console) as progress:
+        # The plan was made from a fresh scan, so skip the staleness check
+        if journal:
+            result, journal_path = execute_journaled(
+                plan, check=False, workers=workers, progress=progress, cancel=cancel
+            )
+        else:
+            result = execute_plan(
+                plan, check=False, workers=workers, progress=progress, cancel=cancel
+            )
+    if result.cancelled:
+        console.print(
+            f"[yellow]Cancelled; {len(result.cancelled)} files were left in place"
+        )
+    if journal_path is not None:
+        console.print(f"Undo with: organiserpro undo {journal_path}")
+    return result
+
+
+def sort_by_type(
+    directory: str,
+    dry_run: bool = False,
+    journal: bool = True,
+    recursive: bool = False,
+    flatten: bool = False,
+    workers: Optional[int] = None,
+    by_content: bool = False,
+) -> None:
+    """Sort files in the given directory into subdirectories by file type.
 
-    if not all_files:
+    Args:
+        directory: Path to the directory containing files to sort
+        dry_run: If True, only show what would be done without making changes
+        journal: If True, record every move in an undo journal first
+        recursive: If True, sort every subdirectory too (see
+            :func:`plan_sort_by_type`)
+        flatten: With ``recursive``, gather all files into the top directory
+        workers: Number of directories scanned and sorted at once
+        by_content: If True, detect file types from their contents (see
+            :func:`plan_sort_by_type`), caching the results between runs
+    """
+    if workers is None:
+        workers = default_workers()
+    cache = _open_cache() if by_content else None
+    try:
+        with cancel_on_interrupt() as cancel, RichProgress(console) as progress:
+            plan = plan_sort_by_type(
+                directory,
+                recursive,
+                flatten,
+                workers,
+                by_content,
+                cache,
+                progress=progress,
+                cancel=cancel,
+            )
+    except OperationCancelled:
+        console.print("[yellow]Cancelled; no files were moved")
+        return
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if not plan.actions:
         console.print("[yellow]No files found to sort![/]")
         return
+    if dry_run:
+        print_plan(plan)
+        return
+
+    result = _run_sort_plan(plan, journal, workers)
 
-    # Create a progress bar
-    with console.status("Sorting files..."):
-        files_processed = 0
-        extensions_created = set()
-
-        for file_path in all_files:
-            try:
-                # Get file extension and create target directory
-                ext = get_file_extension(file_path)
-                ext_dir = source_dir / ext
-
-                if ext not in extensions_created:
-                    ext_dir.mkdir(exist_ok=True)
-                    extensions_created.add(ext)
-
-                # Create the target path
-                target_path = ext_dir / file_path.name
-
-                # Handle duplicate filenames by appending a counter
-                counter = 1
-                original_target = target_path
-                while target_path.exists():
-                    # If file is the same (same inode), skip it
-                    if target_path.samefile(file_path):
-                        break
-                    # Otherwise, append a counter to make the filename unique
-                    new_name = (
-                        f"{original_target.stem}_{counter}{original_target.suffix}"
-                    )
-                    target_path = original_target.with_name(new_name)
-                    counter += 1
-
-                # Move the file if it's not already in the right place
-                if not target_path.exists() or not target_path.samefile(file_path):
-                    shutil.move(str(file_path), str(target_path))
-                    files_processed += 1
-
-            except Exception as e:
-                console.print(f"[red]Error processing {file_path.name}: {e}")
+    for action, error in result.failed:
+        console.print(f"[red]Error processing {Path(action.source).name}: {error}")
 
+    extensions_created = {Path(action.target).parent for action in result.done}
     console.print(
-        f"✅ Sorted {files_processed} files into {len(extensions_created)} directories"
+        f"✅ Sorted {len(result.done)} files into {len(extensions_created)} directories"
     )
 
 
 def sort_by_date(
-    directory: str, date_format: str = "%Y-%m", dry_run: bool = False
+    directory: str,
+    date_format: str = "%Y-%m",
+    dry_run: bool = False,
+    journal: bool = True,
+    recursive: bool = False,
+    flatten: bool = False,
+    workers: Optional[int] = None,
+    date_source: str = "mtime",
 ) -> None:
     """
     Sort files into subdirectories based on file type, size, or date.
@@ -97,6 +480,14 @@ def sort_by_date(
     Args:
         directory: Directory to sort
         date_format: Format string for date-based sorting
+        dry_run: If True, only show what would be done without making changes
+        journal: If True, record every move in an undo journal first
+        recursive: If True, sort every subdirectory too (see
+            :func:`plan_sort_by_date`)
+        flatten: With ``recursive``, gather all files into the top directory
+        workers: Number of directories scanned and sorted at once
+        date_source: Which date to sort by (see :func:`plan_sort_by_date`);
+            capture times read from photos are cached between runs
     """
     source_dir = Path(directory).expanduser().resolve()
 
@@ -104,59 +495,109 @@ def sort_by_date(
         console.print(f"[red]Error: {directory} is not a valid directory")
         return
 
-    # Get all files (only in the top-level directory, not subdirectories)
-    all_files = []
-    for file_path in source_dir.glob("*"):
-        if file_path.is_file() and not file_path.name.startswith("."):
-            all_files.append(file_path)
+    if workers is None:
+        workers = default_workers()
+    cache = _open_cache() if date_source in ("exif", "auto") else None
+    try:
+        with cancel_on_interrupt() as cancel, RichProgress(console) as progress:
+            plan = plan_sort_by_date(
+                directory,
+                date_format,
+                recursive,
+                flatten,
+                workers,
+                date_source,
+                cache,
+                progress=progress,
+                cancel=cancel,
+            )
+    except OperationCancelled:
+        console.print("[yellow]Cancelled; no files were moved")
+        return
+    finally:
+        if cache is not None:
+            cache.close()
 
-    if not all_files:
+    if not plan.actions:
         console.print("[yellow]No files found to sort![/]")
         return
+    if dry_run:
+        print_plan(plan)
+        return
 
-    # Track processed files and created directories
-    files_processed = 0
-    date_dirs_created = set()
-
-    # Process files with progress
-    with console.status("Sorting files..."):
-        for file_path in all_files:
-            if file_path.is_file() and not file_path.name.startswith("."):
-                try:
-                    # Get the file's last modified time and format it
-                    mtime = file_path.stat().st_mtime
-                    dt = datetime.fromtimestamp(mtime)
-                    date_str = dt.strftime(
-                        date_format.replace("YYYY", "%Y")
-                        .replace("MM", "%m")
-                        .replace("DD", "%d")
-                    )
-
-                    # Create target directory if it doesn't exist
-                    target_dir = source_dir / date_str
-                    if date_str not in date_dirs_created:
-                        target_dir.mkdir(exist_ok=True)
-                        date_dirs_created.add(date_str)
-
-                    target_path = target_dir / file_path.name
-
-                    # Handle filename conflicts
-                    counter = 1
-                    while target_path.exists():
-                        target_path = target_dir / (
-                            f"{file_path.stem}_{counter}{file_path.suffix}"
-                        )
-                        counter += 1
-
-                    # Move the file
-                    file_path.rename(target_path)
-                    files_processed += 1
-                except (OSError, PermissionError) as e:
-                    msg = f"[yellow]Warning: Could not process {file_path}: {e}"
-                    console.print(msg)
-                    continue
+    result = _run_sort_plan(plan, journal, workers)
+
+    for action, error in result.failed:
+        console.print(f"[yellow]Warning: Could not process {action.source}: {error}")
 
+    date_dirs_created = {Path(action.target).parent for action in result.done}
     console.print(
-        f"✅ Sorted {files_processed} files into "
+        f"✅ Sorted {len(result.done)} files into "
         f"{len(date_dirs_created)} date-based directories"
     )
+
+
+def sort_by_size(
+    directory: str,
+    buckets: Optional[SizeBuckets] = None,
+    dry_run: bool = False,
+    journal: bool = True,
+    recursive: bool = False,
+    flatten: bool = False,
+    workers: Optional[int] = None,
+) -> None:
+    """
+    Sort files into subdirectories by size.
+
+    A dry run shows how many files and bytes fall into each size range,
+    which is a quick way to see what fills a disk, followed by the plan.
+
+    Args:
+        directory: Directory to sort
+        buckets: Size ranges to sort into (see :func:`plan_sort_by_size`)
+        dry_run: If True, only show what would be done without making changes
+        journal: If True, record every move in an undo journal first
+        recursive: If True, sort every subdirectory too (see
+            :func:`plan_sort_by_size`)
+        flatten: With ``recursive``, gather all files into the top directory
+        workers: Number of directories scanned and sorted at once
+    """
+    if workers is None:
+        workers = default_workers()
+    buckets = buckets or SizeBuckets()
+    histogram = SizeHistogram(buckets) if dry_run else None
+    try:
+        with cancel_on_interrupt() as cancel, RichProgress(console) as progress:
+            plan = plan_sort_by_size(
+                directory,
+                buckets,
+                recursive,
+                flatten,
+                workers,
+                histogram,
+                progress,
+                cancel,
+            )
+    except OperationCancelled:
+        console.print("[yellow]Cancelled; no files were moved")
+        return
+
+    if histogram is not None and histogram.total_files:
+        print_size_histogram(histogram)
+    if not plan.actions:
+        console.print("[yellow]No files found to sort![/]")
+        return
+    if dry_run:
+        print_plan(plan)
+        return
+
+    result = _run_sort_plan(plan, journal, workers)
+
+    for action, error in result.failed:
+        console.print(f"[yellow]Warning: Could not process {action.source}: {error}")
+
+    size_dirs_created = {Path(action.target).parent for action in result.done}
+    console.print(
+        f"✅ Sorted {len(result.done)} files into "
+        f"{len(size_dirs_created)} size-based directories"
+    )
@@ -0,0 +1,274 @@
+"""Sort files as they arrive, driven by Linux inotify events."""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from rich.console import Console
+
+from .journal import Journal, open_journal
+from .mover import MovePlanner
+from .plan import MOVE, OperationPlan, PlannedAction, PlanResult, execute_plan
+from .scanner import FileEntry, is_hidden, scan_files, stat_entry
+
+console = Console()
+
+# From <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+
+# struct inotify_event: wd, mask, cookie, len, then ``len`` bytes of name
+_EVENT = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+# Seconds a file must stay unchanged after its last event before it is moved
+DEFAULT_SETTLE = 1.0
+
+_libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+_inotify_init1 = getattr(_libc, "inotify_init1", None)
+_inotify_add_watch = getattr(_libc, "inotify_add_watch", None)
+if _inotify_add_watch is not None:
+    _inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+
+class Inotify:
+    """Minimal ctypes wrapper around an inotify watch on one directory.
+
+    Args:
+        directory: Directory to watch
+        mask: Events to report, e.g. ``IN_CLOSE_WRITE | IN_MOVED_TO``
+
+    Raises:
+        OSError: If inotify is unavailable or the watch cannot be added
+    """
+
+    def __init__(self, directory: Path, mask: int) -> None:
+        if _inotify_init1 is None or _inotify_add_watch is None:
+            raise OSError(errno.ENOSYS, "inotify is not available on this system")
+        self.fd = _inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        if _inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, os.strerror(err), str(directory))
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def read_events(self) -> Iterator[Tuple[int, str]]:
+        """Yield ``(mask, name)`` for every event queued so far."""
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            yield mask, os.fsdecode(name)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+    def __enter__(self) -> "Inotify":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class DirectoryWatcher:
+    """Sort each file that lands in a directory, one event at a time.
+
+    Files are queued on ``IN_CLOSE_WRITE`` (a writer closed the file) and
+    ``IN_MOVED_TO`` (a file was renamed into the directory). Every further
+    event for a queued file restarts its settle period, so a burst of
+    writes is handled once. When the period ends, the file is only moved
+    if its size and mtime are still those seen at its last event;
+    otherwise it waits another period. A file still being written is
+    therefore never moved.
+
+    Each arrival costs one ``stat`` when queued and one when due, and its
+    target is planned with a long-lived :class:`~OrganiserPro.mover.
+    MovePlanner`, so the cost is per event rather than per directory scan.
+
+    Args:
+        directory: Directory to watch; only its top level is sorted
+        bucket: Maps a file to the name of the folder it belongs in, e.g.
+            :func:`~OrganiserPro.sorter.bucket_by_type`
+        settle: Seconds a file must stay unchanged before it is moved
+        journal: Optional journal that every move is recorded in first
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        bucket: Callable[[FileEntry], str],
+        settle: float = DEFAULT_SETTLE,
+        journal: Optional[Journal] = None,
+    ) -> None:
+        self.directory = Path(directory).expanduser().resolve()
+        self.bucket = bucket
+        self.settle = settle
+        self.journal = journal
+        self._planner = MovePlanner()
+        # name -> (deadline, size, mtime_ns) as of the file's last event
+        self._pending: Dict[str, Tuple[float, int, int]] = {}
+
+    def queue(self, name: str, now: float) -> None:
+        """Queue a file, or restart its settle period if already queued."""
+        if is_hidden(name):
+            return
+        try:
+            st = os.stat(self.directory / name)
+        except OSError:
+            self._pending.pop(name, None)
+            return
+        self._pending[name] = (now + self.settle, st.st_size, st.st_mtime_ns)
+
+    def queue_existing(self, now: float) -> None:
+        """Queue every file already in the directory.
+
+        Each file gets a full settle period, like a file that just had an
+        event, since it may still be being written.
+        """
+        for entry in scan_files(self.directory):
+            self._pending[entry.name] = (
+                now + self.settle,
+                entry.size,
+                entry.mtime_ns,
+            )
+
+    def timeout(self, now: float) -> Optional[float]:
+        """Return seconds until the next queued file is due, if any."""
+        if not self._pending:
+            return None
+        return max(min(deadline for deadline, _, _ in self._pending.values()) - now, 0)
+
+    def sort_due(self, now: float) -> PlanResult:
+        """Move every queued file whose settle period has passed unchanged."""
+        ready: List[FileEntry] = []
+        for name, (deadline, size, mtime_ns) in list(self._pending.items()):
+            if deadline > now:
+                continue
+            try:
+                entry = stat_entry(str(self.directory / name))
+            except OSError:
+                del self._pending[name]  # Gone again, e.g. a temporary file
+                continue
+            if (entry.size, entry.mtime_ns) != (size, mtime_ns):
+                self._pending[name] = (now + self.settle, entry.size, entry.mtime_ns)
+                continue
+            del self._pending[name]
+            ready.append(entry)
+
+        if not ready:
+            return PlanResult()
+        actions = []
+        for entry in ready:
+            target = self._planner.plan(
+                entry.path, str(self.directory / self.bucket(entry))
+            )
+            actions.append(PlannedAction(MOVE, entry.path, target))
+        self._planner.ops.clear()
+        plan = OperationPlan("watch", str(self.directory), actions)
+        return execute_plan(plan, check=False, journal=self.journal)
+
+    def run(
+        self,
+        initial: bool = True,
+        stop: Optional[threading.Event] = None,
+        on_result: Optional[Callable[[PlanResult], None]] = None,
+    ) -> None:
+        """
+        Watch the directory until ``stop`` is set or the process is interrupted.
+
+        Args:
+            initial: If True, first sort the files already in the directory
+            stop: Event that ends the loop when set
+            on_result: Called with the outcome of every batch of moves
+        """
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO
+        with Inotify(self.directory, mask) as notify:
+            # Queue existing files only once the watch is in place, so that
+            # nothing arriving in between is missed
+            if initial:
+                self.queue_existing(time.monotonic())
+            while stop is None or not stop.is_set():
+                timeout = self.timeout(time.monotonic())
+                if stop is not None:
+                    # Wake up regularly to notice the stop event
+                    timeout = 0.5 if timeout is None else min(timeout, 0.5)
+                readable, _, _ = select.select([notify], [], [], timeout)
+                now = time.monotonic()
+                if readable:
+                    for event_mask, name in notify.read_events():
+                        if event_mask & IN_Q_OVERFLOW:
+                            # Events were dropped; fall back to one rescan
+                            self.queue_existing(now)
+                        elif event_mask & IN_IGNORED:
+                            raise OSError(
+                                errno.ENOENT, "Watched directory went away"
+                            )
+                        elif name and not event_mask & IN_ISDIR:
+                            self.queue(name, now)
+                result = self.sort_due(now)
+                if on_result is not None and (result.done or result.failed):
+                    on_result(result)
+
+
+def watch_directory(
+    directory: str,
+    bucket: Callable[[FileEntry], str],
+    settle: float = DEFAULT_SETTLE,
+    initial: bool = True,
+    journal: bool = True,
+) -> None:
+    """
+    Sort files into subdirectories as they arrive, until interrupted.
+
+    Args:
+        directory: Directory to watch
+        bucket: Maps a file to the name of the folder it belongs in
+        settle: Seconds a file must stay unchanged before it is moved
+        initial: If True, first sort the files already in the directory
+        journal: If True, record every move in an undo journal first
+    """
+    source_dir = Path(directory).expanduser().resolve()
+    run_journal = open_journal("watch", str(source_dir)) if journal else None
+
+    def report(result: PlanResult) -> None:
+        for action in result.done:
+            target = Path(action.target)
+            console.print(f"Filed {target.name} → {target.parent.name}/")
+        for action, error in result.failed:
+            console.print(
+                f"[yellow]Warning: Could not process {action.source}: {error}"
+            )
+
+    watcher = DirectoryWatcher(source_dir, bucket, settle, run_journal)
+    console.print(f"Watching {source_dir} (press Ctrl+C to stop)")
+    try:
+        watcher.run(initial=initial, on_result=report)
+    except KeyboardInterrupt:
+        console.print("Stopped watching")
+    finally:
+        if run_journal is not None:
+            run_journal.close()
+            console.print(f"Undo with: organiserpro undo {run_journal.path}")
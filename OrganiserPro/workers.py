@@ -0,0 +1,92 @@
+"""Ordered thread pool shared by hashing, content detection and EXIF reads."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+from .cancel import CancelToken
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def default_workers() -> int:
+    """Return the default number of worker threads for this machine."""
+    return os.cpu_count() or 1
+
+
+def _checked(cancel: CancelToken, func: Callable[[T], R], item: T) -> R:
+    """Call ``func`` unless the operation was cancelled, waiting while paused."""
+    cancel.check()
+    return func(item)
+
+
+class WorkerPool:
+    """Run a function over many files on a pool of threads.
+
+    Results are always yielded in the order the inputs were given, so the
+    outcome of a run does not depend on the number of workers or on which
+    file happens to finish first. The work is expected to spend its time
+    in I/O or in C code that releases the GIL.
+
+    With a cancel token, every item waits while the token is paused and
+    raises :class:`~OrganiserPro.cancel.OperationCancelled` instead of
+    starting once it is cancelled; the items still queued are then dropped
+    without being processed.
+
+    Args:
+        workers: Number of workers; defaults to the number of CPUs.
+            With a single worker everything runs inline in the caller.
+        cancel: Optional token to pause or cancel the run with
+        name: Prefix of the worker threads' names
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        cancel: Optional[CancelToken] = None,
+        name: str = "organiserpro-worker",
+    ):
+        self.workers = max(1, workers or default_workers())
+        self.cancel = cancel
+        self.name = name
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix=self.name
+            )
+        return self._executor
+
+    def map(self, func: Callable[[T], R], items: Iterable[T]) -> Iterator[R]:
+        """Apply ``func`` to every item, yielding results in input order.
+
+        Args:
+            func: Function to call for each item
+            items: Items (usually file paths or scan entries) to process
+
+        Returns:
+            Iterator over the results, in the same order as ``items``
+
+        Raises:
+            OperationCancelled: While iterating, once the run is cancelled
+        """
+        if self.cancel is not None:
+            func = partial(_checked, self.cancel, func)
+        if self.workers == 1:
+            return map(func, items)
+        return self._get_executor().map(func, items)
+
+    def close(self) -> None:
+        """Shut down the worker pool, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Hash throughput benchmark for OrganiserPro duplicate detection.
+
+Generates a corpus of random files in a temporary directory and reports how
+fast each available hash algorithm digests it through ``get_file_hash``.
+
+Usage:
+    python benchmarks/bench_hash.py [--files N] [--size-mb MB] [--repeat N]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Allow running the benchmark from a source checkout
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from OrganiserPro.dedupe import get_file_hash  # noqa: E402
+from OrganiserPro.hashing import available_algorithms  # noqa: E402
+
+
+def generate_corpus(root: Path, files: int, size: int, seed: int = 0) -> list:
+    """Write ``files`` files of ``size`` random bytes each under ``root``."""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(files):
+        path = root / f"file_{i:05d}.bin"
+        path.write_bytes(rng.getrandbits(size * 8).to_bytes(size, "little"))
+        paths.append(path)
+    return paths
+
+
+def bench(paths: list, algorithm: str, repeat: int) -> float:
+    """Return the best wall time, in seconds, to hash every path."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            get_file_hash(path, algorithm=algorithm)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=32, help="number of files")
+    parser.add_argument(
+        "--size-mb", type=float, default=8, help="size of each file in MiB"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per algorithm")
+    args = parser.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    total_mb = args.files * size / (1024 * 1024)
+
+    with tempfile.TemporaryDirectory(prefix="organiserpro-bench-") as tmp:
+        paths = generate_corpus(Path(tmp), args.files, size)
+        # Warm the page cache so the benchmark measures hashing, not the disk
+        bench(paths, "sha256", 1)
+
+        print(f"Corpus: {args.files} files, {total_mb:.0f} MiB total")
+        print(f"{'algorithm':<10} {'seconds':>8} {'MiB/s':>10}")
+        for algorithm in available_algorithms():
+            seconds = bench(paths, algorithm, args.repeat)
+            print(f"{algorithm:<10} {seconds:>8.3f} {total_mb / seconds:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the OrganiserPro scan, hash, plan and move stages.
+
+Generates a synthetic tree with ``treegen.py`` and times each stage on it
+separately:
+
+    scan   scan_files over the whole tree (metadata only)
+    hash   find_duplicate_ids: size grouping, partial and full hashes
+    plan   plan_sort_by_type, recursive and flattened
+    move   execute_plan of that plan (renames within one filesystem)
+
+The read-only stages are run ``--repeat`` times and the fastest run is
+kept; the move stage changes the tree, so it runs once. The tree is
+written by a child process just before timing, so the page cache is warm
+and the peak RSS reported is that of the benchmarked code alone.
+
+Results are written as JSON, one object per run, so runs from different
+commits can be compared with ``compare.py``.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--files N] [--workers N] [--output FILE]
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from treegen import (
+    TreeSpec,
+    TreeStats,
+    add_spec_arguments,
+    generate_tree,
+    spec_from_args,
+)
+
+# Allow running the benchmark from a source checkout
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from OrganiserPro.dedupe import DedupeStats, find_duplicate_ids  # noqa: E402
+from OrganiserPro.plan import execute_plan  # noqa: E402
+from OrganiserPro.scanner import scan_files  # noqa: E402
+from OrganiserPro.sorter import plan_sort_by_type  # noqa: E402
+from OrganiserPro.workers import default_workers  # noqa: E402
+
+RESULT_VERSION = 1
+_MB = 1024 * 1024
+
+
+def peak_rss_kb() -> int:
+    """Return the peak resident set size of this process so far, in KiB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def git_revision() -> Dict[str, Any]:
+    """Return the commit being benchmarked and whether the tree is modified."""
+
+    def git(*args: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *args],
+                cwd=REPO_ROOT,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(status)}
+
+
+def timed(func: Callable[[], Any], repeat: int = 1) -> Tuple[Any, float]:
+    """Run ``func`` ``repeat`` times, returning its last result and best time.
+
+    Progress bars and other console output of the library are discarded.
+    """
+    best = float("inf")
+    result = None
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def stage(
+    seconds: float, files: int, bytes_read: Optional[int] = None, **extra: Any
+) -> Dict[str, Any]:
+    """Describe one timed stage, with its throughput."""
+    return {
+        "seconds": round(seconds, 6),
+        "files": files,
+        "files_per_s": round(files / seconds, 1) if seconds else None,
+        "bytes_read": bytes_read,
+        "mb_per_s": (
+            round(bytes_read / _MB / seconds, 1)
+            if bytes_read is not None and seconds
+            else None
+        ),
+        "peak_rss_kb": peak_rss_kb(),
+        **extra,
+    }
+
+
+def run_benchmark(
+    root: Path, spec: TreeSpec, workers: int, repeat: int
+) -> Dict[str, Any]:
+    """Generate a tree under ``root`` and time every stage on it."""
+    # Generate in a child process so its buffers do not count towards the
+    # peak RSS of the stages
+    with multiprocessing.get_context("fork").Pool(1) as pool:
+        tree: TreeStats = pool.apply(generate_tree, (root, spec))
+
+    stages: Dict[str, Dict[str, Any]] = {}
+    entries, seconds = timed(lambda: list(scan_files(root, recursive=True)), repeat)
+    stages["scan"] = stage(seconds, len(entries))
+
+    def find() -> Tuple[Any, DedupeStats]:
+        stats = DedupeStats()
+        scan = find_duplicate_ids(
+            str(root), recursive=True, stats=stats, workers=workers
+        )
+        return scan, stats
+
+    (scan, stats), seconds = timed(find, repeat)
+    stages["hash"] = stage(
+        seconds,
+        stats.files_scanned,
+        stats.bytes_read,
+        duplicate_groups=len(scan.groups),
+        hardlinked_files=stats.hardlinked_files,
+    )
+
+    def sort_plan() -> Any:
+        return plan_sort_by_type(
+            str(root), recursive=True, flatten=True, workers=workers
+        )
+
+    plan, seconds = timed(sort_plan, repeat)
+    stages["plan"] = stage(seconds, len(plan.actions))
+
+    result, seconds = timed(lambda: execute_plan(plan, check=False, workers=workers))
+    stages["move"] = stage(seconds, len(result.done), failed=len(result.failed))
+
+    return {
+        "benchmark": "pipeline",
+        "version": RESULT_VERSION,
+        "created": time.time(),
+        **git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "workers": workers,
+        "repeat": repeat,
+        "spec": asdict(spec),
+        "tree": asdict(tree),
+        "stages": stages,
+    }
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    """Print a human-readable summary of a report to stderr."""
+    tree = report["tree"]
+    print(
+        f"Tree: {tree['files']} files, {tree['bytes'] / _MB:.0f} MiB, "
+        f"{tree['directories']} directories",
+        file=sys.stderr,
+    )
+    print(
+        f"{'stage':<6} {'seconds':>9} {'files/s':>11} {'MiB/s':>9} {'peak RSS':>10}",
+        file=sys.stderr,
+    )
+    for name, result in report["stages"].items():
+        mb_per_s = result["mb_per_s"]
+        print(
+            f"{name:<6} {result['seconds']:>9.3f} {result['files_per_s'] or 0:>11,.0f} "
+            f"{'-' if mb_per_s is None else f'{mb_per_s:.1f}':>9} "
+            f"{result['peak_rss_kb'] / 1024:>8.1f}Mi",
+            file=sys.stderr,
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_spec_arguments(parser)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="hashing and scanning threads (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="runs of each read-only stage"
+    )
+    parser.add_argument(
+        "--dir",
+        type=Path,
+        default=None,
+        help="generate the tree here and keep it, instead of a temporary directory",
+    )
+    parser.add_argument(
+        "--output",
+        default="-",
+        help="file to write the JSON report to (default: stdout)",
+    )
+    args = parser.parse_args()
+    spec = spec_from_args(args)
+
+    if args.dir is not None:
+        report = run_benchmark(args.dir, spec, args.workers, args.repeat)
+    else:
+        with tempfile.TemporaryDirectory(prefix="organiserpro-bench-") as tmp:
+            report = run_benchmark(Path(tmp), spec, args.workers, args.repeat)
+
+    print_summary(report)
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Compare two reports written by ``bench_pipeline.py``.
+
+Prints the time of every stage in both reports and the ratio between them,
+and exits with status 1 if any stage got slower than ``--threshold``, so
+the comparison can gate a CI job.
+
+Usage:
+    python benchmarks/compare.py BASELINE.json CANDIDATE.json [--threshold 1.10]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+
+def load(path: Path) -> Dict[str, Any]:
+    """Read a benchmark report."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def describe(report: Dict[str, Any]) -> str:
+    """Name the commit a report was made from."""
+    commit = (report.get("commit") or "unknown")[:12]
+    return f"{commit}{' (modified)' if report.get('dirty') else ''}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.10,
+        help="slowest acceptable candidate/baseline time ratio",
+    )
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    if baseline.get("spec") != candidate.get("spec"):
+        print("Warning: the reports were made from different trees", file=sys.stderr)
+
+    print(f"baseline:  {describe(baseline)}")
+    print(f"candidate: {describe(candidate)}")
+    print(f"{'stage':<6} {'baseline':>10} {'candidate':>10} {'ratio':>7}")
+    regressed = []
+    for name, before in baseline["stages"].items():
+        after = candidate["stages"].get(name)
+        if after is None:
+            continue
+        ratio = after["seconds"] / before["seconds"] if before["seconds"] else 1.0
+        flag = "  slower" if ratio > args.threshold else ""
+        print(
+            f"{name:<6} {before['seconds']:>10.3f} {after['seconds']:>10.3f} "
+            f"{ratio:>7.2f}{flag}"
+        )
+        if flag:
+            regressed.append(name)
+
+    if regressed:
+        print(f"Slower than {args.threshold:.2f}x: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
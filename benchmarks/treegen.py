@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Deterministic generator of synthetic file trees for the OrganiserPro benchmarks.
+
+The same spec and seed always produce the same tree: the same directories,
+names, sizes and bytes. Besides unique files, a tree can contain exact
+duplicates, hard links and "near misses" (files with the same size as
+another but different content), so every stage of duplicate detection has
+work to do. Near misses differ only in the middle of the file, so they
+also survive the first/last block comparison.
+
+Usage:
+    python benchmarks/treegen.py DIRECTORY [--files N] [--depth N] [--seed N] ...
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+# Extensions given to generated files, so sorting by type has several buckets
+EXTENSIONS = ("jpg", "png", "pdf", "txt", "csv", "mp4", "zip", "docx")
+
+# Size of the random pool that file contents are cut from
+_POOL_SIZE = 1024 * 1024
+
+
+@dataclass
+class TreeSpec:
+    """What a synthetic tree looks like.
+
+    Attributes:
+        files: Number of files, including duplicates and hard links
+        depth: Levels of subdirectories below the root
+        fanout: Subdirectories per directory
+        median_size: Median file size in bytes; sizes are log-normal
+        size_sigma: Spread of the log-normal size distribution
+        max_size: Upper limit of any file size in bytes
+        duplicate_ratio: Share of files that are copies of another file
+        hardlink_ratio: Share of files that are hard links to another file
+        same_size_ratio: Share of files with the size of another file but
+            different content
+        seed: Seed of every random choice
+    """
+
+    files: int = 2000
+    depth: int = 3
+    fanout: int = 4
+    median_size: int = 64 * 1024
+    size_sigma: float = 1.5
+    max_size: int = 16 * 1024 * 1024
+    duplicate_ratio: float = 0.2
+    hardlink_ratio: float = 0.05
+    same_size_ratio: float = 0.1
+    seed: int = 0
+
+
+@dataclass
+class TreeStats:
+    """What was actually generated, for computing throughput."""
+
+    files: int = 0
+    directories: int = 0
+    bytes: int = 0
+    unique: int = 0
+    duplicates: int = 0
+    hardlinks: int = 0
+    same_size: int = 0
+
+
+def _directories(root: Path, depth: int, fanout: int) -> List[Path]:
+    """Return the root and every directory of a full tree below it."""
+    levels = [[root]]
+    for level in range(1, depth + 1):
+        levels.append(
+            [parent / f"dir{level}_{i}" for parent in levels[-1] for i in range(fanout)]
+        )
+    return [directory for level in levels for directory in level]
+
+
+def _content(pool: bytes, key: int, size: int) -> bytes:
+    """Return ``size`` bytes that are unique to ``key`` and cheap to make."""
+    chunks = [key.to_bytes(16, "little")]
+    needed = size - len(chunks[0])
+    offset = (key * 7919) % _POOL_SIZE
+    while needed > 0:
+        chunks.append(pool[offset : offset + needed])
+        needed -= len(chunks[-1])
+        offset = 0
+    return b"".join(chunks)[:size]
+
+
+def generate_tree(root: Path, spec: TreeSpec) -> TreeStats:
+    """
+    Create a synthetic tree under ``root``.
+
+    Args:
+        root: Directory to fill; created if needed, and best empty
+        spec: What to generate
+
+    Returns:
+        TreeStats: Counts of what was written
+    """
+    rng = random.Random(spec.seed)
+    pool = rng.getrandbits(_POOL_SIZE * 8).to_bytes(_POOL_SIZE, "little")
+    directories = _directories(Path(root), spec.depth, spec.fanout)
+    for directory in directories:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    stats = TreeStats(directories=len(directories))
+    # (path, content key, size) of every unique file, as originals to copy
+    originals: List[Tuple[Path, int, int]] = []
+    mu = math.log(max(spec.median_size, 1))
+    thresholds = (
+        spec.duplicate_ratio,
+        spec.duplicate_ratio + spec.hardlink_ratio,
+        spec.duplicate_ratio + spec.hardlink_ratio + spec.same_size_ratio,
+    )
+
+    for i in range(spec.files):
+        directory = rng.choice(directories)
+        path = directory / f"file_{i:07d}.{rng.choice(EXTENSIONS)}"
+        roll = rng.random()
+        original = rng.choice(originals) if originals else None
+
+        if original is not None and roll < thresholds[0]:
+            _, key, size = original
+            path.write_bytes(_content(pool, key, size))
+            stats.duplicates += 1
+        elif original is not None and roll < thresholds[1]:
+            os.link(original[0], path)
+            size = original[2]
+            stats.hardlinks += 1
+        elif original is not None and roll < thresholds[2] and original[2] >= 32:
+            _, key, size = original
+            data = bytearray(_content(pool, key, size))
+            middle = size // 2
+            data[middle : middle + 8] = (i + 1).to_bytes(8, "little")
+            path.write_bytes(bytes(data))
+            stats.same_size += 1
+        else:
+            size = min(int(rng.lognormvariate(mu, spec.size_sigma)), spec.max_size)
+            key = i + 1
+            path.write_bytes(_content(pool, key, size))
+            originals.append((path, key, size))
+            stats.unique += 1
+
+        stats.files += 1
+        stats.bytes += size
+    return stats
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add an option for every :class:`TreeSpec` field to a parser."""
+    defaults = TreeSpec()
+    parser.add_argument(
+        "--files", type=int, default=defaults.files, help="number of files"
+    )
+    parser.add_argument(
+        "--depth", type=int, default=defaults.depth, help="levels of subdirectories"
+    )
+    parser.add_argument(
+        "--fanout",
+        type=int,
+        default=defaults.fanout,
+        help="subdirectories per directory",
+    )
+    parser.add_argument(
+        "--median-kb",
+        type=float,
+        default=defaults.median_size / 1024,
+        help="median file size in KiB",
+    )
+    parser.add_argument(
+        "--size-sigma",
+        type=float,
+        default=defaults.size_sigma,
+        help="spread of the log-normal size distribution",
+    )
+    parser.add_argument(
+        "--max-mb",
+        type=float,
+        default=defaults.max_size / (1024 * 1024),
+        help="largest file size in MiB",
+    )
+    parser.add_argument(
+        "--duplicates",
+        type=float,
+        default=defaults.duplicate_ratio,
+        help="share of files that duplicate another",
+    )
+    parser.add_argument(
+        "--hardlinks",
+        type=float,
+        default=defaults.hardlink_ratio,
+        help="share of files that are hard links",
+    )
+    parser.add_argument(
+        "--same-size",
+        type=float,
+        default=defaults.same_size_ratio,
+        help="share of files with another's size but different content",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=defaults.seed, help="seed of the generator"
+    )
+
+
+def spec_from_args(args: argparse.Namespace) -> TreeSpec:
+    """Build a :class:`TreeSpec` from options added by add_spec_arguments."""
+    return TreeSpec(
+        files=args.files,
+        depth=args.depth,
+        fanout=args.fanout,
+        median_size=int(args.median_kb * 1024),
+        size_sigma=args.size_sigma,
+        max_size=int(args.max_mb * 1024 * 1024),
+        duplicate_ratio=args.duplicates,
+        hardlink_ratio=args.hardlinks,
+        same_size_ratio=args.same_size,
+        seed=args.seed,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory", type=Path, help="directory to fill")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    stats = generate_tree(args.directory, spec_from_args(args))
+    print(json.dumps(asdict(stats), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Tests for the persistent hash cache."""
+
+import os
+import time
+
+from OrganiserPro.cache import HashCache, default_cache_path
+from OrganiserPro.dedupe import get_file_hash
+
+
+def _file(tmp_path, content="contents"):
+    path = tmp_path / "a.txt"
+    path.write_text(content)
+    return path
+
+
+def test_default_path_honours_xdg_cache_home(tmp_path):
+    path = default_cache_path()
+
+    assert path == tmp_path / "cache" / "organiserpro" / "hashes.sqlite3"
+    with HashCache() as cache:
+        assert cache.path == path
+    assert path.exists()
+
+
+def test_digests_survive_reopening(tmp_path):
+    st = os.stat(_file(tmp_path))
+    with HashCache(tmp_path / "cache.db") as cache:
+        cache.put(st, "sha256", "abc")
+        cache.put(st, "mime", "text/plain")
+
+    with HashCache(tmp_path / "cache.db") as cache:
+        assert cache.get(st, "sha256") == "abc"
+        assert cache.get(st, "mime") == "text/plain"
+        assert cache.get(st, "blake2b") is None
+        assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_changed_file_is_a_miss(tmp_path):
+    path = _file(tmp_path)
+    st = os.stat(path)
+    with HashCache(tmp_path / "cache.db") as cache:
+        cache.put(st, "sha256", "abc")
+
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    with HashCache(tmp_path / "cache.db") as cache:
+        assert cache.get(os.stat(path), "sha256") is None
+
+    path.write_text("longer contents")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    with HashCache(tmp_path / "cache.db") as cache:
+        assert cache.get(os.stat(path), "sha256") is None
+
+
+def test_get_file_hash_uses_and_fills_the_cache(tmp_path):
+    path = _file(tmp_path)
+    with HashCache(tmp_path / "cache.db") as cache:
+        digest = get_file_hash(path, cache=cache)
+
+    # Change the contents but keep size and mtime: only a cache hit
+    # returns the old digest
+    st = os.stat(path)
+    path.write_text("CONTENTS")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    with HashCache(tmp_path / "cache.db") as cache:
+        assert get_file_hash(path, cache=cache) == digest
+        assert cache.hits == 1
+
+
+def test_close_evicts_old_and_surplus_entries(tmp_path):
+    with HashCache(tmp_path / "cache.db") as cache:
+        for ino in range(5):
+            cache.store(1, ino, 10, 0, "sha256", str(ino))
+        cache._flush()
+        cache._conn.execute("UPDATE hashes SET last_used = ? WHERE ino = 0", (0,))
+        cache._conn.execute(
+            "UPDATE hashes SET last_used = ? WHERE ino = 1", (time.time() - 1,)
+        )
+
+    HashCache(tmp_path / "cache.db", max_entries=3).close()
+
+    with HashCache(tmp_path / "cache.db") as cache:
+        found = [cache.lookup(1, ino, 10, 0, "sha256") for ino in range(5)]
+
+    # ino 0 expired, ino 1 was the least recently used of the other four
+    assert found == [None, None, "2", "3", "4"]
@@ -0,0 +1,122 @@
+"""Tests for pausing and cancelling long-running operations."""
+
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from OrganiserPro.cancel import (
+    CancelToken,
+    OperationCancelled,
+    cancel_on_interrupt,
+    checkpoint,
+)
+from OrganiserPro.dedupe import find_duplicates, get_file_hash
+from OrganiserPro.journal import execute_journaled, read_journal
+from OrganiserPro.plan import MOVE, OperationPlan, PlannedAction
+from OrganiserPro.workers import WorkerPool
+
+
+def _cancelled():
+    token = CancelToken()
+    token.cancel()
+    return token
+
+
+def test_checkpoint_without_token_is_a_no_op():
+    checkpoint(None)
+    checkpoint(CancelToken())
+    with pytest.raises(OperationCancelled):
+        checkpoint(_cancelled())
+
+
+def test_pause_blocks_until_resumed():
+    token = CancelToken()
+    token.pause()
+    passed = threading.Event()
+    worker = threading.Thread(target=lambda: (token.check(), passed.set()))
+    worker.start()
+
+    assert not passed.wait(0.1)
+    token.resume()
+    worker.join(1)
+    assert passed.is_set()
+
+
+def test_cancel_releases_a_paused_operation():
+    token = CancelToken()
+    token.pause()
+    raised = []
+
+    def work():
+        try:
+            token.check()
+        except OperationCancelled:
+            raised.append(True)
+
+    worker = threading.Thread(target=work)
+    worker.start()
+    time.sleep(0.05)
+    token.cancel()
+    worker.join(1)
+
+    assert raised == [True]
+    token.pause()
+    assert not token.paused
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_worker_pool_stops_starting_items(workers):
+    token = CancelToken()
+    seen = []
+
+    def work(item):
+        seen.append(item)
+        if item == 2:
+            token.cancel()
+        return item
+
+    with pytest.raises(OperationCancelled):
+        with WorkerPool(workers, cancel=token) as pool:
+            list(pool.map(work, range(1000)))
+
+    assert len(seen) < 1000
+
+
+def test_hashing_stops_within_a_large_file(tmp_path):
+    path = tmp_path / "big.bin"
+    path.write_bytes(b"x" * (1 << 20))
+
+    with pytest.raises(OperationCancelled):
+        get_file_hash(path, cancel=_cancelled())
+    with pytest.raises(OperationCancelled):
+        find_duplicates(str(tmp_path), cancel=_cancelled())
+
+
+def test_cancelled_plan_leaves_unstarted_moves_out_of_the_journal(tmp_path):
+    actions = []
+    for name in "abc":
+        (tmp_path / f"{name}.txt").write_text(name)
+        actions.append(
+            PlannedAction(
+                MOVE, str(tmp_path / f"{name}.txt"), str(tmp_path / "txt" / name)
+            )
+        )
+    plan = OperationPlan("test", str(tmp_path), actions).seal()
+
+    result, journal = execute_journaled(plan, cancel=_cancelled())
+
+    assert not result.done and len(result.cancelled) == 3
+    assert all(os.path.exists(a.source) for a in actions)
+    _, intents, _ = read_journal(journal)
+    assert intents == []
+
+
+def test_first_interrupt_cancels_the_token():
+    with cancel_on_interrupt() as token:
+        os.kill(os.getpid(), signal.SIGINT)
+        assert token.cancelled
+        with pytest.raises(KeyboardInterrupt):
+            os.kill(os.getpid(), signal.SIGINT)
@@ -0,0 +1,76 @@
+"""Tests for sorting files by their detected content type."""
+
+import pytest
+
+from OrganiserPro.cache import HashCache
+from OrganiserPro.scanner import stat_entry
+
+content = pytest.importorskip("OrganiserPro.content")
+if not content.content_detection_available():  # pragma: no cover
+    pytest.skip("python-magic is not installed", allow_module_level=True)
+
+PDF = b"%PDF-1.4\n1 0 obj\n<< /Type /Catalog >>\nendobj\n"
+PNG = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR" + b"\x00" * 32
+
+
+def _entry(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return stat_entry(str(path))
+
+
+@pytest.fixture
+def detector(tmp_path):
+    with HashCache(tmp_path / "cache.sqlite3") as cache:
+        yield content.ContentTypeDetector(cache=cache, workers=2)
+
+
+def test_extensionless_file_is_filed_by_content(tmp_path, detector):
+    assert detector.bucket(_entry(tmp_path, "report", PDF)) == "pdf"
+
+
+def test_mislabelled_file_is_filed_by_content(tmp_path, detector):
+    assert detector.bucket(_entry(tmp_path, "scan.jpg", PDF)) == "pdf"
+    assert detector.bucket(_entry(tmp_path, "logo.jpg", PNG)) == "png"
+
+
+def test_matching_and_text_extensions_are_kept(tmp_path, detector):
+    assert detector.bucket(_entry(tmp_path, "paper.pdf", PDF)) == "pdf"
+    assert detector.bucket(_entry(tmp_path, "data.csv", b"a,b\n1,2\n")) == "csv"
+
+
+def test_unknown_content_keeps_its_extension(tmp_path, detector):
+    blob = _entry(tmp_path, "blob.dat", b"\x00\x01\x02\x03" * 64)
+
+    assert detector.bucket(blob) == "dat"
+
+
+def test_prefetch_detects_in_input_order(tmp_path, detector):
+    entries = [
+        _entry(tmp_path, "a", PDF),
+        _entry(tmp_path, "b", PNG),
+        _entry(tmp_path, "c", PDF),
+    ]
+
+    detector.prefetch(entries)
+
+    assert [detector.mime_type(e) for e in entries] == [
+        "application/pdf",
+        "image/png",
+        "application/pdf",
+    ]
+
+
+def test_cached_types_are_not_read_again(tmp_path, monkeypatch):
+    entry = _entry(tmp_path, "report", PDF)
+    with HashCache(tmp_path / "cache.sqlite3") as cache:
+        content.ContentTypeDetector(cache=cache).detect(entry)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("file was opened")
+
+    monkeypatch.setattr("builtins.open", fail)
+    with HashCache(tmp_path / "cache.sqlite3") as cache:
+        assert content.ContentTypeDetector(cache=cache).detect(entry) == (
+            "application/pdf"
+        )
@@ -0,0 +1,114 @@
+"""Tests for finding and handling duplicate files."""
+
+import os
+
+from OrganiserPro.cache import HashCache
+from OrganiserPro.dedupe import (
+    PARTIAL_BLOCK_SIZE,
+    DedupeStats,
+    find_duplicates,
+    handle_duplicates,
+)
+from OrganiserPro.journal import Journal, undo_journal
+
+BIG = 5 * PARTIAL_BLOCK_SIZE
+
+
+def _files(tmp_path, *names, content="same"):
+    paths = []
+    for name in names:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        paths.append(path)
+    return paths
+
+
+def _tree(tmp_path):
+    """Lay out files that are ruled out at each stage of the pipeline."""
+    (tmp_path / "unique.bin").write_bytes(b"u" * 100)
+    (tmp_path / "a.bin").write_bytes(b"x" * BIG)
+    (tmp_path / "b.bin").write_bytes(b"x" * BIG)
+    (tmp_path / "c.bin").write_bytes(b"y" + b"x" * (BIG - 1))
+    _files(tmp_path, "s1.txt", "s2.txt", content="small")
+
+
+def _names(duplicates):
+    return sorted(sorted(p.name for p in paths) for paths in duplicates.values())
+
+
+def test_pipeline_reads_only_what_it_must(tmp_path):
+    _tree(tmp_path)
+    stats = DedupeStats()
+
+    duplicates = find_duplicates(str(tmp_path), stats=stats, workers=2)
+
+    assert _names(duplicates) == [["a.bin", "b.bin"], ["s1.txt", "s2.txt"]]
+    assert stats.files_scanned == 6
+    assert stats.bytes_scanned == 100 + 3 * BIG + 10
+    assert stats.bytes_skipped_by_size == 100
+    assert stats.bytes_read_partial == 3 * 2 * PARTIAL_BLOCK_SIZE + 10
+    assert stats.bytes_skipped_by_partial == BIG - 2 * PARTIAL_BLOCK_SIZE
+    assert stats.bytes_read_full == 2 * BIG
+    assert stats.bytes_cached == 0 and stats.cache_hits == 0
+
+
+def test_cached_rerun_reads_nothing(tmp_path):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    _tree(tree)
+    first = DedupeStats()
+    with HashCache(tmp_path / "cache.db") as cache:
+        expected = _names(find_duplicates(str(tree), stats=first, cache=cache))
+
+    second = DedupeStats()
+    with HashCache(tmp_path / "cache.db") as cache:
+        duplicates = find_duplicates(str(tree), stats=second, cache=cache)
+
+    assert _names(duplicates) == expected
+    assert second.bytes_read == 0
+    assert second.bytes_cached_partial == first.bytes_read_partial
+    assert second.bytes_cached_full == first.bytes_read_full
+    # Three partial hashes, two small files and two full hashes
+    assert second.cache_hits == 7
+
+
+def test_hard_links_are_not_duplicates(tmp_path):
+    (tmp_path / "a.bin").write_bytes(b"x" * BIG)
+    os.link(tmp_path / "a.bin", tmp_path / "link.bin")
+    stats = DedupeStats()
+
+    assert find_duplicates(str(tmp_path), stats=stats) == {}
+    assert stats.hardlinked_files == 1
+    assert stats.bytes_read == 0
+
+
+def test_verify_bytes_confirms_groups(tmp_path):
+    _tree(tmp_path)
+
+    duplicates = find_duplicates(str(tmp_path), verify="bytes")
+
+    assert _names(duplicates) == [["a.bin", "b.bin"], ["s1.txt", "s2.txt"]]
+
+
+def test_move_duplicates_resolves_collisions_and_undoes(tmp_path):
+    files = _files(tmp_path, "a/x.txt", "b/x.txt", "c/x.txt")
+    (tmp_path / "dupes").mkdir()
+    (tmp_path / "dupes" / "x.txt").write_text("unrelated")
+    journal_path = tmp_path / "journal.jsonl"
+
+    with Journal(journal_path, "dedupe", str(tmp_path)) as journal:
+        handle_duplicates(
+            {"h": files}, move_to=str(tmp_path / "dupes"), journal=journal
+        )
+
+    dupes = tmp_path / "dupes"
+    assert sorted(p.name for p in dupes.iterdir()) == ["x.txt", "x_1.txt", "x_2.txt"]
+    assert (dupes / "x.txt").read_text() == "unrelated"
+    assert files[0].exists() and not files[1].exists() and not files[2].exists()
+
+    result = undo_journal(journal_path)
+
+    assert result.restored == 2
+    assert all(path.read_text() == "same" for path in files)
+    assert (dupes / "x.txt").read_text() == "unrelated"
@@ -0,0 +1,113 @@
+"""Tests for the hash algorithms used to find duplicates."""
+
+import hashlib
+
+import pytest
+
+from OrganiserPro import dedupe, hashing
+from OrganiserPro.dedupe import files_equal, find_duplicates, get_file_hash
+from OrganiserPro.hashing import available_algorithms, new_hasher
+
+
+def _names(duplicates):
+    return sorted(sorted(p.name for p in paths) for paths in duplicates.values())
+
+
+def test_builtin_algorithms_are_always_available():
+    assert {"sha256", "blake2b", "blake2s"} <= set(available_algorithms())
+    assert hashing.DEFAULT_ALGORITHM == "sha256"
+
+
+def test_unknown_algorithm_names_the_choices():
+    with pytest.raises(ValueError, match="sha256"):
+        new_hasher("md4")
+
+
+@pytest.mark.parametrize("algorithm", available_algorithms())
+def test_get_file_hash_matches_reference(tmp_path, algorithm):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"abc" * 100_000)
+    expected = hashing.HASH_ALGORITHMS[algorithm]()
+    expected.update(b"abc" * 100_000)
+
+    assert get_file_hash(path, algorithm=algorithm) == expected.hexdigest()
+
+
+def test_sha256_is_the_default(tmp_path):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"abc")
+
+    assert get_file_hash(path) == hashlib.sha256(b"abc").hexdigest()
+
+
+@pytest.mark.parametrize("algorithm", available_algorithms())
+def test_every_algorithm_finds_the_same_groups(tmp_path, algorithm):
+    for name, content in (("a", "x"), ("b", "x"), ("c", "y")):
+        (tmp_path / f"{name}.txt").write_text(content * 10_000)
+
+    duplicates = find_duplicates(str(tmp_path), algorithm=algorithm)
+
+    assert _names(duplicates) == [["a.txt", "b.txt"]]
+
+
+def _colliding(tmp_path, monkeypatch):
+    """Make a hash under which every file of the same size collides."""
+
+    class Constant:
+        def update(self, data):
+            pass
+
+        def hexdigest(self):
+            return "0"
+
+    monkeypatch.setitem(hashing.HASH_ALGORITHMS, "constant", Constant)
+    for name, content in (("a", "x"), ("b", "x"), ("c", "y")):
+        (tmp_path / f"{name}.txt").write_text(content * 10_000)
+
+
+@pytest.mark.parametrize("verify", ["sha256", "bytes"])
+def test_verify_splits_false_matches(tmp_path, monkeypatch, verify):
+    _colliding(tmp_path, monkeypatch)
+
+    assert _names(find_duplicates(str(tmp_path), algorithm="constant")) == [
+        ["a.txt", "b.txt", "c.txt"]
+    ]
+    duplicates = find_duplicates(str(tmp_path), algorithm="constant", verify=verify)
+
+    assert _names(duplicates) == [["a.txt", "b.txt"]]
+
+
+def test_verify_sha256_is_skipped_for_sha256(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(dedupe, "_verify_groups", lambda *a, **k: calls.append(a))
+    for name in "ab":
+        (tmp_path / f"{name}.txt").write_text("x")
+
+    find_duplicates(str(tmp_path), verify="sha256")
+
+    assert calls == []
+
+
+def test_files_equal(tmp_path):
+    (tmp_path / "a").write_bytes(b"x" * 100_000)
+    (tmp_path / "b").write_bytes(b"x" * 100_000)
+    (tmp_path / "c").write_bytes(b"x" * 99_999 + b"y")
+
+    assert files_equal(tmp_path / "a", tmp_path / "b")
+    assert not files_equal(tmp_path / "a", tmp_path / "c")
+    assert not files_equal(tmp_path / "a", tmp_path / "missing")
+
+
+@pytest.mark.parametrize("workers", [1, 8])
+def test_hash_engine_keeps_input_order(tmp_path, workers):
+    paths = []
+    for i in range(50):
+        path = tmp_path / f"{i}.bin"
+        path.write_bytes(str(i).encode() * (1000 * (50 - i)))
+        paths.append(path)
+
+    with hashing.HashEngine(workers) as engine:
+        digests = list(engine.map(get_file_hash, paths))
+
+    assert digests == [get_file_hash(path) for path in paths]
+    assert engine._executor is None
@@ -0,0 +1,52 @@
+"""Tests for the compact file index."""
+
+import os
+
+from OrganiserPro.index import FileIndex
+from OrganiserPro.scanner import FileEntry
+
+
+def _entry(path, size, inode=1):
+    return FileEntry(path, os.path.basename(path), size, 123, inode, 7)
+
+
+def test_paths_and_entries_round_trip():
+    entries = [
+        _entry("/photos/a.jpg", 10, 1),
+        _entry("/photos/b.jpg", 20, 2),
+        _entry("/docs/a.jpg", 10, 3),
+    ]
+    index = FileIndex()
+
+    ids = [index.add(entry) for entry in entries]
+
+    assert ids == [0, 1, 2] and len(index) == 3
+    assert [index.entry(i) for i in ids] == entries
+    assert index.path(2) == "/docs/a.jpg"
+    # Each directory is stored once
+    assert index._dirs == ["/photos", "/docs"]
+
+
+def test_same_size_runs_skip_unique_sizes():
+    index = FileIndex()
+    index.extend(
+        _entry(f"/d/{name}", size)
+        for name, size in [("a", 5), ("b", 9), ("c", 5), ("d", 1), ("e", 9), ("f", 5)]
+    )
+
+    runs = [(size, list(ids)) for size, ids in index.same_size_runs()]
+
+    assert runs == [(5, [0, 2, 5]), (9, [1, 4])]
+
+
+def test_same_size_runs_of_empty_index():
+    assert list(FileIndex().same_size_runs()) == []
+
+
+def test_large_sizes_and_inodes_fit():
+    index = FileIndex()
+    index.add(_entry("/d/a", 2**40, 2**63 + 1))
+    index.add(_entry("/d/b", 2**40, 5))
+
+    assert index.entry(0).inode == 2**63 + 1
+    assert [list(ids) for _, ids in index.same_size_runs()] == [[0, 1]]
@@ -0,0 +1,168 @@
+"""Tests for journaled plans and undoing them."""
+
+import os
+
+from OrganiserPro.journal import execute_journaled, read_journal, undo_journal
+from OrganiserPro.plan import DELETE, LINK, MOVE, OperationPlan, PlannedAction
+
+
+def _write(path, content="same contents"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return str(path)
+
+
+def _run(tmp_path, *actions):
+    plan = OperationPlan("test", str(tmp_path), list(actions)).seal()
+    result, journal = execute_journaled(plan)
+    assert not result.failed
+    return journal
+
+
+def test_undo_move_restores_file_and_removes_created_folder(tmp_path):
+    source = _write(tmp_path / "a.txt", "a")
+    target = str(tmp_path / "txt" / "a.txt")
+
+    journal = _run(tmp_path, PlannedAction(MOVE, source, target))
+    assert not os.path.exists(source) and os.path.exists(target)
+
+    result = undo_journal(journal)
+
+    assert result.restored == 1 and not result.skipped and not result.failed
+    assert (tmp_path / "a.txt").read_text() == "a"
+    assert not (tmp_path / "txt").exists()
+
+
+def test_undo_chained_moves_newest_first(tmp_path):
+    source = _write(tmp_path / "a.txt", "a")
+    middle = str(tmp_path / "one" / "a.txt")
+    final = str(tmp_path / "one" / "two" / "a.txt")
+
+    journal = _run(
+        tmp_path,
+        PlannedAction(MOVE, source, middle),
+        PlannedAction(MOVE, middle, final),
+    )
+    result = undo_journal(journal)
+
+    assert result.restored == 2 and not result.failed
+    assert (tmp_path / "a.txt").read_text() == "a"
+
+
+def test_undo_move_never_overwrites(tmp_path):
+    source = _write(tmp_path / "a.txt", "a")
+    target = str(tmp_path / "txt" / "a.txt")
+    journal = _run(tmp_path, PlannedAction(MOVE, source, target))
+    _write(tmp_path / "a.txt", "new file")
+
+    result = undo_journal(journal)
+
+    assert result.restored == 0 and len(result.skipped) == 1
+    assert (tmp_path / "a.txt").read_text() == "new file"
+    assert os.path.exists(target)
+
+
+def test_undo_delete_recreates_file_from_kept_original(tmp_path):
+    kept = _write(tmp_path / "kept.txt")
+    duplicate = _write(tmp_path / "copy.txt")
+    mode = os.stat(duplicate).st_mode
+
+    journal = _run(tmp_path, PlannedAction(DELETE, duplicate, kept))
+    assert not os.path.exists(duplicate)
+
+    result = undo_journal(journal)
+
+    assert result.restored == 1
+    assert (tmp_path / "copy.txt").read_text() == "same contents"
+    assert os.stat(duplicate).st_mode == mode
+    assert not os.path.samefile(duplicate, kept)
+
+
+def test_undo_delete_skips_changed_original(tmp_path):
+    kept = _write(tmp_path / "kept.txt")
+    duplicate = _write(tmp_path / "copy.txt")
+    journal = _run(tmp_path, PlannedAction(DELETE, duplicate, kept))
+    # Same size, different contents: only the mtime gives it away
+    _write(tmp_path / "kept.txt", "SAME CONTENTS")
+    os.utime(kept, ns=(0, 0))
+
+    result = undo_journal(journal)
+
+    assert result.restored == 0 and len(result.skipped) == 1
+    assert not os.path.exists(duplicate)
+
+
+def test_undo_link_splits_hard_link(tmp_path):
+    kept = _write(tmp_path / "kept.txt")
+    duplicate = _write(tmp_path / "copy.txt")
+
+    journal = _run(tmp_path, PlannedAction(LINK, duplicate, kept))
+    assert os.path.samefile(duplicate, kept)
+
+    result = undo_journal(journal)
+
+    assert result.restored == 1
+    assert not os.path.samefile(duplicate, kept)
+    assert (tmp_path / "copy.txt").read_text() == "same contents"
+
+
+def test_undo_ignores_temporary_files_left_by_a_crash(tmp_path):
+    kept = _write(tmp_path / "kept.txt")
+    duplicate = _write(tmp_path / "copy.txt")
+    journal = _run(tmp_path, PlannedAction(DELETE, duplicate, kept))
+    _write(tmp_path / ".copy.txt.organiserpro-undo", "leftover")
+
+    result = undo_journal(journal)
+
+    assert result.restored == 1 and not result.failed
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_file()) == [
+        ".copy.txt.organiserpro-undo",
+        "copy.txt",
+        "kept.txt",
+    ]
+
+
+def test_undo_twice_is_harmless(tmp_path):
+    source = _write(tmp_path / "a.txt", "a")
+    journal = _run(tmp_path, PlannedAction(MOVE, source, str(tmp_path / "b.txt")))
+
+    assert undo_journal(journal).restored == 1
+    second = undo_journal(journal)
+
+    assert second.restored == 0 and len(second.skipped) == 1
+    assert (tmp_path / "a.txt").read_text() == "a"
+
+
+def test_journal_records_every_action(tmp_path):
+    kept = _write(tmp_path / "kept.txt")
+    duplicate = _write(tmp_path / "copy.txt")
+
+    journal = _run(tmp_path, PlannedAction(DELETE, duplicate, kept))
+    header, intents, created_dirs = read_journal(journal)
+
+    assert header["operation"] == "test"
+    assert [(i["action"], i["done"]) for i in intents] == [(DELETE, True)]
+    assert intents[0]["kept_mtime_ns"] == os.stat(kept).st_mtime_ns
+    assert created_dirs == []
+
+
+def test_journal_records_created_folders(tmp_path):
+    source = _write(tmp_path / "a.txt", "a")
+    target = str(tmp_path / "one" / "two" / "a.txt")
+
+    journal = _run(tmp_path, PlannedAction(MOVE, source, target))
+    _, _, created_dirs = read_journal(journal)
+
+    assert created_dirs == [str(tmp_path / "one"), str(tmp_path / "one" / "two")]
+
+
+def test_undo_keeps_folders_that_existed_before(tmp_path):
+    (tmp_path / "txt").mkdir()
+    source = _write(tmp_path / "a.txt", "a")
+    target = str(tmp_path / "txt" / "a.txt")
+
+    journal = _run(tmp_path, PlannedAction(MOVE, source, target))
+    result = undo_journal(journal)
+
+    assert result.restored == 1
+    assert (tmp_path / "txt").is_dir()
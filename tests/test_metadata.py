@@ -0,0 +1,103 @@
+"""Tests for reading the dates files are sorted by."""
+
+import os
+from datetime import datetime
+
+import pytest
+from PIL import Image
+
+from OrganiserPro import metadata
+from OrganiserPro.cache import HashCache
+from OrganiserPro.metadata import CaptureTimeReader, exif_capture_time
+from OrganiserPro.scanner import scan_files
+
+TAKEN = datetime(2019, 7, 14, 9, 30, 5).timestamp()
+MTIME = datetime(2024, 1, 1).timestamp()
+
+
+def _photo(path, original="2019:07:14 09:30:05", ifd0=None):
+    exif = Image.Exif()
+    if ifd0 is not None:
+        exif[metadata._DATETIME] = ifd0
+    if original is not None:
+        exif.get_ifd(metadata._EXIF_IFD)[metadata._DATETIME_ORIGINAL] = original
+    Image.new("RGB", (4, 4)).save(path, exif=exif)
+    os.utime(path, (MTIME, MTIME))
+    return str(path)
+
+
+def _entries(directory):
+    return {entry.name: entry for entry in scan_files(str(directory))}
+
+
+def test_capture_time_prefers_original_date(tmp_path):
+    path = _photo(tmp_path / "a.jpg", ifd0="2020:01:01 00:00:00")
+
+    assert exif_capture_time(path) == TAKEN
+
+
+def test_capture_time_falls_back_to_ifd0_date(tmp_path):
+    path = _photo(tmp_path / "a.jpg", original=None, ifd0="2019:07:14 09:30:05")
+
+    assert exif_capture_time(path) == TAKEN
+
+
+@pytest.mark.parametrize("original", [None, "    :  :     :  :  ", "garbage"])
+def test_missing_or_blank_dates_are_ignored(tmp_path, original):
+    assert exif_capture_time(_photo(tmp_path / "a.jpg", original=original)) is None
+
+
+def test_unreadable_and_non_images_have_no_capture_time(tmp_path):
+    (tmp_path / "broken.jpg").write_bytes(b"not a jpeg")
+    (tmp_path / "notes.txt").write_text("2019:07:14 09:30:05")
+
+    assert exif_capture_time(str(tmp_path / "broken.jpg")) is None
+    assert exif_capture_time(str(tmp_path / "notes.txt")) is None
+
+
+def test_old_pillow_without_get_ifd_falls_back(tmp_path, monkeypatch):
+    path = _photo(tmp_path / "a.jpg", ifd0="2019:07:14 09:30:05")
+    monkeypatch.delattr(Image.Exif, "get_ifd")
+
+    assert exif_capture_time(path) == TAKEN
+
+
+def test_reader_sources(tmp_path):
+    _photo(tmp_path / "photo.jpg")
+    _photo(tmp_path / "plain.jpg", original=None)
+    (tmp_path / "notes.txt").write_text("notes")
+    os.utime(tmp_path / "notes.txt", (MTIME, MTIME))
+    entries = _entries(tmp_path)
+
+    def dates(source):
+        reader = CaptureTimeReader(source, workers=2)
+        reader.prefetch(entries.values())
+        return {name: reader.timestamp(e) for name, e in entries.items()}
+
+    assert dates("auto") == {"photo.jpg": TAKEN, "plain.jpg": MTIME, "notes.txt": MTIME}
+    assert dates("exif") == {"photo.jpg": TAKEN, "plain.jpg": None, "notes.txt": None}
+    assert set(dates("mtime").values()) == {MTIME}
+    with pytest.raises(ValueError):
+        CaptureTimeReader("birthday")
+
+
+def test_reader_caches_capture_times(tmp_path, monkeypatch):
+    photos = tmp_path / "photos"
+    photos.mkdir()
+    _photo(photos / "photo.jpg")
+    _photo(photos / "plain.jpg", original=None)
+    with HashCache(tmp_path / "cache.db") as cache:
+        reader = CaptureTimeReader("exif", cache=cache)
+        reader.prefetch(_entries(photos).values())
+
+    def fail(path):
+        raise AssertionError(f"{path} was read again")
+
+    monkeypatch.setattr(metadata, "exif_capture_time", fail)
+    with HashCache(tmp_path / "cache.db") as cache:
+        reader = CaptureTimeReader("exif", cache=cache)
+        entries = _entries(photos)
+        reader.prefetch(entries.values())
+
+        assert reader.timestamp(entries["photo.jpg"]) == TAKEN
+        assert reader.timestamp(entries["plain.jpg"]) is None
@@ -0,0 +1,86 @@
+"""Tests for the metrics exported with --metrics-out."""
+
+import json
+
+from click.testing import CliRunner
+
+from OrganiserPro import metrics
+from OrganiserPro.cli import cli
+from OrganiserPro.metrics import Histogram, Metrics, count, observe
+
+
+def test_counting_without_an_active_run_is_ignored():
+    count("moves")
+    observe("full_hash_seconds", 1.0)
+
+    assert metrics._active is None
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram((0.1, 1.0))
+
+    assert histogram.quantile(0.5) is None
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.99) == float("inf")
+
+
+def test_prometheus_export_has_cumulative_buckets():
+    run = Metrics("dedupe")
+    run.add("moves", 3)
+    run.observe("full_hash_seconds", 0.003)
+    run.observe("full_hash_seconds", 20.0)
+    run.stop()
+
+    lines = run.to_prometheus().splitlines()
+
+    assert 'organiserpro_moves_total{command="dedupe"} 3' in lines
+    assert (
+        'organiserpro_full_hash_seconds_bucket{command="dedupe",le="0.005"} 1'
+        in lines
+    )
+    assert (
+        'organiserpro_full_hash_seconds_bucket{command="dedupe",le="+Inf"} 2'
+        in lines
+    )
+    assert 'organiserpro_last_run_success{command="dedupe"} 1' in lines
+
+
+def _tree(tmp_path):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    for name in "ab":
+        (tree / f"{name}.txt").write_text("same")
+    return tree
+
+
+def test_metrics_out_json(tmp_path):
+    tree = _tree(tmp_path)
+    out = tmp_path / "run.json"
+
+    result = CliRunner().invoke(
+        cli, ["--metrics-out", str(out), "dedupe", str(tree), "--no-cache", "--dry-run"]
+    )
+
+    assert result.exit_code == 0, result.output
+    data = json.loads(out.read_text())
+    assert data["command"] == "dedupe" and data["success"]
+    assert data["counters"]["entries_scanned"] == 2
+    assert data["counters"]["files_hashed"] == 2
+    assert data["counters"]["bytes_hashed"] == 8
+    assert data["histograms"]["full_hash_seconds"]["count"] == 2
+    assert list(tmp_path.glob(".run.json.*")) == []
+
+
+def test_metrics_out_prometheus_records_failure(tmp_path):
+    out = tmp_path / "run.prom"
+
+    result = CliRunner().invoke(
+        cli, ["--metrics-out", str(out), "apply", str(tmp_path / "missing.json")]
+    )
+
+    assert result.exit_code != 0
+    assert 'organiserpro_last_run_success{command="apply"} 0' in out.read_text()
@@ -0,0 +1,77 @@
+"""Tests for planning and executing moves."""
+
+import os
+
+from OrganiserPro.mover import (
+    MoveOp,
+    MovePlanner,
+    execute_moves,
+    replace_with_hardlink,
+    unique_name,
+)
+
+
+def test_unique_name_appends_first_free_counter():
+    assert unique_name("a.txt", set()) == "a.txt"
+    assert unique_name("a.txt", {"a.txt"}) == "a_1.txt"
+    assert unique_name("a.txt", {"a.txt", "a_1.txt"}) == "a_2.txt"
+    assert unique_name("README", {"README"}) == "README_1"
+
+
+def test_planner_avoids_existing_files(tmp_path):
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "report.pdf").write_text("existing")
+
+    target = MovePlanner().plan(str(tmp_path / "report.pdf"), str(tmp_path / "docs"))
+
+    assert target == str(tmp_path / "docs" / "report_1.pdf")
+
+
+def test_planner_avoids_names_planned_earlier(tmp_path):
+    planner = MovePlanner()
+    target_dir = str(tmp_path / "docs")
+
+    targets = [
+        planner.plan(str(tmp_path / sub / "report.pdf"), target_dir)
+        for sub in ("one", "two", "three")
+    ]
+
+    assert [os.path.basename(t) for t in targets] == [
+        "report.pdf",
+        "report_1.pdf",
+        "report_2.pdf",
+    ]
+    assert [op.target for op in planner.ops] == targets
+
+
+def test_execute_moves_renames_around_late_collisions(tmp_path):
+    source = tmp_path / "a.txt"
+    source.write_text("moved")
+    target = tmp_path / "out" / "a.txt"
+    target.parent.mkdir()
+    target.write_text("already here")
+
+    result = execute_moves([MoveOp(str(source), str(target))])
+
+    assert not result.failed
+    assert result.moved[0].target == str(tmp_path / "out" / "a_1.txt")
+    assert target.read_text() == "already here"
+    assert (tmp_path / "out" / "a_1.txt").read_text() == "moved"
+
+
+def test_replace_with_hardlink_reclaims_space_and_leaves_no_temp(tmp_path):
+    original = tmp_path / "a.txt"
+    duplicate = tmp_path / "b.txt"
+    original.write_text("same")
+    duplicate.write_text("same")
+    # A temporary link left behind by a crashed run must not get in the way
+    (tmp_path / ".b.txt.organiserpro-link").write_text("leftover")
+
+    assert replace_with_hardlink(original, duplicate) == 4
+    assert os.path.samefile(original, duplicate)
+    assert replace_with_hardlink(original, duplicate) == 0
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        ".b.txt.organiserpro-link",
+        "a.txt",
+        "b.txt",
+    ]
@@ -0,0 +1,69 @@
+"""Tests for saved plans and refusing to run stale ones."""
+
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from OrganiserPro.commands import apply
+from OrganiserPro.journal import execute_journaled
+from OrganiserPro.plan import MOVE, OperationPlan, PlannedAction, StalePlanError
+
+
+@pytest.fixture
+def saved_plan(tmp_path):
+    source = tmp_path / "a.txt"
+    source.write_text("a")
+    plan = OperationPlan(
+        "test",
+        str(tmp_path),
+        [PlannedAction(MOVE, str(source), str(tmp_path / "txt" / "a.txt"))],
+    ).seal()
+    path = tmp_path / "plan.json"
+    plan.save(str(path))
+    return source, path
+
+
+def _touch(path):
+    path.write_text("changed")
+    os.utime(path, ns=(0, 0))
+
+
+def test_plan_is_current_until_a_file_changes(saved_plan):
+    source, path = saved_plan
+    plan = OperationPlan.load(str(path))
+
+    assert plan.is_current()
+    _touch(source)
+    assert not plan.is_current()
+
+
+def test_execute_refuses_stale_plan(saved_plan):
+    source, path = saved_plan
+    _touch(source)
+
+    with pytest.raises(StalePlanError):
+        execute_journaled(OperationPlan.load(str(path)))
+    assert source.exists()
+
+
+def test_apply_refuses_stale_plan(saved_plan):
+    source, path = saved_plan
+    _touch(source)
+
+    result = CliRunner().invoke(apply, [str(path)], standalone_mode=False)
+
+    assert result.return_value == 1
+    assert "--force" in result.output
+    assert source.exists()
+
+
+def test_apply_force_runs_stale_plan(saved_plan):
+    source, path = saved_plan
+    _touch(source)
+
+    result = CliRunner().invoke(apply, [str(path), "--force"], standalone_mode=False)
+
+    assert result.return_value == 0
+    assert not source.exists()
+    assert (source.parent / "txt" / "a.txt").read_text() == "changed"
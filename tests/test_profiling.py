@@ -0,0 +1,53 @@
+"""Tests for per-phase timings and cProfile dumps."""
+
+import pstats
+
+from click.testing import CliRunner
+
+from OrganiserPro import profiling
+from OrganiserPro.cli import cli
+from OrganiserPro.profiling import span, start_profiling, stop_profiling
+
+
+def test_spans_are_free_when_not_profiling():
+    with span("scan") as current:
+        current.bytes_read = 10
+
+    assert profiling._active is None
+
+
+def test_spans_add_up_per_phase():
+    profiler = start_profiling()
+    try:
+        for size in (100, 200):
+            with span("hash") as current:
+                current.bytes_read = size
+        with span("scan"):
+            pass
+    finally:
+        assert stop_profiling() is profiler
+
+    assert list(profiler.phases) == ["hash", "scan"]
+    assert profiler.phases["hash"].calls == 2
+    assert profiler.phases["hash"].bytes_read == 300
+    assert profiler.wall >= profiler.phases["hash"].wall
+    assert profiler.summary()[-1].startswith("total: ")
+    assert stop_profiling() is None
+
+
+def test_profile_out_writes_a_cprofile_dump(tmp_path):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    for name in "ab":
+        (tree / f"{name}.txt").write_text("same")
+    out = tmp_path / "run.pstats"
+
+    result = CliRunner().invoke(
+        cli, ["--profile-out", str(out), "dedupe", str(tree), "--no-cache", "--dry-run"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Profile" in result.output
+    assert "hash" in result.output
+    assert pstats.Stats(str(out)).total_calls > 0
+    assert profiling._active is None
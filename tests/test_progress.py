@@ -0,0 +1,84 @@
+"""Tests for progress events and their rich renderer."""
+
+import io
+import threading
+
+from rich.console import Console
+
+from OrganiserPro.progress import ProgressEvent, ProgressReporter, RichProgress
+
+
+def test_reporter_sends_first_and_last_event():
+    events = []
+
+    with ProgressReporter(events.append, "full", "Hashing", 3, 300) as reporter:
+        for _ in range(3):
+            reporter.advance(1, 100)
+
+    assert events[0] == ProgressEvent("full", "Hashing", 0, 3, 0, 300, False)
+    assert events[-1] == ProgressEvent("full", "Hashing", 3, 3, 300, 300, True)
+    assert [e.finished for e in events].count(True) == 1
+
+
+def test_reporter_limits_event_rate():
+    events = []
+    reporter = ProgressReporter(events.append, "scan", "Scanning", interval=60)
+
+    for _ in range(1000):
+        reporter.advance()
+    reporter.finish()
+    reporter.finish()
+
+    # The first call is due at once; the rest wait for the interval
+    assert len(events) == 3
+    assert events[-1].done == 1000 and events[-1].finished
+
+
+def test_reporter_counts_from_many_threads():
+    events = []
+    reporter = ProgressReporter(events.append, "partial", "Headers", interval=0)
+
+    def work():
+        for _ in range(500):
+            reporter.advance(1, 2)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    reporter.finish()
+
+    assert (events[-1].done, events[-1].bytes_done) == (2000, 4000)
+
+
+def test_reporter_without_callback_counts_nothing():
+    reporter = ProgressReporter(None, "scan", "Scanning")
+    reporter.advance(5, 10)
+    reporter.finish()
+
+    assert reporter.done == 0
+
+
+def test_fraction_prefers_bytes():
+    assert ProgressEvent("full", "", 1, 4, 75, 100).fraction == 0.75
+    assert ProgressEvent("full", "", 1, 4).fraction == 0.25
+    assert ProgressEvent("scan", "", 10, None).fraction is None
+    assert ProgressEvent("scan", "", 10, None, finished=True).fraction == 1.0
+
+
+def test_rich_progress_draws_one_bar_per_phase():
+    output = io.StringIO()
+    console = Console(file=output, force_terminal=True, width=100)
+
+    with RichProgress(console) as progress:
+        progress(ProgressEvent("scan", "Scanning", 0, None))
+        progress(ProgressEvent("scan", "Scanning", 7, None, finished=True))
+        progress(ProgressEvent("full", "Hashing", 1, 2, 1024, 2048))
+        progress(ProgressEvent("full", "Hashing", 2, 2, 2048, 2048, True))
+
+        tasks = {task.description: task for task in progress._progress.tasks}
+
+    assert (tasks["Scanning"].completed, tasks["Scanning"].total) == (7, 7)
+    assert (tasks["Hashing"].completed, tasks["Hashing"].total) == (2048, 2048)
+    assert "2/2 files, 2K/2K" in output.getvalue()
@@ -0,0 +1,54 @@
+"""Tests for falling back when a filesystem cannot share extents."""
+
+import errno
+import os
+
+from OrganiserPro import dedupe, snapshot
+from OrganiserPro.reflink import ReflinkNotSupported
+
+
+def _unsupported(*args):
+    raise ReflinkNotSupported(errno.EOPNOTSUPP, os.strerror(errno.EOPNOTSUPP))
+
+
+def test_reflink_dedupe_skips_unsupported_filesystem(tmp_path, monkeypatch):
+    calls = []
+
+    def dedupe_file_range(original, duplicate):
+        calls.append(duplicate)
+        _unsupported()
+
+    monkeypatch.setattr(dedupe, "dedupe_file_range", dedupe_file_range)
+    duplicates = {}
+    for group in ("a", "b"):
+        paths = [tmp_path / f"{group}{i}.bin" for i in range(2)]
+        for path in paths:
+            path.write_text(group * 100)
+        duplicates[group] = paths
+
+    dedupe.handle_duplicates(duplicates, reflink=True)
+
+    # The first failure marks the device, so the second group is not tried
+    assert calls == [tmp_path / "a1.bin"]
+    for group, paths in duplicates.items():
+        assert all(path.read_text() == group * 100 for path in paths)
+        assert not os.path.samefile(paths[0], paths[1])
+
+
+def test_snapshot_falls_back_to_copy(tmp_path, monkeypatch):
+    def link(*args, **kwargs):
+        raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+
+    monkeypatch.setattr(snapshot.os, "link", link)
+    monkeypatch.setattr(snapshot, "clone_file", _unsupported)
+    folder = tmp_path / "folder"
+    (folder / "sub").mkdir(parents=True)
+    (folder / "a.txt").write_text("a")
+    (folder / "sub" / "b.txt").write_text("b")
+
+    path, stats = snapshot.create_snapshot(folder)
+
+    assert (stats.linked, stats.cloned, stats.copied) == (0, 0, 2)
+    assert (path / "a.txt").read_text() == "a"
+    assert (path / "sub" / "b.txt").read_text() == "b"
+    assert not os.path.samefile(path / "a.txt", folder / "a.txt")
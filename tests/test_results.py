@@ -0,0 +1,83 @@
+"""Tests for the result sets behind the GUI's results pane."""
+
+import os
+
+import pytest
+
+from OrganiserPro.dedupe import find_duplicate_ids, plan_duplicates
+from OrganiserPro.index import FileIndex
+from OrganiserPro.plan import DELETE
+from OrganiserPro.results import KEEP, ResultSet
+from OrganiserPro.sorter import plan_sort_by_type
+
+
+def _results():
+    results = ResultSet("/root", "Folder")
+    pdf = results.add_group("pdf/")
+    txt = results.add_group("txt/")
+    for group, path, size in [
+        (txt, "/root/b.txt", 30),
+        (pdf, "/root/c.pdf", 10),
+        (txt, "/root/a.txt", 20),
+        (pdf, "/root/a.pdf", -1),
+    ]:
+        results.add(group, path, size, "move")
+    return results
+
+
+def test_rows_share_action_names():
+    results = _results()
+
+    assert len(results) == 4
+    assert results.action_names == ["move"]
+    assert results.row(0) == ("txt/", "/root/b.txt", 30, "move")
+
+
+@pytest.mark.parametrize(
+    "options, expected",
+    [
+        ({}, [1, 3, 0, 2]),
+        ({"sort_by": "path"}, [3, 2, 0, 1]),
+        ({"sort_by": "size", "descending": True}, [0, 2, 1, 3]),
+        ({"group_filter": "TXT"}, [0, 2]),
+        ({"group_filter": "t"}, [0, 2]),
+        ({"min_size": 15, "max_size": 25}, [2]),
+    ],
+)
+def test_view_filters_and_sorts_row_numbers(options, expected):
+    assert list(_results().view(**options)) == expected
+
+
+def test_view_rejects_unknown_sort_key():
+    with pytest.raises(ValueError):
+        _results().view(sort_by="name")
+
+
+def test_from_plan_groups_by_folder_with_sizes(tmp_path):
+    (tmp_path / "a.txt").write_text("abc")
+    (tmp_path / "b.pdf").write_text("pdf")
+    index = FileIndex()
+
+    plan = plan_sort_by_type(str(tmp_path), index=index)
+    results = ResultSet.from_plan(plan, index)
+
+    rows = sorted(results.row(i) for i in range(len(results)))
+    assert rows == [
+        ("pdf" + os.sep, str(tmp_path / "b.pdf"), 3, "move"),
+        ("txt" + os.sep, str(tmp_path / "a.txt"), 3, "move"),
+    ]
+
+
+def test_from_duplicates_keeps_first_of_each_group(tmp_path):
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (tmp_path / name).write_text("same")
+    scan = find_duplicate_ids(str(tmp_path))
+
+    plan = plan_duplicates(scan, str(tmp_path), DELETE)
+    results = ResultSet.from_duplicates(scan, plan)
+
+    assert [results.row(i)[::3] for i in range(len(results))] == [
+        ("1", KEEP),
+        ("1", DELETE),
+        ("1", DELETE),
+    ]
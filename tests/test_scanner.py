@@ -0,0 +1,117 @@
+"""Tests for scanning directories."""
+
+import os
+
+from OrganiserPro import dedupe, scanner
+from OrganiserPro.scanner import SNAPSHOTS_DIR_NAME, scan_files, stat_entry
+
+
+def _tree(root):
+    for rel in ("b.txt", "a.txt", ".hidden", "sub/c.txt", "sub/deeper/d.txt"):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+    (root / SNAPSHOTS_DIR_NAME / "old").mkdir(parents=True)
+    (root / SNAPSHOTS_DIR_NAME / "old" / "a.txt").write_text("snapshot")
+
+
+def _rel(root, entries):
+    return [os.path.relpath(entry.path, root) for entry in entries]
+
+
+def test_scan_files_top_level_in_name_order(tmp_path):
+    _tree(tmp_path)
+
+    assert _rel(tmp_path, scan_files(tmp_path)) == ["a.txt", "b.txt"]
+
+
+def test_scan_files_recursive_skips_snapshots(tmp_path):
+    _tree(tmp_path)
+
+    assert _rel(tmp_path, scan_files(tmp_path, recursive=True)) == [
+        "a.txt",
+        "b.txt",
+        os.path.join("sub", "c.txt"),
+        os.path.join("sub", "deeper", "d.txt"),
+    ]
+
+
+def test_scan_files_can_include_hidden_files(tmp_path):
+    _tree(tmp_path)
+
+    names = [e.name for e in scan_files(tmp_path, include_hidden=True)]
+
+    assert names == [".hidden", "a.txt", "b.txt"]
+
+
+def test_entries_carry_stat_fields(tmp_path):
+    _tree(tmp_path)
+    entry = next(iter(scan_files(tmp_path)))
+    st = os.stat(entry.path)
+
+    assert (entry.size, entry.mtime_ns, entry.inode, entry.dev) == (
+        st.st_size,
+        st.st_mtime_ns,
+        st.st_ino,
+        st.st_dev,
+    )
+    assert (entry.stem, entry.suffix) == ("a", ".txt")
+    assert stat_entry(entry.path) == entry
+
+
+def test_symlinks_to_files_followed_but_not_to_directories(tmp_path):
+    _tree(tmp_path)
+    os.symlink(tmp_path / "a.txt", tmp_path / "link.txt")
+    os.symlink(tmp_path / "sub", tmp_path / "linked-dir")
+    os.symlink(tmp_path / "missing", tmp_path / "dangling.txt")
+
+    entries = list(scan_files(tmp_path, recursive=True))
+
+    assert "link.txt" in [e.name for e in entries]
+    assert not any("linked-dir" in e.path for e in entries)
+    assert "dangling.txt" not in [e.name for e in entries]
+
+
+def test_unreadable_directory_is_skipped(tmp_path):
+    _tree(tmp_path)
+
+    assert list(scan_files(tmp_path / "missing")) == []
+
+
+def test_scan_files_reads_directories_lazily(tmp_path, monkeypatch):
+    _tree(tmp_path)
+    read = []
+    original = scanner._read_dir
+
+    def _read_dir(current, *args):
+        read.append(os.path.relpath(current, tmp_path))
+        return original(current, *args)
+
+    monkeypatch.setattr(scanner, "_read_dir", _read_dir)
+    entries = scan_files(tmp_path, recursive=True)
+
+    assert read == []
+    next(entries)
+    assert read == ["."]
+    list(entries)
+    assert read == [".", "sub", os.path.join("sub", "deeper")]
+
+
+def test_find_duplicates_consumes_the_scan_generator(tmp_path, monkeypatch):
+    _tree(tmp_path)
+    (tmp_path / "sub" / "copy.txt").write_text("a.txt")
+    consumed = []
+
+    def scan(*args, **kwargs):
+        for entry in scanner.scan_files(*args, **kwargs):
+            consumed.append(entry.name)
+            yield entry
+
+    monkeypatch.setattr(dedupe, "scan_files", scan)
+
+    duplicates = dedupe.find_duplicates(str(tmp_path), recursive=True)
+
+    assert consumed == ["a.txt", "b.txt", "c.txt", "copy.txt", "d.txt"]
+    assert list(duplicates.values()) == [
+        [tmp_path / "a.txt", tmp_path / "sub" / "copy.txt"]
+    ]
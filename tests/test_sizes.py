@@ -0,0 +1,85 @@
+"""Tests for sorting and counting files by size."""
+
+import pytest
+
+from OrganiserPro.scanner import FileEntry
+from OrganiserPro.sizes import (
+    SizeBuckets,
+    SizeHistogram,
+    format_size,
+    parse_size,
+)
+from OrganiserPro.sorter import plan_sort_by_size
+
+
+def _entry(size):
+    return FileEntry("/f", "f", size, 0, 0, 0)
+
+
+def test_parse_and_format_sizes():
+    assert parse_size("512") == 512
+    assert parse_size("100K") == 100 * 1024
+    assert parse_size("1.5M") == 3 * 512 * 1024
+    assert parse_size("2GiB") == 2 * 1024**3
+    assert format_size(1536 * 1024) == "1.5M"
+    assert format_size(1024**3) == "1G"
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_bucket_upper_bounds_are_exclusive():
+    buckets = SizeBuckets.from_boundaries([1024, 1024**2])
+
+    assert buckets.names == ("under-1K", "1K-1M", "1M-and-over")
+    assert [buckets.bucket(_entry(s)) for s in (0, 1023, 1024, 1024**2)] == [
+        "under-1K",
+        "under-1K",
+        "1K-1M",
+        "1M-and-over",
+    ]
+    assert buckets.range_label(1) == "1K - 1M"
+    assert buckets.range_label(2) == "1M and over"
+
+
+def test_log2_buckets_double_in_size():
+    buckets = SizeBuckets.log2(1024, 8192)
+
+    assert buckets.boundaries == (1024, 2048, 4096, 8192)
+    assert buckets.bucket(_entry(3000)) == "2K-4K"
+
+
+@pytest.mark.parametrize(
+    "boundaries, names",
+    [((10, 5), ("a", "b", "c")), ((0,), ("a", "b")), ((10,), ("a",))],
+)
+def test_invalid_buckets_are_rejected(boundaries, names):
+    with pytest.raises(ValueError):
+        SizeBuckets(boundaries, names)
+
+
+def test_histogram_counts_files_and_bytes():
+    histogram = SizeHistogram(SizeBuckets.from_boundaries([100]))
+
+    histogram.add(_entry(size) for size in (10, 20, 100, 500))
+
+    assert histogram.counts == [2, 2]
+    assert histogram.sizes == [30, 600]
+    assert (histogram.total_files, histogram.total_size) == (4, 630)
+
+
+def test_plan_sort_by_size_moves_into_buckets(tmp_path):
+    (tmp_path / "small.txt").write_bytes(b"x" * 10)
+    (tmp_path / "big.bin").write_bytes(b"x" * 2000)
+
+    plan = plan_sort_by_size(str(tmp_path), SizeBuckets.from_boundaries([1024]))
+
+    assert sorted((a.source, a.target) for a in plan.actions) == [
+        (
+            str(tmp_path / "big.bin"),
+            str(tmp_path / "1K-and-over" / "big.bin"),
+        ),
+        (
+            str(tmp_path / "small.txt"),
+            str(tmp_path / "under-1K" / "small.txt"),
+        ),
+    ]
@@ -0,0 +1,72 @@
+"""Tests for planning and running sorts over directory trees."""
+
+import os
+
+from OrganiserPro.scanner import scan_tree
+from OrganiserPro.sorter import plan_sort_by_type, sort_by_type
+
+
+def _tree(root, *paths):
+    for rel in paths:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+
+
+def _moves(root, plan):
+    return sorted(
+        (os.path.relpath(a.source, root), os.path.relpath(a.target, root))
+        for a in plan.actions
+    )
+
+
+def test_scan_tree_orders_directories_and_skips_hidden(tmp_path):
+    _tree(tmp_path, "b/x.txt", "a/z/y.txt", "a/w.txt", ".git/HEAD", "a/.hidden")
+
+    tree = scan_tree(tmp_path, workers=4)
+
+    assert [(os.path.relpath(d, tmp_path), [e.name for e in f]) for d, f in tree] == [
+        (".", []),
+        ("a", ["w.txt"]),
+        (os.path.join("a", "z"), ["y.txt"]),
+        ("b", ["x.txt"]),
+    ]
+
+
+def test_recursive_sort_in_place(tmp_path):
+    _tree(tmp_path, "a.pdf", "sub/b.txt", "sub/c.pdf")
+
+    plan = plan_sort_by_type(str(tmp_path), recursive=True)
+
+    assert _moves(tmp_path, plan) == [
+        ("a.pdf", os.path.join("pdf", "a.pdf")),
+        (os.path.join("sub", "b.txt"), os.path.join("sub", "txt", "b.txt")),
+        (os.path.join("sub", "c.pdf"), os.path.join("sub", "pdf", "c.pdf")),
+    ]
+
+
+def test_recursive_sort_flattened_resolves_collisions_by_path(tmp_path):
+    _tree(tmp_path, "one/a.txt", "two/a.txt", "a.txt")
+
+    plans = [
+        plan_sort_by_type(str(tmp_path), recursive=True, flatten=True, workers=n)
+        for n in (1, 8)
+    ]
+
+    assert _moves(tmp_path, plans[0]) == _moves(tmp_path, plans[1]) == [
+        ("a.txt", os.path.join("txt", "a.txt")),
+        (os.path.join("one", "a.txt"), os.path.join("txt", "a_1.txt")),
+        (os.path.join("two", "a.txt"), os.path.join("txt", "a_2.txt")),
+    ]
+
+
+def test_sorting_again_does_not_nest_folders(tmp_path):
+    root = tmp_path / "tree"
+    _tree(root, "a.pdf", "sub/b.txt")
+
+    sort_by_type(str(root), recursive=True)
+    plan = plan_sort_by_type(str(root), recursive=True)
+
+    assert plan.actions == []
+    assert (root / "pdf" / "a.pdf").exists()
+    assert (root / "sub" / "txt" / "b.txt").exists()
@@ -0,0 +1,59 @@
+"""Tests for the synthetic trees used by the benchmarks."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from OrganiserPro.dedupe import DedupeStats, find_duplicate_ids
+
+BENCHMARKS = Path(__file__).resolve().parent.parent / "benchmarks"
+
+
+@pytest.fixture
+def treegen(monkeypatch):
+    monkeypatch.syspath_prepend(str(BENCHMARKS))
+    import treegen
+
+    return treegen
+
+
+def _snapshot(root):
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = Path(directory) / name
+            files[str(path.relative_to(root))] = path.read_bytes()
+    return files
+
+
+def test_same_seed_same_tree(tmp_path, treegen):
+    spec = treegen.TreeSpec(files=60, depth=2, fanout=2, median_size=2048, seed=3)
+
+    first = treegen.generate_tree(tmp_path / "one", spec)
+    second = treegen.generate_tree(tmp_path / "two", spec)
+
+    assert first == second
+    assert _snapshot(tmp_path / "one") == _snapshot(tmp_path / "two")
+    assert first.files == len(_snapshot(tmp_path / "one")) == 60
+    assert first.directories == 1 + 2 + 4
+
+
+def test_dedupe_finds_exactly_the_generated_duplicates(tmp_path, treegen):
+    spec = treegen.TreeSpec(
+        files=200,
+        median_size=16 * 1024,
+        duplicate_ratio=0.2,
+        hardlink_ratio=0.1,
+        same_size_ratio=0.2,
+        seed=1,
+    )
+    tree = treegen.generate_tree(tmp_path, spec)
+    stats = DedupeStats()
+
+    scan = find_duplicate_ids(str(tmp_path), recursive=True, stats=stats)
+
+    assert tree.duplicates and tree.hardlinks and tree.same_size
+    assert sum(len(ids) - 1 for ids in scan.groups.values()) == tree.duplicates
+    assert stats.hardlinked_files == tree.hardlinks
+    assert stats.bytes_scanned == tree.bytes
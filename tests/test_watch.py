@@ -0,0 +1,69 @@
+"""Tests for sorting files as they arrive in a watched directory."""
+
+from OrganiserPro.sorter import bucket_by_type
+from OrganiserPro.watch import DirectoryWatcher
+
+
+def _watcher(tmp_path):
+    return DirectoryWatcher(tmp_path, bucket_by_type, settle=1.0)
+
+
+def test_file_is_moved_once_settled(tmp_path):
+    (tmp_path / "photo.jpg").write_text("done")
+    watcher = _watcher(tmp_path)
+
+    watcher.queue("photo.jpg", now=0.0)
+    assert not watcher.sort_due(now=0.5).done
+    assert watcher.timeout(now=0.5) == 0.5
+
+    result = watcher.sort_due(now=1.0)
+
+    assert [a.target for a in result.done] == [str(tmp_path / "jpg" / "photo.jpg")]
+    assert (tmp_path / "jpg" / "photo.jpg").read_text() == "done"
+    assert watcher.timeout(now=1.0) is None
+
+
+def test_existing_file_still_being_written_is_not_moved(tmp_path):
+    partial = tmp_path / "download.zip"
+    partial.write_text("first half")
+    watcher = _watcher(tmp_path)
+
+    watcher.queue_existing(now=0.0)
+    assert not watcher.sort_due(now=0.0).done
+    with open(partial, "a") as f:
+        f.write(", second half")
+
+    assert not watcher.sort_due(now=1.0).done
+    assert partial.exists()
+
+    result = watcher.sort_due(now=2.0)
+
+    assert len(result.done) == 1
+    assert (tmp_path / "zip" / "download.zip").read_text() == "first half, second half"
+
+
+def test_hidden_and_vanished_files_are_ignored(tmp_path):
+    (tmp_path / ".part").write_text("hidden")
+    (tmp_path / "gone.txt").write_text("temporary")
+    watcher = _watcher(tmp_path)
+
+    watcher.queue(".part", now=0.0)
+    watcher.queue("gone.txt", now=0.0)
+    (tmp_path / "gone.txt").unlink()
+
+    assert not watcher.sort_due(now=5.0).done
+    assert (tmp_path / ".part").exists()
+    assert watcher.timeout(now=5.0) is None
+
+
+def test_collisions_get_a_new_name(tmp_path):
+    (tmp_path / "txt").mkdir()
+    (tmp_path / "txt" / "notes.txt").write_text("old")
+    (tmp_path / "notes.txt").write_text("new")
+    watcher = _watcher(tmp_path)
+
+    watcher.queue("notes.txt", now=0.0)
+    watcher.sort_due(now=1.0)
+
+    assert (tmp_path / "txt" / "notes.txt").read_text() == "old"
+    assert (tmp_path / "txt" / "notes_1.txt").read_text() == "new"